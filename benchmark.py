@@ -0,0 +1,242 @@
+"""
+Benchmark suite for the design solvers
+
+Times the reference cases step by step:
+
+- the debutanizer from column.py, as one column and as noisy batches
+- a synthetic wide feed with every one of the 17 components present
+- the benzene/toluene column from binary/OOP_binary.py (McCabe-Thiele)
+
+Each benchmark reports the best time per call over several repeats. Results
+can be saved as a JSON baseline, and later runs are compared against it and
+flagged when a benchmark is slower than the baseline by more than the
+tolerance:
+
+python benchmark.py --save               writes benchmark_baseline.json
+python benchmark.py                      compares against it, exit code 1 on regression
+python benchmark.py --filter underwood   runs the matching benchmarks only
+
+Baselines are only comparable on the same machine and library versions,
+which are stored with them
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+from fugk.batch import (batch_distillation, batch_vapour_pressure, batch_minimum_reflux, batch_gilliland, batch_feed_stage)
+from fugk.column import Distillation
+from fugk.binary.properties import compounds
+from fugk.binary.mccabe_thiele import EquilibriumCurve, step_stages
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+debutanizer = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+wide = [10, 5, 5, 120, 20, 800, 400, 532, 40, 900, 300, 2097, 2163, 507, 15399, 30, 10]
+
+
+def noisy_feeds(flowrates, cases, seed=0):
+    """
+    Feeds with +/- 20 % noise on every flowrate, shaped (cases x components)
+    """
+    rng = np.random.default_rng(seed)
+    return np.array(flowrates, dtype=float)*rng.uniform(0.8, 1.2, (cases, len(flowrates)))
+
+
+def step_benchmarks(name, feeds):
+    """
+    Benchmark factories of the separate FUG(K) steps for a batch of feeds
+
+    feeds builds the (cases x components) flowrates. It and the design the
+    steps start from only run when the first of these benchmarks is built
+    """
+    @lru_cache(maxsize=None)
+    def inputs():
+        flowrates = feeds()
+        cases = flowrates.shape[0]
+        T = np.full(cases, 273.0 + 140)
+        return {
+            "flowrates": flowrates,
+            "T": T,
+            "results": batch_distillation(components, flowrates, "ethyl-acetylene", "pentane", T, 0.5, 0.95, 0.9999, 1.2, 0.72),
+            "LiK": np.full(cases, components.index("ethyl-acetylene")),
+            "HeK": np.full(cases, components.index("pentane")),
+            "q": np.full(cases, 0.5),
+            "Rf": np.full(cases, 1.2)
+        }
+
+    steps = {
+        "vapour pressure": lambda c: lambda: batch_vapour_pressure(components, c["T"]),
+        "underwood": lambda c: lambda: batch_minimum_reflux(c["results"]["feedMoleComposition"], c["results"]["topMoleFraction"], c["results"]["rvHeK"], c["HeK"], c["q"]),
+        "gilliland": lambda c: lambda: batch_gilliland(c["results"]["Nmin"], c["results"]["Rmin"], c["Rf"]),
+        "kirkbride": lambda c: lambda: batch_feed_stage(c["results"]["idealPlates"], c["results"]["feedMoleComposition"], c["results"]["topMoleFraction"], c["results"]["bottomMoleFraction"], c["results"]["topComposition"], c["results"]["bottomComposition"], c["LiK"], c["HeK"]),
+        "full": lambda c: lambda: batch_distillation(components, c["flowrates"], "ethyl-acetylene", "pentane", c["T"], 0.5, 0.95, 0.9999, 1.2, 0.72)
+    }
+
+    return {"%s %s" % (name, step): (lambda make=make: make(inputs())) for step, make in steps.items()}
+
+
+def binary_benchmarks():
+    """
+    Benchmark factories of the benzene/toluene McCabe-Thiele design at 1 atm
+    """
+    @lru_cache(maxsize=None)
+    def inputs():
+        benzene, toluene = compounds["benzene"], compounds["toulene"]
+        P = 1.01325
+        return {
+            "benzene": benzene,
+            "toluene": toluene,
+            "P": P,
+            "xF": 40/78/(40/78 + 60/92),
+            "xD": 97/78/(97/78 + 3/92),
+            "xB": 2/78/(2/78 + 98/92),
+            "curve": EquilibriumCurve(benzene["Psat"], toluene["Psat"], P, benzene.solve_Tsat(P), toluene.solve_Tsat(P))
+        }
+
+    steps = {
+        "saturation temperature": lambda c: lambda: (c["benzene"].solve_Tsat(c["P"]), c["toluene"].solve_Tsat(c["P"])),
+        "equilibrium curve": lambda c: lambda: EquilibriumCurve(c["benzene"]["Psat"], c["toluene"]["Psat"], c["P"], c["benzene"].solve_Tsat(c["P"]), c["toluene"].solve_Tsat(c["P"])),
+        "mccabe-thiele stepping": lambda c: lambda: step_stages(c["curve"], c["xF"], c["xD"], c["xB"], 3.5)
+    }
+
+    return {"binary %s" % step: (lambda make=make: make(inputs())) for step, make in steps.items()}
+
+
+def benchmarks():
+    """
+    Every benchmark by name, as a factory that builds its inputs and returns
+    the function to time, so only the selected benchmarks build anything
+    """
+    column = lru_cache(maxsize=None)(lambda: Distillation(components, debutanizer, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999))
+    designs = {
+        "design": lambda c: lambda: c.design(1.2, 0.72),
+        "design at P": lambda c: lambda: c.design(1.2, 0.72, columnTemperatures=True, distributeNonKeys=True)
+    }
+
+    cases = {"debutanizer %s" % step: (lambda make=make: make(column())) for step, make in designs.items()}
+    cases.update(step_benchmarks("debutanizer 1", lambda: noisy_feeds(debutanizer, 1)))
+    cases.update(step_benchmarks("debutanizer 100k", lambda: noisy_feeds(debutanizer, 100000)))
+    cases.update(step_benchmarks("wide 10k", lambda: noisy_feeds(wide, 10000)))
+    cases.update(binary_benchmarks())
+
+    return cases
+
+
+def time_call(function, repeat=5, minimum=0.05):
+    """
+    Best time per call (s) over repeat runs of enough calls to last minimum s
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minimum:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(minimum/elapsed) + 1)
+
+    best = elapsed/number
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        best = min(best, (time.perf_counter() - start)/number)
+
+    return best
+
+
+def run(pattern=None, repeat=5):
+    """
+    Runs the benchmarks whose name contains pattern, returns {name: s per call}
+    """
+    return {name: time_call(factory(), repeat) for name, factory in benchmarks().items() if pattern is None or pattern in name}
+
+
+def environment():
+    """
+    Machine and library versions stored with a baseline
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "system": platform.system()
+    }
+
+
+def save_baseline(timings, path=BASELINE):
+    """
+    Writes the timings and environment to a JSON baseline, keeping the
+    entries of benchmarks that were not run
+    """
+    baseline = load_baseline(path) or {"timings": {}}
+    baseline["timings"].update(timings)
+    baseline["environment"] = environment()
+    with open(path, "w") as file:
+        json.dump(baseline, file, indent=2, sort_keys=True)
+
+
+def load_baseline(path=BASELINE):
+    """
+    Reads a JSON baseline, None if there is none
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare(timings, baseline, tolerance=0.25):
+    """
+    Returns (name, baseline s, current s, ratio) for every benchmark slower
+    than its baseline by more than the tolerance fraction
+    """
+    regressions = []
+    for name, seconds in timings.items():
+        reference = baseline["timings"].get(name)
+        if reference is not None and seconds > reference*(1 + tolerance):
+            regressions.append((name, reference, seconds, seconds/reference))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Times the design solvers and compares them with a baseline")
+    parser.add_argument("--save", action="store_true", help="save the timings as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default %(default)s)")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction (default %(default)s)")
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="repeats per benchmark (default %(default)s)")
+    args = parser.parse_args()
+
+    timings = run(args.filter, args.repeat)
+    baseline = load_baseline(args.baseline)
+
+    print("\n%-40s %12s %12s %8s" % ("Benchmark", "Time", "Baseline", "Ratio"))
+    for name, seconds in timings.items():
+        reference = baseline["timings"].get(name) if baseline else None
+        if reference:
+            print("%-40s %9.3f ms %9.3f ms %8.2f" % (name, seconds*1000, reference*1000, seconds/reference))
+        else:
+            print("%-40s %9.3f ms %12s %8s" % (name, seconds*1000, "-", "-"))
+
+    if args.save:
+        save_baseline(timings, args.baseline)
+        print("\nBaseline saved to %s" % args.baseline)
+    elif baseline is not None:
+        if baseline.get("environment") != environment():
+            print("\nWarning: baseline was recorded in a different environment")
+        regressions = compare(timings, baseline, args.tolerance)
+        for name, reference, seconds, ratio in regressions:
+            print("REGRESSION %s: %.3f ms -> %.3f ms (x%.2f)" % (name, reference*1000, seconds*1000, ratio))
+        if regressions:
+            sys.exit(1)
+        print("\nNo regressions beyond %.0f %%" % (args.tolerance*100))
@@ -1,16 +0,0 @@
-import numpy as np
-
-test = {
-    "test": 1,
-    "test2": 2,
-    "test3": 3,
-    "test4": 4,
-    "test5": 5
-}
-
-print(list(test.keys()))
-
-tester = list(test.keys())
-
-print(tester[1])
-
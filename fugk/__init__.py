@@ -0,0 +1,32 @@
+"""
+Multicomponent distillation column design with the FUG(K) short-cut method
+
+The modules live in this package, e.g. fugk.column, fugk.batch or
+fugk.binary for the McCabe-Thiele binary column. The most used names are
+importable from the package itself, their module is only imported when one
+of them is first used:
+
+from fugk import Distillation, batch_distillation
+"""
+import importlib
+
+_exports = {
+    "Distillation": "column",
+    "ColumnResult": "results",
+    "print_column_result": "report",
+    "batch_distillation": "batch",
+    "batch_sizing": "sizing",
+    "instrument": "instrumentation",
+    "SolverStats": "instrumentation"
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    """
+    Imports the module holding name on first use
+    """
+    if name not in _exports:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module("." + _exports[name], __name__), name)
@@ -0,0 +1,290 @@
+"""
+Vectorised FUG(K) short-cut method for many column specifications at once
+
+Follows the same steps as column.Distillation, but every quantity carries a
+leading "cases" axis so a whole batch of feeds is designed in one call:
+
+vapour pressure -> relative volatility -> split -> Fenske -> Underwood
+-> Gilliland -> Kirkbride -> actual trays
+
+Flowrates are arrays shaped (cases x components). Keys, T, q, recoveries,
+reflux factor and efficiency are either scalars or arrays shaped (cases,)
+"""
+import numpy as np
+
+from .component_store import store, component_ids, vapour_pressure, temperature_mask
+from .underwood import minimum_reflux
+from .bubble_dew import bubble_point, dew_point, geometric_mean_volatility
+
+
+def key_index(components, key, cases):
+    """
+    Converts key component names or indices into an integer array of shape (cases,)
+    """
+    key = np.asarray(key)
+    if key.dtype.kind in "US":
+        key = np.vectorize(list(components).index, otypes=[int])(key)
+    return np.broadcast_to(key.astype(int), (cases,))
+
+
+def case_array(value, cases):
+    """
+    Broadcasts a scalar or per-case input to a float array of shape (cases,)
+    """
+    return np.broadcast_to(np.asarray(value, dtype=float), (cases,))
+
+
+def batch_vapour_pressure(components, T, cache=None):
+    """
+    Calculates component vapour pressures in kPa for every case
+
+    The correlation is only evaluated once per distinct temperature, through
+    a vp_cache.VapourPressureCache if one is given
+
+    Returns an array shaped (cases x components) and a boolean mask that is
+    True where T is outside the [Tmin, Tmax] range of the correlation
+    """
+    ids = component_ids(components)
+    Tunique, inverse = np.unique(np.asarray(T, dtype=float), return_inverse=True)
+    below, above = temperature_mask(ids, Tunique)
+
+    if cache is None:
+        Pvap = vapour_pressure(ids, Tunique)
+    else:
+        Pvap = cache.vapour_pressure(ids, Tunique)
+
+    return Pvap.T[inverse.ravel()]/1000, (below | above).T[inverse.ravel()]
+
+
+def batch_relative_volatility(vapourPressures, HeK):
+    """
+    Calculates relative volatilities with respect to the heavy key
+    """
+    rows = np.arange(vapourPressures.shape[0])
+    return vapourPressures/vapourPressures[rows, HeK][:, None]
+
+
+def batch_split(feedComposition, rvHeK, LiK, HeK, topRecovery, bottomRecovery):
+    """
+    Splits every component between distillate and bottoms
+
+    Keys are split using the recoveries, components lighter than the heavy key
+    go to the top and heavier components go to the bottom
+    """
+    cases, n = feedComposition.shape
+    columns = np.arange(n)
+    isLiK = columns == LiK[:, None]
+    isHeK = columns == HeK[:, None]
+
+    rows = np.arange(cases)
+    lighter = rvHeK > rvHeK[rows, HeK][:, None]
+
+    topFraction = np.where(lighter, 1.0, 0.0)
+    topFraction = np.where(isLiK, topRecovery[:, None], topFraction)
+    topFraction = np.where(isHeK, 1 - bottomRecovery[:, None], topFraction)
+
+    bottomFraction = np.where(lighter, 0.0, 1.0)
+    bottomFraction = np.where(isLiK, 1 - topRecovery[:, None], bottomFraction)
+    bottomFraction = np.where(isHeK, bottomRecovery[:, None], bottomFraction)
+
+    return feedComposition*topFraction, feedComposition*bottomFraction
+
+
+def batch_N_min(topMoleFraction, bottomMoleFraction, rvHeK, LiK, HeK, partialReboiler=True):
+    """
+    Minimum number of ideal stages from the Fenske equation
+    """
+    rows = np.arange(topMoleFraction.shape[0])
+    top1 = topMoleFraction[rows, LiK]/topMoleFraction[rows, HeK]
+    top2 = bottomMoleFraction[rows, HeK]/bottomMoleFraction[rows, LiK]
+
+    Nmin = np.ceil(np.log(top1*top2)/np.log(rvHeK[rows, LiK]))
+
+    if partialReboiler == False:
+        Nmin -= 1
+
+    return Nmin
+
+
+def batch_non_key_distribution(feedComposition, rvHeK, LiK, HeK, topRecovery, bottomRecovery):
+    """
+    Distributes every component between distillate and bottoms with the
+    Fenske equation at total reflux (Hengstebeck/Geddes method)
+
+    d/b = (d/b of the heavy key)*alpha^Nm
+
+    Nm is the unrounded Fenske number of stages from the key recoveries, so the
+    keys keep their specified split and every non-key gets the split Fenske
+    predicts instead of going entirely to one end
+    """
+    rows = np.arange(feedComposition.shape[0])
+    lnHeK = np.log((1 - bottomRecovery)/bottomRecovery)
+    Nm = (np.log(topRecovery/(1 - topRecovery)) - lnHeK)/np.log(rvHeK[rows, LiK])
+
+    # Fraction to the top is 1/(1 + b/d), worked in logs so it cannot overflow
+    with np.errstate(over="ignore"):
+        lnRatio = lnHeK[:, None] + Nm[:, None]*np.log(rvHeK)
+        topFraction = 1/(1 + np.exp(-lnRatio))
+
+    topComposition = feedComposition*topFraction
+    bottomComposition = feedComposition - topComposition
+
+    return topComposition, bottomComposition
+
+
+def batch_minimum_reflux(feedMoleComposition, topMoleFraction, rvHeK, HeK, q):
+    """
+    Minimum reflux ratio from both Underwood equations, using the root directly
+    above the heavy key volatility
+    """
+    return minimum_reflux(feedMoleComposition, topMoleFraction, rvHeK, q, HeK)
+
+
+def batch_gilliland(Nmin, Rmin, Rf, rounded=True):
+    """
+    Number of ideal plates at the operating reflux ratio R = Rf*Rmin,
+    rounded up unless rounded is False
+    """
+    R = Rf*Rmin
+    X = (R - Rmin)/(R + 1)
+
+    Ya = (1 + 54.4*X)/(11 + 117.2*X)
+    Yb = (X - 1)/np.sqrt(X)
+    Y = 1 - np.exp(Ya*Yb)
+
+    N = (Nmin + Y)/(1 - Y)
+
+    return R, np.ceil(N) if rounded else N
+
+
+def batch_feed_stage(idealPlates, feedMoleComposition, topMoleFraction, bottomMoleFraction, topComposition, bottomComposition, LiK, HeK):
+    """
+    Number of rectifying and stripping trays from the Kirkbride equation
+    """
+    rows = np.arange(idealPlates.shape[0])
+    inside = (feedMoleComposition[rows, HeK]/feedMoleComposition[rows, LiK])*((bottomMoleFraction[rows, LiK]/topMoleFraction[rows, HeK])**2)*(bottomComposition.sum(axis=1)/topComposition.sum(axis=1))
+    ratio = inside**0.206
+
+    Ns = np.round(idealPlates/(ratio + 1))
+    Nr = np.round(idealPlates - Ns)
+
+    return Nr, Ns
+
+
+def batch_actual_trays(idealPlates, efficiency):
+    """
+    Actual number of trays for the given tray efficiency (fraction or percent)
+    """
+    trayEfficiency = np.where(efficiency > 1, efficiency/100, efficiency)
+    return trayEfficiency, np.ceil(idealPlates/trayEfficiency)
+
+
+def batch_distillation(components, flowrate, LiK, HeK, T, q, topRecovery, bottomRecovery, Rf, efficiency=1, partialReboiler=True, P=None, distributeNonKeys=False, cache=None):
+    """
+    Runs the complete FUG(K) short-cut method for a batch of columns
+
+    The components list is shared by every case, flowrate is shaped
+    (cases x components) and the keys may be given as names or indices
+
+    If the column pressure P (kPa) is given, the top and bottom temperatures
+    are found from the dew and bubble points and Fenske and Underwood use the
+    geometric mean volatilities between them instead of those at feed T
+
+    With distributeNonKeys the non-keys are split with the Fenske equation
+    before Underwood, instead of going entirely to the top or bottom
+
+    cache is an optional vp_cache.VapourPressureCache for the vapour
+    pressures at the feed temperature, off by default
+
+    Returns a dictionary of arrays named after the matching attributes of
+    column.Distillation
+    """
+    flowrate = np.atleast_2d(np.asarray(flowrate, dtype=float))
+    cases = flowrate.shape[0]
+
+    LiK = key_index(components, LiK, cases)
+    HeK = key_index(components, HeK, cases)
+    T = case_array(T, cases)
+    q = case_array(q, cases)
+    topRecovery = case_array(topRecovery, cases)
+    bottomRecovery = case_array(bottomRecovery, cases)
+    Rf = case_array(Rf, cases)
+    efficiency = case_array(efficiency, cases)
+
+    molarMass = store["mr"][component_ids(components)]
+    feedComposition = flowrate*molarMass
+    feedMoleComposition = feedComposition/feedComposition.sum(axis=1, keepdims=True)
+
+    vapourPressures, outOfRange = batch_vapour_pressure(components, T, cache=cache)
+    rvHeK = batch_relative_volatility(vapourPressures, HeK)
+
+    topComposition, bottomComposition = batch_split(feedComposition, rvHeK, LiK, HeK, topRecovery, bottomRecovery)
+    topMoleFraction = topComposition/topComposition.sum(axis=1, keepdims=True)
+    bottomMoleFraction = bottomComposition/bottomComposition.sum(axis=1, keepdims=True)
+
+    topTemperature = np.full(cases, np.nan)
+    bottomTemperature = np.full(cases, np.nan)
+    if P is not None:
+        P = case_array(P, cases)
+        topTemperature = dew_point(components, topMoleFraction, P, T)
+        bottomTemperature = bubble_point(components, bottomMoleFraction, P, T)
+        rvHeK = geometric_mean_volatility(components, topTemperature, bottomTemperature, HeK)
+
+    Nmin = batch_N_min(topMoleFraction, bottomMoleFraction, rvHeK, LiK, HeK, partialReboiler)
+
+    if distributeNonKeys:
+        topComposition, bottomComposition = batch_non_key_distribution(feedComposition, rvHeK, LiK, HeK, topRecovery, bottomRecovery)
+        topMoleFraction = topComposition/topComposition.sum(axis=1, keepdims=True)
+        bottomMoleFraction = bottomComposition/bottomComposition.sum(axis=1, keepdims=True)
+
+    phi, Rmin = batch_minimum_reflux(feedMoleComposition, topMoleFraction, rvHeK, HeK, q)
+    R, idealPlates = batch_gilliland(Nmin, Rmin, Rf)
+    Nr, Ns = batch_feed_stage(idealPlates, feedMoleComposition, topMoleFraction, bottomMoleFraction, topComposition, bottomComposition, LiK, HeK)
+    trayEfficiency, actualTrays = batch_actual_trays(idealPlates, efficiency)
+
+    return {
+        "feedComposition": feedComposition,
+        "feedMoleComposition": feedMoleComposition,
+        "vapourPressures": vapourPressures,
+        "outOfRange": outOfRange,
+        "rvHeK": rvHeK,
+        "topTemperature": topTemperature,
+        "bottomTemperature": bottomTemperature,
+        "topComposition": topComposition,
+        "bottomComposition": bottomComposition,
+        "massTopComposition": topComposition/molarMass,
+        "massBottomComposition": bottomComposition/molarMass,
+        "topMoleFraction": topMoleFraction,
+        "bottomMoleFraction": bottomMoleFraction,
+        "Nmin": Nmin,
+        "phi": phi,
+        "Rmin": Rmin,
+        "R": R,
+        "idealPlates": idealPlates,
+        "Nr": Nr,
+        "Ns": Ns,
+        "idealFeedTray": Ns,
+        "trayEfficiency": trayEfficiency,
+        "actualTrays": actualTrays
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    # Debutanizer feed with +/- 20 % noise on every flowrate
+    cases = 10000
+    rng = np.random.default_rng(0)
+    feeds = np.array(flowrates)*rng.uniform(0.8, 1.2, (cases, len(components)))
+
+    start = time.perf_counter()
+    results = batch_distillation(components, feeds, "ethyl-acetylene", "pentane", 273+140, 0.5, 0.95, 0.9999, 1.2, 0.72)
+    elapsed = time.perf_counter() - start
+
+    print("\nBatch FUG(K) for %i cases in %.3f s" % (cases, elapsed))
+    print("Nmin: \t%.1f - %.1f" % (results["Nmin"].min(), results["Nmin"].max()))
+    print("Rmin: \t%.2f - %.2f" % (results["Rmin"].min(), results["Rmin"].max()))
+    print("N: \t%.1f - %.1f" % (results["idealPlates"].min(), results["idealPlates"].max()))
@@ -3,17 +3,26 @@ OOP for a distillation model
 
 By David Rinaldi
 20/02/2021
+
+Part of the fugk.binary package, run the example with
+python -m fugk.binary.OOP_binary. matplotlib is only imported by the
+plotting methods
 """
-import os
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
-from math import exp as exp
-from math import pow as pow
 
-os.chdir("/Users/davidrinaldi/Documents/github/chemeng/Distillation/multicomponent_column/binary")
+from ..instrumentation import timed
+from .properties import compounds
+from .results import BinaryResult
+from .mccabe_thiele import EquilibriumCurve, step_stages
+
+
+def pyplot():
+    """
+    Imports matplotlib on the first plot, so designs run without it
+    """
+    import matplotlib.pyplot as plt
+    return plt
 
-from properties import compounds
 
 class Feed():
     """Class representing the feed stream for a binary distialltion column"""
@@ -52,9 +61,10 @@ class Distillation(Feed):
     feed stage and ideal number of stages
     """
     
+    @timed
     def __init__(self, composition, flowrate, P, topPurity=None, bottomPurity=None, R=0):
         """Defining the properties of the distiallation class"""
-        super().__init__(self, composition, flowrate)
+        super().__init__(composition, flowrate, P)
     
         self.feedComposition = {}
         for i in range(len(composition)):
@@ -86,6 +96,9 @@ class Distillation(Feed):
             TsatList.append(compounds[key]['Tsat'](self.columnPressure))
         self.T = np.linspace(min(TsatList), max(TsatList))
 
+        # Tabulated equilibrium curve, built on first use
+        self.equilibrium = None
+
     def print_mole_fraction(self):
         """Prints the mole fraction of the top product/light-key"""
         keyslist = list(self.feedComposition.keys())
@@ -93,10 +106,10 @@ class Distillation(Feed):
         print("\nMole fraction of %s" % keyslist[0])
         print("xF: %.2f" % self.xF)
 
-        if topPurity is not None:
+        if self.topPurity is not None:
             print("xD: %.2f" % self.xD)
 
-        if bottomPurity is not None:
+        if self.bottomPurity is not None:
             print("xB: %.2f" % self.xB)
 
     def show_eq_diagram(self):
@@ -104,8 +117,9 @@ class Distillation(Feed):
         x = lambda T: ((self.columnPressure - compounds[self.components[1]]["Psat"](T)) / (compounds[self.components[0]]["Psat"](T) - compounds[self.components[1]]['Psat'](T)))
         y = lambda T: x(T)*compounds[self.components[0]]['Psat'](T)/self.columnPressure
 
+        plt = pyplot()
         plt.figure(figsize=(7, 7))
-        plt.plot([x(T) for T in self.T], [y(T) for T in self.T])
+        plt.plot(x(self.T), y(self.T))
 
         plt.plot([0,1], [0,1], "b--")
         plt.axis("equal")
@@ -129,6 +143,7 @@ class Distillation(Feed):
         print("Top temperautre: %.2f K" % self.T[0])
         print("Bottom temperature %.2f K" % self.T[-1])
 
+    @timed
     def operating_lines(self):
         if self.R == 0:
             self.R = float(input("Reflux ratio: ")) # Reflux ratio
@@ -145,33 +160,65 @@ class Distillation(Feed):
 
         return self.R
 
-    def ideal_trays_calculation(self):
-        """States the number of ideal trays"""
-        if self.R == 0:
-            self.R = float(input("Reflux ratio: ")) # Reflux ratio
+    @timed
+    def equilibrium_curve(self):
+        """
+        Returns the tabulated x-y equilibrium curve at column pressure, built
+        on first use and kept for later designs
+        """
+        if self.equilibrium is None:
+            TA = compounds[self.components[0]]['Tsat'](self.columnPressure)
+            TB = compounds[self.components[1]]['Tsat'](self.columnPressure)
+            self.equilibrium = EquilibriumCurve(compounds[self.components[0]]['Psat'], compounds[self.components[1]]['Psat'], self.columnPressure, TA, TB)
+
+        return self.equilibrium
+
+    @timed
+    def stage_steps(self):
+        """
+        Steps off the ideal stages between the equilibrium curve and the
+        operating lines without plotting or printing
+
+        Returns the staircase corner points as arrays, starting at (xD, xD),
+        together with the number of ideal trays and the feed tray
+        """
+        return step_stages(self.equilibrium_curve(), self.xF, self.xD, self.xB, self.R)
+
+    @timed
+    def design(self, R=None):
+        """
+        Runs the McCabe-Thiele design without plotting or printing and returns
+        a results.BinaryResult, which report.print_binary_result can print
+        """
+        if R is not None:
+            self.R = R
         R_slope = self.R/(self.R + 1)
         R_intercept = self.xD/(self.R + 1)
         zF = R_slope * self.xF + R_intercept
         S_slope = (zF - self.xB)/(self.xF - self.xB)
         S = 1/(S_slope - 1)
 
-        # Plotting the ideal stages
-        xP = self.xD
-        yP = self.xD
+        yF = self.equilibrium_curve().y_of_x(self.xF)
+        xStages, yStages, nTray, fTray = self.stage_steps()
+
+        return BinaryResult(tuple(self.components), self.columnPressure, self.xF, self.xD, self.xB, yF, self.R, R_slope, R_intercept, zF, S, nTray, fTray, xStages, yStages)
+
+    @timed
+    def ideal_trays_calculation(self):
+        """States the number of ideal trays"""
+        if self.R == 0:
+            self.R = float(input("Reflux ratio: ")) # Reflux ratio
+        result = self.design()
+        xD, xF, xB, yF, zF = result.xD, result.xF, result.xB, result.yF, result.zF
 
         # Displays the equilibrium diagram for the composition
         x = lambda T: ((self.columnPressure - compounds[self.components[1]]["Psat"](T)) / (compounds[self.components[0]]["Psat"](T) - compounds[self.components[1]]['Psat'](T)))
         y = lambda T: x(T)*compounds[self.components[0]]['Psat'](T)/self.columnPressure
 
-        # Getting Feed Line
-        Tbub = fsolve(lambda T: x(T) - self.xF, np.mean(self.T))
-        print(np.mean(self.T))
-        print(Tbub)
-        yF = y(Tbub[0])
-
         # Plotting equilibrium diagram
+        plt = pyplot()
         plt.figure(figsize=(7, 7))
-        plt.plot([x(T) for T in self.T], [y(T) for T in self.T])
+        plt.plot(x(self.T), y(self.T))
 
         plt.plot([0,1], [0,1], "b--")
         plt.axis("equal")
@@ -187,71 +234,45 @@ class Distillation(Feed):
         plt.grid()
 
         # Plotting operating lines
-        plt.plot([self.xD, self.xD], [0, self.xD], "r--")
-        plt.plot(self.xD, self.xD, "ro", ms=10)
-        plt.text(self.xD-0.11, 0.02, "xD = %.2f" % self.xD)
-
-        plt.plot([self.xF, self.xF, self.xF], [0, self.xF, yF], "r--")
-        plt.plot([self.xF, self.xF], [self.xF, yF], "ro", ms=10)
-        plt.text(self.xF+0.01, 0.02, "xF = %.2f" % self.xF)
-        plt.text(self.xF-0.1, yF+0.02, "yF= %.2f" % yF)
-
-        plt.plot([self.xB, self.xB], [0, self.xB], "r--")
-        plt.plot(self.xB, self.xB, "ro", ms=10)
-        plt.text(self.xB+0.01, 0.02, "xB = %.2f" % self.xB)
-
-        plt.plot([self.xD, self.xF], [self.xD, zF], 'r-')
-        plt.plot([self.xB, self.xF], [self.xB, zF], 'r-')
-
-        # Finding ideal number of plats and plotting on a graph
-        nTray = 0
-        located_feed = False
-        fTray = None
-
-        while xP > self.xB:
-            nTray += 1.0
-
-            # Store (xP, yP) in (xQ, yQ)
-            xQ = xP
-            yQ = yP
-
-            # Solve for new xP and plot horizonal line
-            Tdew = fsolve(lambda T: y(T) - yP, 400)
-            xP = x(Tdew)
-            plt.plot([xQ,xP], [yQ, yP], 'r')
-
-            # Plot a numbered circle indicating the ideal trays
-            if xP > self.xB:
+        plt.plot([xD, xD], [0, xD], "r--")
+        plt.plot(xD, xD, "ro", ms=10)
+        plt.text(xD-0.11, 0.02, "xD = %.2f" % xD)
+
+        plt.plot([xF, xF, xF], [0, xF, yF], "r--")
+        plt.plot([xF, xF], [xF, yF], "ro", ms=10)
+        plt.text(xF+0.01, 0.02, "xF = %.2f" % xF)
+        plt.text(xF-0.1, yF+0.02, "yF= %.2f" % yF)
+
+        plt.plot([xB, xB], [0, xB], "r--")
+        plt.plot(xB, xB, "ro", ms=10)
+        plt.text(xB+0.01, 0.02, "xB = %.2f" % xB)
+
+        plt.plot([xD, xF], [xD, zF], 'r-')
+        plt.plot([xB, xF], [xB, zF], 'r-')
+
+        # Plotting the ideal stages, numbered circles mark each tray on the
+        # equilibrium curve
+        plt.plot(result.xStages, result.yStages, 'r')
+        for n, (xP, yP) in enumerate(zip(result.xStages[1::2], result.yStages[1::2]), start=1):
+            if xP > xB:
                 plt.plot(xP, yP, 'ro', ms=5)
-                plt.text(xP - 0.03, yP, nTray)
-
-                if located_feed is False and xP < self.xF:
-                    located_feed = True
-                    fTray = nTray
-                    plt.text(0.05, 0.80, "Feed tray location: %i" % fTray)
+                plt.text(xP - 0.03, yP, n)
+        if result.feedTray is not None:
+            plt.text(0.05, 0.80, "Feed tray location: %i" % result.feedTray)
 
-                # Store xP in xQ
-                xQ = xP
-            
-                # Compute new yP and plot vertical line
-                yP = min([self.xD - R_slope * (self.xD - xP), self.xB + ((S + 1)/S)*(xP-self.xB)])
-                plt.plot([xQ, xP], [yQ, yP], "r")
-
-        nTray -= 1 # Accounts for reboiler
-        
-        return nTray, fTray
+        return result.nTrays, result.feedTray
 
     def number_of_ideal_trays(self):
         """Prints the ideal number of plates and feed plate"""
         nTray, fTray = self.ideal_trays_calculation()
         print("\nIdeal number of trays: %i" % int(nTray))
-        print("Feed tray location: %i" % int(fTray))
+        print("Feed tray location: %s" % ("n/a" if fTray is None else "%i" % int(fTray)))
 
     def show_ideal_tray_diagram(self):
         """Shows the diagram used to calculate ideal trays"""
         #pylint: disable=unused-variable
         self.ideal_trays_calculation()
-        plt.show()
+        pyplot().show()
 
 if __name__=="__main__":
     # Define initial conditions
@@ -0,0 +1,31 @@
+"""
+Binary distillation with the McCabe-Thiele method
+
+The submodules are only imported when one of these names is first used, so
+importing the package is cheap:
+
+from fugk.binary import Distillation, compounds
+"""
+import importlib
+
+_exports = {
+    "Feed": "OOP_binary",
+    "Distillation": "OOP_binary",
+    "Compound": "properties",
+    "compounds": "properties",
+    "EquilibriumCurve": "mccabe_thiele",
+    "step_stages": "mccabe_thiele",
+    "BinaryResult": "results",
+    "print_binary_result": "report"
+}
+
+__all__ = list(_exports)
+
+
+def __getattr__(name):
+    """
+    Imports the submodule holding name on first use
+    """
+    if name not in _exports:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    return getattr(importlib.import_module("." + _exports[name], __name__), name)
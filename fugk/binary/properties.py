@@ -0,0 +1,135 @@
+"""
+Dictionary for physical and chemical properties
+
+By David Rinaldi
+20/02/2021
+
+Each compound is a Compound object holding its Wagner vapour pressure
+constants. Psat and dPsat_dT work on scalars or NumPy arrays of T (K) and
+return bar, Tsat inverts Psat by safeguarded Newton on arrays of pressures
+and memoises scalar pressures. compounds[name]["Psat"] style lookups still
+work
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from ..instrumentation import record_solver
+
+
+class Compound():
+    """
+    Pure component with a Wagner-form saturation pressure
+
+    ln(Psat/Pc) = (a*tau + b*tau^1.5 + c*tau^3 + d*tau^6)/(1 - tau), tau = 1 - T/Tc
+    """
+
+    def __init__(self, mw, Pc, Tc, a, b, c, d, cacheSize=256):
+        """
+        Defining the constants, Pc in bar and Tc in K
+        """
+        self.mw = mw
+        self.Pc = Pc
+        self.Tc = Tc
+        self.a, self.b, self.c, self.d = a, b, c, d
+
+        # Slope of ln(Psat/Pc) against 1 - Tc/T at Tr = 0.7, used to start Newton
+        self.h = np.log(self.Psat(0.7*Tc)/Pc)/(1 - 1/0.7)
+        self.cached_Tsat = lru_cache(maxsize=cacheSize)(self.solve_Tsat)
+
+    def __getitem__(self, key):
+        """
+        Dictionary style access to the properties, e.g. compound["Psat"]
+        """
+        return {"mw": self.mw, "x_Psat": self.x_Psat, "Psat": self.Psat, "Tsat": self.Tsat, "dPsat_dT": self.dPsat_dT}[key]
+
+    def x_Psat(self, T):
+        """
+        Wagner tau = 1 - T/Tc
+        """
+        return 1 - np.asarray(T, dtype=float)/self.Tc
+
+    def ln_Psat(self, T):
+        """
+        ln(Psat) in bar and its derivative with respect to T
+        """
+        tau = self.x_Psat(T)
+        root = np.sqrt(tau)
+        tau3 = tau*tau*tau
+
+        numerator = tau*(self.a + self.b*root + self.c*tau*tau + self.d*tau3*tau*tau)
+        slope = self.a + 1.5*self.b*root + 3*self.c*tau*tau + 6*self.d*tau3*tau*tau
+        inverse = 1/(1 - tau)
+
+        lnP = np.log(self.Pc) + numerator*inverse
+        dlnP_dT = -(slope + numerator*inverse)*inverse/self.Tc
+        return lnP, dlnP_dT
+
+    def Psat(self, T):
+        """
+        Saturation pressure (bar) at T (K)
+        """
+        lnP, _ = self.ln_Psat(T)
+        return np.exp(lnP)
+
+    def dPsat_dT(self, T):
+        """
+        Analytic derivative of Psat (bar/K)
+        """
+        lnP, dlnP_dT = self.ln_Psat(T)
+        return np.exp(lnP)*dlnP_dT
+
+    def solve_Tsat(self, P, tol=1e-12, maxiter=50):
+        """
+        Saturation temperature (K) at P (bar), for scalars or arrays
+
+        Newton on ln(Psat) = ln(P), falling back to bisection whenever a step
+        leaves the bracket [0.25 Tc, Tc]. Pressures at or above Pc return nan
+        """
+        P = np.asarray(P, dtype=float)
+        lnTarget = np.log(P)
+        lo = np.full(P.shape, 0.25*self.Tc)
+        hi = np.full(P.shape, float(self.Tc))
+
+        # Start from the straight line of ln(Psat) against 1/T through the
+        # critical point
+        with np.errstate(divide="ignore", invalid="ignore"):
+            T = np.clip(self.Tc/(1 - np.log(P/self.Pc)/self.h), lo, 0.999*hi)
+        converged = ~(P < self.Pc)
+
+        for iteration in range(1, maxiter + 1):
+            lnP, dlnP_dT = self.ln_Psat(np.where(converged, hi, T))
+            F = lnP - lnTarget
+            lo = np.where(F < 0, T, lo)
+            hi = np.where(F > 0, T, hi)
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = T - F/dlnP_dT
+            inside = (step >= lo) & (step <= hi)
+            nextT = np.where(inside, step, 0.5*(lo + hi))
+
+            done = converged | (inside & (np.abs(step - T) < tol*T))
+            T = np.where(converged, T, nextT)
+            converged = done
+            if np.all(converged):
+                break
+
+        record_solver("solve_Tsat", iteration, iteration*P.size, P.size - np.count_nonzero(converged), P.size)
+
+        T = np.where(P < self.Pc, T, np.nan)
+        return T if T.ndim else float(T)
+
+    def Tsat(self, P):
+        """
+        Saturation temperature (K) at P (bar), memoised for scalar pressures
+        """
+        if np.ndim(P) == 0:
+            return self.cached_Tsat(float(P))
+        return self.solve_Tsat(P)
+
+
+# Dictionary containing physical and chemical properties
+compounds = {
+    "benzene": Compound(78, 48.9, 562.2, -6.98273, 1.33213, -2.62863, -3.33399),
+    "toulene": Compound(92, 41, 591.8, -7.28607, 1.38091, -2.83433, -2.79168)
+}
@@ -0,0 +1,29 @@
+"""
+Reporting layer for results.BinaryResult
+
+Formats a finished design the same way the printing methods of
+OOP_binary.Distillation do. Nothing here is needed to run a design
+"""
+import sys
+
+
+def print_binary_result(result, file=None):
+    """
+    Prints the mole fractions, operating lines and tray numbers of a design
+    """
+    if file is None:
+        file = sys.stdout
+    write = lambda text: print(text, file=file)
+
+    write("\nMole fraction of %s" % result.components[0])
+    write("xF: %.2f" % result.xF)
+    write("xD: %.2f" % result.xD)
+    write("xB: %.2f" % result.xB)
+
+    write("\nOperating Line Calculations")
+    write("Rectifying line intercept: %.2f" % result.rectifyingIntercept)
+    write("Rectifying and stripping line intercept: %.2f" % result.zF)
+    write("Stripping factor: %.2f" % result.S)
+
+    write("\nIdeal number of trays: %i" % result.nTrays)
+    write("Feed tray location: %s" % ("n/a" if result.feedTray is None else "%i" % result.feedTray))
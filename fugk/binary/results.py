@@ -0,0 +1,34 @@
+"""
+Result object returned by the non-printing OOP_binary.Distillation.design
+
+Printing is left to report.py
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass(slots=True)
+class BinaryResult():
+    """
+    Results of a binary McCabe-Thiele design
+
+    xStages and yStages hold the corner points of the staircase, starting at
+    (xD, xD). feedTray is None when the staircase never crosses xF
+    """
+    components: tuple
+    columnPressure: float
+    xF: float
+    xD: float
+    xB: float
+    yF: float
+    R: float
+    rectifyingSlope: float
+    rectifyingIntercept: float
+    zF: float
+    S: float
+    nTrays: int
+    feedTray: Optional[int]
+    xStages: np.ndarray
+    yStages: np.ndarray
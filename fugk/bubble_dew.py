@@ -0,0 +1,142 @@
+"""
+Vectorised bubble and dew point temperature solvers
+
+Raoult's law with the DIPPR-101 vapour pressures from component_store:
+
+bubble point:   sum(x*Psat(T)) = P
+dew point:      sum(y/Psat(T)) = 1/P
+
+Both are solved in log form with Newton's method on 1/T, using the analytic
+derivative of ln(Psat). ln(Psat) is close to linear in 1/T, so a few
+iterations are enough and every case of a batch is solved together
+
+Compositions are shaped (cases x components), P is in kPa to match
+column.Distillation and T is in K
+"""
+import numpy as np
+
+from .component_store import component_ids, ln_vapour_pressure, ln_vapour_pressure_slope
+from .instrumentation import record_solver
+
+
+def initial_temperature(T0, cases):
+    """
+    Warm start temperatures, defaulting to 400 K
+    """
+    if T0 is None:
+        T0 = 400.0
+    return np.broadcast_to(np.asarray(T0, dtype=float), (cases,)).copy()
+
+
+def saturation_terms(ids, T, present):
+    """
+    Returns ln(Psat) in kPa and d(ln Psat)/dT, shaped (cases x components),
+    with absent components set to zero so extrapolated values cannot overflow
+    """
+    lnP = np.where(present, ln_vapour_pressure(ids, T).T - np.log(1000), 0.0)
+    slope = np.where(present, ln_vapour_pressure_slope(ids, T).T, 0.0)
+
+    return lnP, slope
+
+
+def solve_temperature(residual, T, tol, maxiter, name="solve_temperature"):
+    """
+    Newton iteration on u = 1/T for every case at once
+
+    residual(T) returns F and dF/dT. The step in 1/T is limited so a poor
+    starting point cannot send the temperature negative. Cases that do not
+    converge are returned as nan. name labels the solver for instrumentation
+    """
+    u = 1/T
+    converged = np.zeros(T.shape, dtype=bool)
+
+    for iteration in range(1, maxiter + 1):
+        F, dFdT = residual(1/u)
+        dFdu = -dFdT/u**2
+        step = np.clip(F/dFdu, -0.2*u, 0.2*u)
+        u = np.where(converged, u, u - step)
+
+        converged |= np.abs(F) < tol
+        if np.all(converged):
+            break
+
+    record_solver(name, iteration, iteration*T.size, T.size - np.count_nonzero(converged), T.size)
+
+    return np.where(converged, 1/u, np.nan)
+
+
+def bubble_point(components, x, P, T0=None, tol=1e-10, maxiter=50):
+    """
+    Bubble point temperatures of liquids x at pressure P (kPa)
+
+    T0 is a warm start, e.g. the solution of a previous call
+    """
+    ids = component_ids(components)
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    x = x/x.sum(axis=1, keepdims=True)
+    present = x > 0
+    lnPressure = np.log(np.broadcast_to(np.asarray(P, dtype=float), x.shape[:1]))
+
+    def residual(T):
+        lnP, slope = saturation_terms(ids, T, present)
+        K = np.where(present, np.exp(lnP - lnPressure[:, None]), 0.0)
+        total = np.sum(x*K, axis=1)
+        return np.log(total), np.sum(x*K*slope, axis=1)/total
+
+    return solve_temperature(residual, initial_temperature(T0, x.shape[0]), tol, maxiter, "bubble_point")
+
+
+def dew_point(components, y, P, T0=None, tol=1e-10, maxiter=50):
+    """
+    Dew point temperatures of vapours y at pressure P (kPa)
+
+    T0 is a warm start, e.g. the solution of a previous call
+    """
+    ids = component_ids(components)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    y = y/y.sum(axis=1, keepdims=True)
+    present = y > 0
+    lnPressure = np.log(np.broadcast_to(np.asarray(P, dtype=float), y.shape[:1]))
+
+    def residual(T):
+        lnP, slope = saturation_terms(ids, T, present)
+        invK = np.where(present, np.exp(lnPressure[:, None] - lnP), 0.0)
+        total = np.sum(y*invK, axis=1)
+        return np.log(total), -np.sum(y*invK*slope, axis=1)/total
+
+    return solve_temperature(residual, initial_temperature(T0, y.shape[0]), tol, maxiter, "dew_point")
+
+
+def geometric_mean_volatility(components, topT, bottomT, HeK):
+    """
+    Relative volatilities to the heavy key as the geometric mean of the values
+    at the top (dew point) and bottom (bubble point) temperatures
+
+    Returns an array shaped (cases x components)
+    """
+    ids = component_ids(components)
+    cases = np.broadcast_shapes(np.shape(topT), np.shape(bottomT))
+    topT = np.broadcast_to(np.asarray(topT, dtype=float), cases).ravel()
+    bottomT = np.broadcast_to(np.asarray(bottomT, dtype=float), cases).ravel()
+    HeK = np.broadcast_to(np.asarray(HeK), topT.shape)
+    rows = np.arange(topT.size)
+
+    lnTop = ln_vapour_pressure(ids, topT).T
+    lnBottom = ln_vapour_pressure(ids, bottomT).T
+    lnAlpha = 0.5*((lnTop - lnTop[rows, HeK][:, None]) + (lnBottom - lnBottom[rows, HeK][:, None]))
+
+    return np.exp(lnAlpha)
+
+
+if __name__ == "__main__":
+    components = ["methyl-acetylene", "ethyl-acetylene", "1-butene", "butane", "pentane"]
+    top = [532, 1992.15, 2163, 507, 1.54]
+    bottom = [0, 104.85, 0, 0, 15397.46]
+    P = 1810
+
+    Tdew = dew_point(components, top, P)
+    Tbub = bubble_point(components, bottom, P)
+
+    print("\nColumn temperatures at %.0f kPa" % P)
+    print("Top (dew point): \t%.2f K" % Tdew[0])
+    print("Bottom (bubble point): \t%.2f K" % Tbub[0])
@@ -4,13 +4,18 @@ Multicomponent distillation column design using FUG(K) short-cut method
 By David Rinaldi
 10/03/2021
 """
-#pylint:disable=unused-wildcard-import
 import numpy as numpy
 import math
-from scipy.optimize import fsolve
 
-from vapor_pressure import constants
-from properties import *
+from .component_store import component_ids, vapour_pressure, temperature_mask
+from .underwood import minimum_reflux, underwood_roots
+from .bubble_dew import bubble_point, dew_point, geometric_mean_volatility
+from .batch import batch_distillation, batch_non_key_distribution
+from .sensitivity import batch_sensitivities
+from .reflux import optimise_reflux
+from .results import ColumnResult
+from .instrumentation import timed
+from .properties import mr
 
 class Distillation():
     """
@@ -51,6 +56,10 @@ class Distillation():
         # Defining light (LiK) and heavy (HeK) keys
         self.HeK = HeK
         self.LiK = LiK
+
+        # Top and bottom temperatures, found from the dew and bubble points
+        self.topTemperature = None
+        self.bottomTemperature = None
     
     def print_feed_flowrates(self):
         """
@@ -66,9 +75,10 @@ class Distillation():
         Prints the user defined light and heavy keys
         """
         print("\nLight and heavy key:")
-        print("Light key: %s" % LiK.title())
-        print("Heavy key: %s" % HeK.title())
+        print("Light key: %s" % self.LiK.title())
+        print("Heavy key: %s" % self.HeK.title())
 
+    @timed
     def find_vapour_pressure(self):
         """
         Calculates and prints component vapour pressure
@@ -80,42 +90,33 @@ class Distillation():
         it is
         """
 
-        def pvap_calc(C1, C2, C3, C4, C5):
-            """
-            Calculates vapour pressure of component in Pa
-            
-            Constants can be found in vapourPressure.py
-            """
-            return lambda T: math.exp(C1 + C2/T + C3*math.log(T) + C4*T**C5)
-        
-        def Pa_kPa(P):
-            """Converts from Pa to kPa"""
-            return P/1000
+        ids = component_ids(self.components)
+        vpkPa = vapour_pressure(ids, self.columnTemperature)[:, 0]/1000
+        below, above = temperature_mask(ids, self.columnTemperature)
+
+        self.vapourPressures = dict(zip(self.components, vpkPa.tolist()))
+        self.belowTmin = dict(zip(self.components, below[:, 0].tolist()))
+        self.aboveTmax = dict(zip(self.components, above[:, 0].tolist()))
 
-        self.vapourPressures = {}
-        for i in self.feedComposition.keys():
-            vpPa = pvap_calc(constants[i][0], constants[i][1], constants[i][2], constants[i][3], constants[i][4])(self.columnTemperature)
-            vpkPa = Pa_kPa(vpPa)
-            self.vapourPressures[i] = vpkPa
-        
         print("\nComponent vapour pressures")
         for key, value in self.vapourPressures.items():
-            if T < constants[key][5]:
+            if self.belowTmin[key]:
                 print("%s: \t%.2f kPa (Inaccurate below T-min)" % (key.title(), value))
-            elif T > constants[key][6]:
+            elif self.aboveTmax[key]:
                 print("%s: \t%.2f kPa (Inaccurate above T-max)" % (key.title(), value))
             else:
                 print("%s: \t%.2f kPa" % (key.title(), value))
         
         return self.vapourPressures
 
+    @timed
     def find_relative_volatilty(self):
         """
         Calculates and prints relative volatilies
         """
         self.rvHeK = {}
         for i in self.feedComposition.keys():
-            rv = self.vapourPressures[i]/self.vapourPressures[HeK]
+            rv = self.vapourPressures[i]/self.vapourPressures[self.HeK]
             self.rvHeK[i] = rv
         
         print("\nRelative volatilites")
@@ -124,6 +125,7 @@ class Distillation():
         
         return self.rvHeK
 
+    @timed
     def print_distillate_flowrate(self):
         """
         Prints the distillate flowrate and compositions
@@ -131,13 +133,13 @@ class Distillation():
         self.massTopComposition = {}
         self.topComposition = {}
         for key, value in self.rvHeK.items():
-            if key == LiK:
+            if key == self.LiK:
                 self.topComposition[key] = self.feedComposition[key]*self.topRecovery
                 self.massTopComposition[key] = self.topComposition[key]/mr[key]
-            elif key == HeK:
+            elif key == self.HeK:
                 self.topComposition[key] = self.feedComposition[key]*(1 - self.bottomRecovery)
                 self.massTopComposition[key] = self.topComposition[key]/mr[key]
-            elif self.rvHeK[key] > self.rvHeK[HeK]:
+            elif self.rvHeK[key] > self.rvHeK[self.HeK]:
                 self.topComposition[key] = self.feedComposition[key]
                 self.massTopComposition[key] = self.topComposition[key]/mr[key]
             else:
@@ -155,6 +157,7 @@ class Distillation():
 
         return self.topComposition, self.massTopComposition, self.topMoleFraction
 
+    @timed
     def print_bottom_flowrate(self):
         """
         Prints the bottom flowrate and compositions
@@ -162,13 +165,13 @@ class Distillation():
         self.massBottomComposition = {}
         self.bottomComposition = {}
         for key, value in self.rvHeK.items():
-            if key == LiK:
+            if key == self.LiK:
                 self.bottomComposition[key] = self.feedComposition[key]*(1 - self.topRecovery)
                 self.massBottomComposition[key] = self.bottomComposition[key]/mr[key]
-            elif key == HeK:
+            elif key == self.HeK:
                 self.bottomComposition[key] = self.feedComposition[key]*self.bottomRecovery
                 self.massBottomComposition[key] = self.bottomComposition[key]/mr[key]
-            elif self.rvHeK[key] < self.rvHeK[HeK]:
+            elif self.rvHeK[key] < self.rvHeK[self.HeK]:
                 self.bottomComposition[key] = self.feedComposition[key]
                 self.massBottomComposition[key] = self.bottomComposition[key]/mr[key]
             else:
@@ -186,6 +189,39 @@ class Distillation():
 
         return self.bottomComposition, self.massBottomComposition, self.bottomMoleFraction
     
+    @timed
+    def find_column_temperatures(self):
+        """
+        Finds the top (dew point of the distillate) and bottom (bubble point of
+        the bottoms) temperatures at the column pressure, then replaces the
+        relative volatilities with their geometric mean between top and bottom
+
+        Called after the distillate and bottom flowrates, so find_N_min and
+        find_minimum_reflux use T-dependent volatilities. Repeated calls warm
+        start from the previous temperatures
+        """
+        top = [self.topMoleFraction[key] for key in self.components]
+        bottom = [self.bottomMoleFraction[key] for key in self.components]
+
+        T0 = self.topTemperature or self.columnTemperature
+        self.topTemperature = float(dew_point(self.components, top, self.columnPressure, T0)[0])
+        T0 = self.bottomTemperature or self.columnTemperature
+        self.bottomTemperature = float(bubble_point(self.components, bottom, self.columnPressure, T0)[0])
+
+        rv = geometric_mean_volatility(self.components, self.topTemperature, self.bottomTemperature, self.components.index(self.HeK))
+        self.rvHeK = dict(zip(self.components, rv[0].tolist()))
+
+        print("\nColumn temperatures at %.2f kPa" % self.columnPressure)
+        print("Top (dew point): \t%.2f K" % self.topTemperature)
+        print("Bottom (bubble point): \t%.2f K" % self.bottomTemperature)
+
+        print("\nGeometric mean relative volatilites")
+        for key, value in self.rvHeK.items():
+            print("%s: \t%.2f" % (key.title(), value))
+
+        return self.topTemperature, self.bottomTemperature
+
+    @timed
     def find_N_min(self, partialReboiler=True):
         """
         Using Fenske equation, the minimum number of ideal stages is found
@@ -206,45 +242,53 @@ class Distillation():
 
         return self.Nmin
 
+    @timed
     def non_key_distribution(self):
         """
-        Finds non-key distributions
+        Distributes the non-keys between distillate and bottoms with the Fenske
+        equation at total reflux, and prints the new flowrates
 
-        Not needed for V1 so will code in later
+        Replaces the sharp split of print_distillate_flowrate and
+        print_bottom_flowrate, so call it after find_N_min and before
+        find_minimum_reflux
         """
-        pass
+        feed = [[self.feedComposition[key] for key in self.components]]
+        rv = [[self.rvHeK[key] for key in self.components]]
+        LiK = numpy.array([self.components.index(self.LiK)])
+        HeK = numpy.array([self.components.index(self.HeK)])
+
+        top, bottom = batch_non_key_distribution(numpy.array(feed), numpy.array(rv), LiK, HeK, numpy.array([self.topRecovery]), numpy.array([self.bottomRecovery]))
+
+        self.topComposition = dict(zip(self.components, top[0].tolist()))
+        self.bottomComposition = dict(zip(self.components, bottom[0].tolist()))
+        self.massTopComposition = {key: value/mr[key] for key, value in self.topComposition.items()}
+        self.massBottomComposition = {key: value/mr[key] for key, value in self.bottomComposition.items()}
+        self.topMoleFraction = {key: value/sum(self.topComposition.values()) for key, value in self.topComposition.items()}
+        self.bottomMoleFraction = {key: value/sum(self.bottomComposition.values()) for key, value in self.bottomComposition.items()}
 
+        print("\nNon-key distribution (Fenske)")
+        print("Component\t\tTop kg/h\tBottom kg/h")
+        for key in self.components:
+            print("%s: \t%.2f\t\t%.2f" % (key.title(), self.massTopComposition[key], self.massBottomComposition[key]))
+
+        return self.topComposition, self.bottomComposition
+
+    @timed
     def find_minimum_reflux(self):
         """
         Finds the minimum reflux ratio using both Underwoods equations
-        """
-        U1 = 1 - self.q
 
-        # First guess of phi
-        phi = 0
+        phi is the root of the first equation directly above the heavy key
+        volatility, solved with the bracketed solver in underwood.py
+        """
+        z = [self.feedMoleComposition[key] for key in self.components]
+        xD = [self.topMoleFraction[key] for key in self.components]
+        rv = [self.rvHeK[key] for key in self.components]
 
-        # Solver to determine what phi is
-        while True:
-            U1_guess = 0
-            U1_guess_list = []
-            for key in self.feedMoleComposition.keys():
-                U1a = (self.feedMoleComposition[key]*self.rvHeK[key])/(self.rvHeK[key] - phi)
-                U1_guess_list.append(U1a)
-            
-            U1_guess = sum(U1_guess_list)
-
-            if U1_guess > U1 - 0.01 and U1_guess < U1 + 0.01:
-                break
-            else:
-                phi += 0.01
-            
-        # Second Underwood equation to find minimum reflux ratio
-        U2_list = []
-        for key in self.rvHeK.keys():
-            U2a = (self.rvHeK[key]*self.topMoleFraction[key])/(self.rvHeK[key] - phi)
-            U2_list.append(U2a)
-        
-        self.Rmin = sum(U2_list) - 1
+        phi, Rmin = minimum_reflux(z, xD, rv, self.q, self.components.index(self.HeK))
+        phi = float(phi[0])
+        self.phi = phi
+        self.Rmin = float(Rmin[0])
 
         print("\nUnderwood equation: Minumum reflux ratio for q = %.2f" % self.q)
         print("phi: \t%.2f" % phi)
@@ -253,6 +297,7 @@ class Distillation():
 
         return self.Rmin
     
+    @timed
     def gilliland_correlation(self, Rf=None):
         """
         Using Gilliland correlation, find the number of ideal plates at
@@ -282,6 +327,7 @@ class Distillation():
         
         return self.idealPlates
         
+    @timed
     def feed_stage_location(self):
         """
         Uses Kirkbride equation to determine the feed stage location
@@ -305,6 +351,7 @@ class Distillation():
         print("Number of stripping trays: \t%i" % self.Ns)
         print("Feed tray location: Tray \t%i" % self.idealFeedTray)
     
+    @timed
     def actual_trays(self, efficiency):
         """
         Finds actual number of trays with user defined tray efficiency
@@ -320,39 +367,74 @@ class Distillation():
 
         return self.trayEfficiency, self.actualTrays
     
+    @timed
+    def design(self, Rf, efficiency=1, partialReboiler=True, columnTemperatures=False, distributeNonKeys=False):
+        """
+        Runs the whole short-cut design without printing anything
+
+        Set columnTemperatures to use geometric mean volatilities between the
+        dew and bubble points at column pressure, and distributeNonKeys to
+        split the non-keys with Fenske. Returns a results.ColumnResult, which
+        report.print_column_result can print
+        """
+        flowrate = [self.massFeedComposition[key] for key in self.components]
+        P = self.columnPressure if columnTemperatures else None
+
+        results = batch_distillation(self.components, [flowrate], self.LiK, self.HeK, self.columnTemperature, self.q, self.topRecovery, self.bottomRecovery, Rf, efficiency, partialReboiler, P=P, distributeNonKeys=distributeNonKeys)
+
+        return ColumnResult.from_batch(self.components, self.LiK, self.HeK, self.q, results)
+
+    @timed
+    def sensitivities(self, Rf, partialReboiler=True):
+        """
+        Analytic derivatives of the unrounded Nmin, phi, Rmin, R, N, Nr and Ns
+        with respect to the recoveries, q, T, Rf and the feed flowrates,
+        without printing
+
+        Uses the sharp split with volatilities at the column temperature.
+        Returns {output: {parameter: derivative}}, the feed flowrates are
+        named by their component
+        """
+        flowrate = [self.massFeedComposition[key] for key in self.components]
+        results = batch_sensitivities(self.components, [flowrate], self.LiK, self.HeK, self.columnTemperature, self.q, self.topRecovery, self.bottomRecovery, Rf, partialReboiler)
+
+        return {output: dict(zip(results["parameters"], gradient[0].tolist())) for output, gradient in results["gradients"].items()}
+
+    @timed
+    def economic_reflux(self, efficiency=1, costs=None, columnTemperatures=False, distributeNonKeys=False):
+        """
+        Finds the reflux factor with the lowest total annual cost, trays and
+        column against reboiler steam, without printing
+
+        costs overrides entries of reflux.default_costs. Returns a dictionary
+        with the optimal Rf and R, the design and sizes there and its costs
+        """
+        flowrate = [self.massFeedComposition[key] for key in self.components]
+        results = optimise_reflux(self.components, [flowrate], self.LiK, self.HeK, self.columnTemperature, self.q, self.topRecovery, self.bottomRecovery, self.columnPressure, efficiency, costs, columnTemperatures=columnTemperatures, distributeNonKeys=distributeNonKeys)
+
+        return {key: float(value[0]) for key, value in results.items() if key not in ("grid", "gridCost")}
+
+    @timed
     def min_reflix_graph(self):
         """
-        Finds the minimum reflux ratio using both Underwoods equations
+        Finds every root of the first Underwood equation and the minimum reflux
+        ratio without printing
 
-        This will be the biggest challenge as need to figure out how to use a solver
+        Roots are ordered by increasing phi, one per gap between the
+        volatilities of components present in the feed
         """
-        U1 = 1 - self.q
+        z = [self.feedMoleComposition[key] for key in self.components]
+        rv = [self.rvHeK[key] for key in self.components]
 
-        # First guess of phi
-        phi = 0
-        U1_guess = None
+        roots, _ = underwood_roots(z, rv, self.q)
+        self.underwoodRoots = roots[0][~numpy.isnan(roots[0])]
 
-        # Solver to determine what phi is
-        while True:
-            U1_guess_list = []
-            for key in self.feedMoleComposition.keys():
-                U1a = (self.feedMoleComposition[key]*self.rvHeK[key])/(self.rvHeK[key] - phi)
-                U1_guess_list.append(U1a)
-            
-            U1_guess = sum(U1_guess_list)
+        xD = [self.topMoleFraction[key] for key in self.components]
+        phi, Rmin = minimum_reflux(z, xD, rv, self.q, self.components.index(self.HeK))
+        self.phi = float(phi[0])
+        self.Rmin = float(Rmin[0])
 
-            if U1_guess > U1 - 0.01 and U1_guess < U1 + 0.01:
-                break
-            else:
-                phi += 0.01
-            
-        # Second Underwood equation to find minimum reflux ratio
-        U2_list = []
-        for key in self.rvHeK.keys():
-            U2a = (self.rvHeK[key]*self.topMoleFraction[key])/(self.rvHeK[key] - phi)
-            U2_list.append(U2a)
-        
-        self.Rmin = sum(U2_list) - 1
+        return self.underwoodRoots, self.Rmin
 
 
 if __name__ == "__main__":
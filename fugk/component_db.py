@@ -0,0 +1,341 @@
+"""
+Compiled, memory-mappable component database
+
+Component data in CSV or JSON files is compiled into one binary file that
+is opened with numpy.memmap, so worker processes share its pages instead of
+each parsing the property tables. The records are sorted by name and names
+are looked up by binary search, so nothing per component is built when a
+database is opened
+
+File layout:
+- 8 bytes   magic b"FUGKCDB\\0"
+- 4 bytes   format version (little endian uint32)
+- 4 bytes   header length (little endian uint32)
+- header    JSON with the record count, dtype, data offset and data version
+- records   structured array of component_dtype, starting on a 64 byte
+            boundary
+
+CSV columns: name, C1 - C5, Tmin, Tmax, mr, density and optionally lh1 -
+lh4 and Tc for the latent heat and rackettTc, Pc and ZRA for the liquid
+density. JSON: a list of objects, or an object keyed by name, with name, C
+(5 values), Tmin, Tmax, mr, density and optionally lh (C1 - C4 and Tc) and
+rackett (Tc, Pc and ZRA). Missing latent heat and Rackett constants are
+stored as nan
+
+python -m fugk.component_db compile components.cdb builtin extra.csv
+python -m fugk.component_db info components.cdb
+python -m fugk.component_db export components.cdb components.csv
+"""
+import csv
+import json
+import struct
+import hashlib
+from collections.abc import Mapping
+
+import numpy as np
+
+MAGIC = b"FUGKCDB\x00"
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+
+component_dtype = np.dtype([
+    ("name", "U32"),
+    ("C", "f8", (5,)),
+    ("Tmin", "f8"),
+    ("Tmax", "f8"),
+    ("mr", "f8"),
+    ("density", "f8"),
+    ("lh", "f8", (5,)),
+    ("rackett", "f8", (3,))
+])
+
+csv_columns = ["name", "C1", "C2", "C3", "C4", "C5", "Tmin", "Tmax", "mr", "density", "lh1", "lh2", "lh3", "lh4", "Tc", "rackettTc", "Pc", "ZRA"]
+
+
+class NameIndex(Mapping):
+    """
+    Read-only name -> component id mapping over names sorted in the
+    records, found by binary search
+    """
+
+    def __init__(self, names):
+        """
+        Defining the sorted names, e.g. a memory-mapped column
+        """
+        self.names = names
+
+    def __getitem__(self, name):
+        i = int(np.searchsorted(self.names, name))
+        if i == len(self.names) or self.names[i] != name:
+            raise KeyError(name)
+        return i
+
+    def __contains__(self, name):
+        i = int(np.searchsorted(self.names, name))
+        return i < len(self.names) and self.names[i] == name
+
+    def __iter__(self):
+        return iter(self.names.tolist())
+
+    def __len__(self):
+        return len(self.names)
+
+    def ids(self, names):
+        """
+        Component ids of a list of names, KeyError for an unknown name and
+        ValueError for a name too long to be stored, which the conversion to
+        the fixed-width name dtype would otherwise truncate
+        """
+        # Unicode names take 4 bytes per character
+        length = self.names.dtype.itemsize//4
+        for name in names:
+            if len(name) > length:
+                raise ValueError("Component name longer than %i characters: %s" % (length, name))
+        names = np.asarray(names, dtype=self.names.dtype)
+        ids = np.searchsorted(self.names, names)
+        found = ids < len(self.names)
+        found[found] = self.names[ids[found]] == names[found]
+        if not np.all(found):
+            raise KeyError(str(names[~found][0]))
+        return ids
+
+
+def builtin_records():
+    """
+    Records of the components in the vapor_pressure, properties,
+    latent_heat and liquid_density modules
+    """
+    from .vapor_pressure import constants
+    from .properties import mr, density
+    from .latent_heat import lh
+    from .liquid_density import rackett
+
+    return [{
+        "name": name,
+        "C": values[:5],
+        "Tmin": values[5],
+        "Tmax": values[6],
+        "mr": mr.get(name, np.nan),
+        "density": density.get(name, np.nan),
+        "lh": lh.get(name),
+        "rackett": rackett.get(name)
+    } for name, values in constants.items()]
+
+
+def read_csv(path):
+    """
+    Records of a CSV file, blank cells read as missing
+    """
+    number = lambda text: float(text) if text not in (None, "") else np.nan
+    with open(path, newline="") as file:
+        records = []
+        for row in csv.DictReader(file):
+            lh = [number(row.get(column)) for column in ("lh1", "lh2", "lh3", "lh4", "Tc")]
+            rackett = [number(row.get(column)) for column in ("rackettTc", "Pc", "ZRA")]
+            records.append({
+                "name": row["name"].strip(),
+                "C": [number(row[column]) for column in ("C1", "C2", "C3", "C4", "C5")],
+                "Tmin": number(row["Tmin"]),
+                "Tmax": number(row["Tmax"]),
+                "mr": number(row["mr"]),
+                "density": number(row.get("density")),
+                "lh": None if np.all(np.isnan(lh)) else lh,
+                "rackett": None if np.all(np.isnan(rackett)) else rackett
+            })
+    return records
+
+
+def read_json(path):
+    """
+    Records of a JSON file, a list of records or an object keyed by name
+    """
+    with open(path) as file:
+        data = json.load(file)
+    if isinstance(data, dict):
+        data = [dict(record, name=name) for name, record in data.items()]
+    return data
+
+
+def read_source(source):
+    """
+    Records of "builtin", a .csv or a .json file, or a list of records
+    """
+    if not isinstance(source, str):
+        return list(source)
+    if source == "builtin":
+        return builtin_records()
+    if source.lower().endswith(".csv"):
+        return read_csv(source)
+    return read_json(source)
+
+
+def compile_records(records):
+    """
+    Packs records into a structured array sorted by name
+
+    A name appearing more than once keeps its last record, so later sources
+    override earlier ones. Raises ValueError for a record without vapour
+    pressure constants, temperature limits or molar mass
+    """
+    merged = {}
+    for record in records:
+        merged[record["name"]] = record
+
+    table = np.zeros(len(merged), dtype=component_dtype)
+    for i, name in enumerate(sorted(merged)):
+        record = merged[name]
+        if len(name) > 32:
+            raise ValueError("Component name longer than 32 characters: %s" % name)
+        try:
+            table[i]["C"] = [float(value) for value in record["C"]]
+            table[i]["Tmin"] = float(record["Tmin"])
+            table[i]["Tmax"] = float(record["Tmax"])
+            table[i]["mr"] = float(record["mr"])
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError("Incomplete record for %s: %s" % (name, error))
+        if np.any(np.isnan(table[i]["C"])) or np.isnan(table[i]["mr"]):
+            raise ValueError("Incomplete record for %s" % name)
+        table[i]["name"] = name
+        density = record.get("density")
+        table[i]["density"] = np.nan if density is None else float(density)
+        table[i]["lh"] = [np.nan]*5 if record.get("lh") is None else [float(value) for value in record["lh"]]
+        table[i]["rackett"] = [np.nan]*3 if record.get("rackett") is None else [float(value) for value in record["rackett"]]
+
+    return table
+
+
+def check_records(table):
+    """
+    Returns warnings for suspicious data: a liquid density equal to the
+    molar mass, or missing densities, latent heats and Rackett constants
+    """
+    warnings = []
+    for record in table:
+        name = str(record["name"])
+        if record["density"] == record["mr"]:
+            warnings.append("%s: density equals the molar mass (%.2f)" % (name, record["mr"]))
+        elif np.isnan(record["density"]):
+            warnings.append("%s: no density" % name)
+        if np.isnan(record["lh"][0]):
+            warnings.append("%s: no latent heat constants" % name)
+        if np.any(np.isnan(record["rackett"])):
+            warnings.append("%s: no Rackett liquid density constants" % name)
+    return warnings
+
+
+def records_version(table):
+    """
+    Data version of a compiled table, a hash of its records
+    """
+    return hashlib.sha256(np.ascontiguousarray(table, dtype=component_dtype).tobytes()).hexdigest()[:16]
+
+
+def write_database(table, path, dataVersion=None):
+    """
+    Writes a compiled table, dataVersion defaults to a hash of the records
+    """
+    table = np.ascontiguousarray(table, dtype=component_dtype)
+    if dataVersion is None:
+        dataVersion = records_version(table)
+
+    header = {"count": len(table), "dtype": table.dtype.descr, "dataVersion": dataVersion, "offset": 0}
+    # The offset is part of the header, so it is fixed after one pass
+    for _ in range(2):
+        text = json.dumps(header).encode()
+        size = len(MAGIC) + 8 + len(text)
+        header["offset"] = -(-size//ALIGNMENT)*ALIGNMENT
+    text = json.dumps(header).encode()
+
+    with open(path, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<II", FORMAT_VERSION, len(text)))
+        file.write(text)
+        file.write(b"\x00"*(header["offset"] - file.tell()))
+        file.write(table.tobytes())
+
+    return header
+
+
+def compile_database(sources, path, dataVersion=None):
+    """
+    Compiles the records of every source (see read_source) into a database
+    file, returning its header and the data warnings
+    """
+    records = []
+    for source in sources:
+        records.extend(read_source(source))
+    table = compile_records(records)
+
+    return write_database(table, path, dataVersion), check_records(table)
+
+
+def read_header(path):
+    """
+    Reads and checks the header of a database file
+    """
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("%s is not a component database" % path)
+        version, length = struct.unpack("<II", file.read(8))
+        if version != FORMAT_VERSION:
+            raise ValueError("%s has format version %i, this code reads %i, recompile it" % (path, version, FORMAT_VERSION))
+        header = json.loads(file.read(length))
+
+    descr = [tuple(field[:2]) + ((tuple(field[2]),) if len(field) > 2 else ()) for field in header["dtype"]]
+    header["dtype"] = np.dtype(descr)
+    if header["dtype"] != component_dtype:
+        raise ValueError("%s has an unexpected record layout, recompile it" % path)
+
+    return header
+
+
+def open_database(path):
+    """
+    Memory-maps a database file read-only, returning the records and the
+    header
+    """
+    header = read_header(path)
+    records = np.memmap(path, dtype=header["dtype"], mode="r", offset=header["offset"], shape=(header["count"],))
+
+    return records, header
+
+
+def export_csv(table, path):
+    """
+    Writes records as CSV in the layout read_csv reads
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(csv_columns)
+        for record in table:
+            values = list(record["C"]) + [record["Tmin"], record["Tmax"], record["mr"], record["density"]] + list(record["lh"]) + list(record["rackett"])
+            writer.writerow([str(record["name"])] + ["" if np.isnan(value) else repr(float(value)) for value in values])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compiles and inspects component databases")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("compile", help="compile CSV/JSON sources (or builtin) into a database")
+    build.add_argument("output")
+    build.add_argument("sources", nargs="+")
+    build.add_argument("--data-version", default=None)
+    info = commands.add_parser("info", help="print the header of a database")
+    info.add_argument("database")
+    export = commands.add_parser("export", help="write a database (or builtin) as CSV")
+    export.add_argument("database")
+    export.add_argument("output")
+    args = parser.parse_args()
+
+    if args.command == "compile":
+        header, warnings = compile_database(args.sources, args.output, args.data_version)
+        print("%i components written to %s (data version %s)" % (header["count"], args.output, header["dataVersion"]))
+        for warning in warnings:
+            print("Warning: %s" % warning)
+    elif args.command == "info":
+        records, header = open_database(args.database)
+        print("Format version %i, data version %s, %i components" % (FORMAT_VERSION, header["dataVersion"], header["count"]))
+    else:
+        table = compile_records(builtin_records()) if args.database == "builtin" else open_database(args.database)[0]
+        export_csv(table, args.output)
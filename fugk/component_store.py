@@ -0,0 +1,175 @@
+"""
+Array-backed store of the component property tables
+
+The property tables are packed into a single structured NumPy array indexed
+by component id, so correlations can be evaluated for many components and
+temperatures in one vectorised call. The records are sorted by name and
+component_index finds names by binary search
+
+By default the array is built at import from the dictionaries in
+vapor_pressure.py, properties.py, latent_heat.py and liquid_density.py. If the environment
+variable FUGK_COMPONENT_DB names a database compiled with component_db.py,
+that file is memory-mapped instead, so worker processes share its pages and
+startup does not grow with the number of components
+
+Fields:
+- name
+- C        vapour pressure constants C1 - C5 (DIPPR-101, P in Pa, T in K)
+- Tmin     lower temperature limit of the vapour pressure correlation (K)
+- Tmax     upper temperature limit of the vapour pressure correlation (K)
+- mr       molar mass (kg/kmol)
+- density  density (kg/m3)
+- lh       latent heat constants C1 - C4 and Tc (DIPPR-106), nan if missing
+- rackett  saturated liquid density constants Tc (K), Pc (kPa) and ZRA
+           (Rackett), nan if missing
+"""
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from .component_db import NameIndex, builtin_records, compile_records, open_database, records_version
+
+
+def build_store():
+    """
+    Packs the built-in property dictionaries into a structured array, one
+    row per component sorted by name
+    """
+    return compile_records(builtin_records())
+
+
+database = os.environ.get("FUGK_COMPONENT_DB")
+if database:
+    store, database_header = open_database(database)
+else:
+    store, database_header = build_store(), None
+component_index = NameIndex(store["name"])
+
+
+@lru_cache(maxsize=1)
+def data_version():
+    """
+    Version of the property data, that of the compiled database or the hash
+    component_db.write_database would give the built-in data
+    """
+    if database_header is not None:
+        return database_header["dataVersion"]
+    return records_version(store)
+
+
+@lru_cache(maxsize=1024)
+def cached_ids(components):
+    """
+    Read-only component ids of a tuple of names, memoised since the same
+    component lists are looked up on every solver call
+    """
+    ids = component_index.ids(list(components))
+    ids.flags.writeable = False
+    return ids
+
+
+def component_ids(components):
+    """
+    Converts a list of component names into an array of component ids
+    """
+    return cached_ids(tuple(components))
+
+
+def ln_vapour_pressure(ids, T):
+    """
+    Natural log of the vapour pressure in Pa from the DIPPR-101 form
+
+    ln(P) = C1 + C2/T + C3*ln(T) + C4*T^C5
+
+    Returns an array shaped (components x temperatures)
+    """
+    C = store["C"][ids]
+    T = np.atleast_1d(np.asarray(T, dtype=float))[None, :]
+    C1, C2, C3, C4, C5 = (C[:, [i]] for i in range(5))
+
+    return C1 + C2/T + C3*np.log(T) + C4*T**C5
+
+
+def ln_vapour_pressure_slope(ids, T):
+    """
+    Analytic derivative d(ln P)/dT of the DIPPR-101 form in 1/K
+
+    d(ln P)/dT = -C2/T^2 + C3/T + C4*C5*T^(C5 - 1)
+
+    Returns an array shaped (components x temperatures)
+    """
+    C = store["C"][ids]
+    T = np.atleast_1d(np.asarray(T, dtype=float))[None, :]
+    _, C2, C3, C4, C5 = (C[:, [i]] for i in range(5))
+
+    return -C2/T**2 + C3/T + C4*C5*T**(C5 - 1)
+
+
+def vapour_pressure(ids, T):
+    """
+    Vapour pressure in Pa from the DIPPR-101 form
+
+    Returns an array shaped (components x temperatures)
+    """
+    return np.exp(ln_vapour_pressure(ids, T))
+
+
+def temperature_mask(ids, T):
+    """
+    Returns two boolean arrays shaped (components x temperatures) that are True
+    where T is below Tmin and above Tmax of the vapour pressure correlation
+    """
+    T = np.atleast_1d(np.asarray(T, dtype=float))[None, :]
+
+    return T < store["Tmin"][ids][:, None], T > store["Tmax"][ids][:, None]
+
+
+def latent_heat(ids, T):
+    """
+    Latent heat of vaporisation in J/kmol from the DIPPR-106 form
+
+    lh = C1*1e7*(1 - Tr)^(C2 + C3*Tr + C4*Tr^2), Tr = T/Tc
+
+    Components without latent heat constants, or above their critical
+    temperature, give nan. Returns an array shaped (components x temperatures)
+    """
+    L = store["lh"][ids]
+    T = np.atleast_1d(np.asarray(T, dtype=float))[None, :]
+    C1, C2, C3, C4, Tc = (L[:, [i]] for i in range(5))
+    Tr = T/Tc
+
+    with np.errstate(invalid="ignore"):
+        return np.where(Tr < 1, C1*1e7*(1 - Tr)**(C2 + C3*Tr + C4*Tr**2), np.nan)
+
+
+
+def liquid_density(ids, T):
+    """
+    Saturated liquid density in kg/m3 from the Rackett equation
+
+    rho = mr*Pc/(R*Tc)/ZRA^(1 + (1 - Tr)^(2/7)), Tr = T/Tc
+
+    Components without Rackett constants, or above their critical
+    temperature, give nan. Returns an array shaped (components x temperatures)
+    """
+    Tc, Pc, ZRA = (store["rackett"][ids][:, [i]] for i in range(3))
+    mr = store["mr"][ids][:, None]
+    T = np.atleast_1d(np.asarray(T, dtype=float))[None, :]
+    Tr = T/Tc
+
+    with np.errstate(invalid="ignore"):
+        return np.where(Tr < 1, mr*Pc*1000/(8314.46*Tc)/ZRA**(1 + np.abs(1 - Tr)**(2/7)), np.nan)
+
+
+if __name__ == "__main__":
+    ids = component_ids(["propylene", "butane", "pentane"])
+    T = np.linspace(300, 480, 4)
+
+    Pvap = vapour_pressure(ids, T)
+    below, above = temperature_mask(ids, T)
+
+    print("\nVapour pressures (kPa)")
+    for i, name in enumerate(store["name"][ids]):
+        print("%s: \t%s" % (name.title(), np.array2string(Pvap[i]/1000, precision=1)))
+    print("Outside Tmin/Tmax:\n%s" % (below | above))
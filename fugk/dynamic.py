@@ -0,0 +1,423 @@
+"""
+Dynamic tray-by-tray simulation of a short-cut column design
+
+Stages are numbered from the top: stage 0 is the reflux drum of a total
+condenser, stages 1 to trays are the trays and the last stage the reboiler
+sump. The states are the component liquid holdups (kmol) of every stage,
+with the balances
+
+dM(j)/dt = L(j-1)*x(j-1) + V(j+1)*y(j+1) - L(j)*x(j) - V(j)*y(j) + F*z
+
+under the assumptions of column.Distillation: constant molar overflow, so
+the vapour flow is the boil-up below the feed and boil-up + (1 - q)*F above
+it, ideal stages with the relative volatilities of the design,
+y = a*x/sum(a*x), and no vapour holdup. The liquid leaving a tray follows
+the Francis weir formula, how = 0.75*(Q/lw)^(2/3) (m, m3/s and m), on top of
+the weir height. Drum and sump levels are held by proportional controllers
+on the distillate and the bottoms. The reflux, boil-up and feed are inputs
+
+The balances are stiff (the tray hydraulics settle in seconds, the
+compositions in hours) and each stage only couples to its neighbours, so
+the Jacobian is block tridiagonal. bdf_integrate is a variable-step BDF2
+whose Newton iterations solve that structure with block_thomas, and
+block_jacobian finds the blocks with 3 evaluations per component by
+perturbing every third stage at once. Time is in h and flows in kmol/h
+"""
+import math
+
+import numpy as np
+
+from .batch import batch_distillation
+from .sizing import batch_sizing
+from .component_store import store, component_ids
+from .instrumentation import record_solver
+
+
+def block_jacobian(fun, t, y, f0):
+    """
+    Finite-difference Jacobian of fun at y shaped (stages x n), for a fun
+    whose stages only couple to their neighbours
+
+    fun takes a stack of states shaped (k x stages x n). Returns the lower
+    (dfj+1/dyj), diagonal and upper (dfj/dyj+1) blocks, shaped (stages-1 x n
+    x n), (stages x n x n) and (stages-1 x n x n)
+    """
+    stages, n = y.shape
+    step = 1.5e-8*np.fmax(np.abs(y), 1)
+    perturbed = np.broadcast_to(y, (3*n, stages, n)).copy()
+    for k in range(3):
+        for i in range(n):
+            perturbed[k*n + i, k::3, i] += step[k::3, i]
+
+    df = fun(t, perturbed) - f0
+
+    lower = np.zeros((stages - 1, n, n))
+    diagonal = np.zeros((stages, n, n))
+    upper = np.zeros((stages - 1, n, n))
+    for k in range(3):
+        group = df[k*n:(k + 1)*n]
+        j = np.arange(k, stages, 3)
+        # group[i, s, :] is the change of stage s for component i perturbed
+        diagonal[j] = np.transpose(group[:, j], (1, 2, 0))/step[j][:, None, :]
+        up = j[j > 0]
+        upper[up - 1] = np.transpose(group[:, up - 1], (1, 2, 0))/step[up][:, None, :]
+        low = j[j < stages - 1]
+        lower[low] = np.transpose(group[:, low + 1], (1, 2, 0))/step[low][:, None, :]
+
+    return lower, diagonal, upper
+
+
+def block_factor(lower, diagonal, upper, gamma):
+    """
+    Block LU factorisation of I - gamma*J for a block tridiagonal J
+    """
+    stages, n, _ = diagonal.shape
+    A = np.eye(n) - gamma*diagonal
+    L = -gamma*lower
+    U = -gamma*upper
+
+    inverses = np.empty((stages, n, n))
+    W = np.empty((stages - 1, n, n))
+    inverses[0] = np.linalg.inv(A[0])
+    for j in range(1, stages):
+        W[j - 1] = inverses[j - 1] @ U[j - 1]
+        inverses[j] = np.linalg.inv(A[j] - L[j - 1] @ W[j - 1])
+
+    return L, inverses, W
+
+
+def block_thomas(factor, rhs):
+    """
+    Solves (I - gamma*J)x = rhs with the factors of block_factor
+    """
+    L, inverses, W = factor
+    stages = rhs.shape[0]
+    x = np.empty(rhs.shape)
+
+    # Forward elimination
+    x[0] = inverses[0] @ rhs[0]
+    for j in range(1, stages):
+        x[j] = inverses[j] @ (rhs[j] - L[j - 1] @ x[j - 1])
+
+    # Back substitution
+    for j in range(stages - 2, -1, -1):
+        x[j] -= W[j] @ x[j + 1]
+
+    return x
+
+
+def bdf_integrate(fun, y0, t0, t1, rtol=1e-4, atol=1e-6, h0=None, maxSteps=100000):
+    """
+    Integrates dy/dt = fun(t, y) from t0 to t1 with variable-step BDF2
+
+    y is shaped (stages x n) with a block tridiagonal Jacobian, and fun
+    takes stacks of states (k x stages x n) as well. The first step is
+    backward Euler. The local error is estimated from the difference to an
+    explicit predictor. The Newton iterations reuse the Jacobian until they
+    stop converging, its block factorisation is redone when the step changes
+
+    Returns the times and states of every accepted step
+    """
+    y = np.array(y0, dtype=float)
+    t = t0
+    f = fun(t, y[None])[0]
+    evaluations = 1
+
+    def norm(value, reference):
+        return math.sqrt(np.mean((value/(atol + rtol*np.abs(reference)))**2))
+
+    if h0 is None:
+        h0 = 0.01*norm(y, y)/max(norm(f, y), 1e-10)
+    h = min(max(h0, 1e-10), t1 - t0)
+
+    jacobian = None
+    factor = None
+    yPrev = None
+    newtonTol = max(10*np.finfo(float).eps/rtol, min(0.03, math.sqrt(rtol)))
+    times = [t]
+    states = [y.copy()]
+    steps = rejected = jacobians = 0
+
+    while t < t1 and steps < maxSteps:
+        h = min(h, t1 - t)
+        if yPrev is None:
+            order = 1
+            psi = y
+            gamma = h
+            predictor = y + h*f
+            errorConstant = 0.5
+        else:
+            order = 2
+            w = h/hPrev
+            psi = ((1 + w)**2*y - w**2*yPrev)/(1 + 2*w)
+            gamma = h*(1 + w)/(1 + 2*w)
+            predictor = y + h*f + w**2*(yPrev - y + hPrev*f)
+            errorConstant = 0.4
+
+        if jacobian is None:
+            jacobian = block_jacobian(fun, t, y, f)
+            evaluations += 3*y.shape[1]
+            jacobians += 1
+            fresh = True
+            factor = None
+        if factor is None or gamma != gammaFactor:
+            factor = block_factor(*jacobian, gamma)
+            gammaFactor = gamma
+
+        # Modified Newton on y - psi - gamma*f(t + h, y) = 0
+        yNew = predictor.copy()
+        converged = False
+        for _ in range(4):
+            residual = yNew - psi - gamma*fun(t + h, yNew[None])[0]
+            evaluations += 1
+            dy = block_thomas(factor, -residual)
+            yNew += dy
+            if norm(dy, yNew) < newtonTol:
+                converged = True
+                break
+
+        if not converged:
+            if fresh:
+                h *= 0.5
+                factor = None
+            else:
+                jacobian = None
+            rejected += 1
+            continue
+
+        error = norm(errorConstant*(yNew - predictor), np.fmax(np.abs(y), np.abs(yNew)))
+        change = 0.9*max(error, 1e-10)**(-1/(order + 1))
+        if error > 1:
+            h *= max(0.2, change)
+            rejected += 1
+            continue
+
+        yPrev, hPrev = y, h
+        y = yNew
+        t += h
+        f = fun(t, y[None])[0]
+        evaluations += 1
+        fresh = False
+        steps += 1
+        times.append(t)
+        states.append(y.copy())
+        # Step ratios above 1 + sqrt(2) make variable-step BDF2 unstable
+        h *= min(2, max(0.2, change))
+
+    record_solver("bdf_integrate", steps, evaluations, t < t1)
+
+    return {"t": np.array(times), "y": np.array(states), "steps": steps, "rejected": rejected, "jacobians": jacobians, "evaluations": evaluations}
+
+
+def interpolate(times, states, tOut):
+    """
+    States at the tOut times, linear between the steps
+    """
+    k = np.clip(np.searchsorted(times, tOut), 1, len(times) - 1)
+    weight = ((tOut - times[k - 1])/(times[k] - times[k - 1]))[:, None, None]
+    return (1 - weight)*states[k - 1] + weight*states[k]
+
+
+class DynamicColumn():
+    """
+    Holdup dynamics of a column with a total condenser and partial reboiler
+
+    alpha and z are per component, F, L (reflux) and Vs (boil-up) in kmol/h,
+    trays counts the trays between the drum and the sump and feedTray is
+    numbered from 1 at the top. activeArea (m2), weirLength and weirHeight
+    (m) set the Francis weir holdup of the trays, molarDensity (kmol/m3) is
+    a scalar or one value per stage. The drum and sump hold residenceTime (h)
+    of their outflows and their level controllers act over levelTime (h)
+    """
+
+    def __init__(self, alpha, F, z, q, L, Vs, trays, feedTray, activeArea, weirLength, molarDensity, weirHeight=0.05, residenceTime=5/60, levelTime=0.1):
+        """
+        Defining the column and its steady inputs
+        """
+        self.alpha = np.where(np.isfinite(alpha), alpha, 1.0)
+        self.trays = int(trays)
+        self.feedTray = int(feedTray)
+        self.stages = self.trays + 2
+        self.activeArea = activeArea
+        self.weirLength = weirLength
+        self.weirHeight = weirHeight
+        self.molarDensity = np.broadcast_to(np.asarray(molarDensity, dtype=float), (self.stages,)).copy()
+        self.levelTime = levelTime
+        self.inputs = {"F": float(F), "z": np.asarray(z, dtype=float), "q": float(q), "L": float(L), "Vs": float(Vs)}
+
+        j = np.arange(1, self.trays + 1)
+        D = Vs + (1 - q)*F - L
+        liquid = np.where(j < self.feedTray, L, L + q*F)
+        self.weirConstant = 3600*self.molarDensity[j]*weirLength/0.75**1.5
+        self.nominalHoldup = np.empty(self.stages)
+        self.nominalHoldup[0] = (L + D)*residenceTime
+        self.nominalHoldup[1:-1] = self.molarDensity[j]*activeArea*(weirHeight + (liquid/self.weirConstant)**(2/3))
+        self.nominalHoldup[-1] = (L + q*F)*residenceTime
+
+        self.time = 0.0
+        self.state = None
+
+    def flows(self, holdup, inputs):
+        """
+        Liquid leaving every stage but the sump, vapour leaving every stage
+        but the drum, distillate and bottoms for stacked total holdups
+        """
+        F, q, L, Vs = inputs["F"], inputs["q"], inputs["L"], inputs["Vs"]
+        Vr = Vs + (1 - q)*F
+
+        j = np.arange(1, self.trays + 1)
+        how = np.fmax(holdup[:, 1:-1]/(self.molarDensity[j]*self.activeArea) - self.weirHeight, 0)
+        liquid = np.concatenate([np.full((holdup.shape[0], 1), L), self.weirConstant*how**1.5], axis=1)
+        vapour = np.append(np.where(j <= self.feedTray, Vr, Vs), Vs)
+
+        D = np.fmax(Vr - L + (holdup[:, 0] - self.nominalHoldup[0])/self.levelTime, 0)
+        B = np.fmax(liquid[:, -1] - Vs + (holdup[:, -1] - self.nominalHoldup[-1])/self.levelTime, 0)
+
+        return liquid, vapour, D, B
+
+    def derivatives(self, M, inputs):
+        """
+        dM/dt of stacked component holdups shaped (k x stages x components)
+        """
+        holdup = M.sum(axis=2)
+        x = M/holdup[:, :, None]
+        ax = self.alpha*x
+        y = ax/ax.sum(axis=2, keepdims=True)
+        liquid, vapour, D, B = self.flows(holdup, inputs)
+
+        dM = np.zeros(M.shape)
+        down = liquid[:, :, None]*x[:, :-1]
+        up = vapour[:, None]*y[:, 1:]
+        dM[:, 1:] += down - up
+        dM[:, :-1] += up - down
+        dM[:, 0] -= D[:, None]*x[:, 0]
+        dM[:, -1] -= B[:, None]*x[:, -1]
+        dM[:, self.feedTray] += inputs["F"]*inputs["z"]
+
+        return dM
+
+    def initial_state(self, topMoleFraction, bottomMoleFraction):
+        """
+        Nominal holdups with compositions interpolated linearly between the
+        top and bottom product compositions
+        """
+        weight = np.linspace(0, 1, self.stages)[:, None]
+        x = (1 - weight)*np.asarray(topMoleFraction) + weight*np.asarray(bottomMoleFraction)
+        self.state = self.nominalHoldup[:, None]*x
+        self.time = 0.0
+        return self.state
+
+    def simulate(self, hours, disturbance=None, points=101, rtol=1e-4, atol=1e-6):
+        """
+        Integrates the holdups for hours from the current state
+
+        disturbance(t) returns a dictionary overriding any of the inputs F,
+        z, q, L and Vs at time t (h since the start of this call). Returns the
+        output times, component holdups and liquid compositions, distillate
+        and bottoms flows at points evenly spaced times, with the integrator
+        statistics, and keeps the final state for the next call
+        """
+        def inputs(t):
+            return dict(self.inputs, **disturbance(t)) if disturbance else self.inputs
+
+        def fun(t, M):
+            return self.derivatives(M, inputs(t))
+
+        solution = bdf_integrate(fun, self.state, 0.0, hours, rtol, atol)
+        tOut = np.linspace(0, hours, points)
+        M = interpolate(solution["t"], solution["y"], tOut)
+        holdup = M.sum(axis=2)
+        D, B = np.array([self.flows(holdup[k:k + 1], inputs(t))[2:] for k, t in enumerate(tOut)])[:, :, 0].T
+
+        self.state = solution["y"][-1]
+        self.time += hours
+
+        return {
+            "t": tOut,
+            "holdup": M,
+            "x": M/holdup[:, :, None],
+            "D": D,
+            "B": B,
+            "steps": solution["steps"],
+            "rejected": solution["rejected"],
+            "jacobians": solution["jacobians"],
+            "evaluations": solution["evaluations"]
+        }
+
+    def steady_state(self, hours=50, rtol=1e-6, atol=1e-8):
+        """
+        Runs the steady inputs for hours, long enough for the compositions to
+        settle, and keeps the end state
+        """
+        self.simulate(hours, points=2, rtol=rtol, atol=atol)
+        self.time = 0.0
+        return self.state
+
+
+def from_column(column, Rf, efficiency=1, columnTemperatures=False, distributeNonKeys=False, weirFraction=0.77, activeFraction=0.85, **options):
+    """
+    DynamicColumn at the short-cut design of a column.Distillation
+
+    The ideal plates of the design less the reboiler become the trays, fed
+    on the last rectifying stage. Flows come from sizing.batch_sizing and the
+    tray area and weir length from its diameter. Further keyword arguments
+    go to DynamicColumn. The state starts from the linear profile between
+    the product compositions, see DynamicColumn.steady_state
+
+    Raises ValueError when a product is above the critical temperature of
+    one of its components, which has no Rackett liquid density
+    """
+    components = column.components
+    flowrate = [[column.massFeedComposition[key] for key in components]]
+    P = column.columnPressure
+    results = batch_distillation(components, flowrate, column.LiK, column.HeK, column.columnTemperature, column.q, column.topRecovery, column.bottomRecovery, Rf, efficiency, P=P if columnTemperatures else None, distributeNonKeys=distributeNonKeys)
+    sizes = batch_sizing(components, results, P, column.q, column.columnTemperature, activeFraction=activeFraction)
+    if np.isnan(sizes["diameter"][0]):
+        raise ValueError("No liquid density at the column temperatures, a product component is supercritical (try columnTemperatures=True)")
+
+    # Mole fractions from the kg/h flows, the same as sizing.batch_sizing
+    molarMass = store["mr"][component_ids(components)]
+    feed = np.asarray(flowrate[0])/molarMass
+    top = results["massTopComposition"][0]/molarMass
+    bottom = results["massBottomComposition"][0]/molarMass
+
+    trays = int(results["idealPlates"][0]) - 1
+    feedTray = min(max(int(results["Nr"][0]), 1), trays)
+    diameter = sizes["diameter"][0]
+    topDensity = sizes["topLiquidDensity"][0]*top.sum()/(top @ molarMass)
+    bottomDensity = sizes["bottomLiquidDensity"][0]*bottom.sum()/(bottom @ molarMass)
+    molarDensity = np.where(np.arange(trays + 2) <= feedTray, topDensity, bottomDensity)
+
+    dynamic = DynamicColumn(results["rvHeK"][0], feed.sum(), feed/feed.sum(), column.q, sizes["L"][0], sizes["Vs"][0], trays, feedTray, activeFraction*np.pi*diameter**2/4, weirFraction*diameter, molarDensity, **options)
+    dynamic.initial_state(top/top.sum(), bottom/bottom.sum())
+
+    return dynamic
+
+
+if __name__ == "__main__":
+    import time
+    from .column import Distillation
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    Debutanizer = Distillation(components, flowrates, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999)
+    dynamic = from_column(Debutanizer, 1.2, 0.72, columnTemperatures=True)
+    LiK = components.index("ethyl-acetylene")
+    HeK = components.index("pentane")
+
+    start = time.perf_counter()
+    dynamic.steady_state()
+    settled = time.perf_counter() - start
+
+    # 10 % more feed for 4 hours
+    start = time.perf_counter()
+    response = dynamic.simulate(4, lambda t: {"F": 1.1*dynamic.inputs["F"]}, points=9)
+    elapsed = time.perf_counter() - start
+
+    print("\n%i trays x %i components, feed on tray %i" % (dynamic.trays, len(components), dynamic.feedTray))
+    print("Steady state (50 h) in %.2f s" % settled)
+    print("Feed step (4 h) in %.2f s: %i steps, %i Jacobians" % (elapsed, response["steps"], response["jacobians"]))
+    print("\nt (h)\tx HeK top\tx LiK bottom\tD (kmol/h)")
+    for k, t in enumerate(response["t"]):
+        print("%.1f\t%.5f\t\t%.6f\t%.1f" % (t, response["x"][k, 0, HeK], response["x"][k, -1, LiK], response["D"][k]))
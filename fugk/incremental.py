@@ -0,0 +1,191 @@
+"""
+Lazy, dependency-tracked evaluation of the FUG(K) short-cut steps
+
+Every derived quantity is a node that knows which inputs or other nodes it
+is computed from. Values are only computed when asked for and are kept until
+one of their inputs changes, at which point that node and everything
+downstream of it is invalidated:
+
+- changing q recomputes Underwood, Gilliland and Kirkbride
+- changing Rf recomputes Gilliland onward
+- changing T recomputes the vapour pressures and everything after them
+
+ColumnModel wires the steps of batch.py into the graph, so it works for a
+single column or a whole batch of cases
+"""
+import numpy as np
+
+from .batch import (key_index, case_array, batch_vapour_pressure, batch_relative_volatility, batch_split,
+    batch_N_min, batch_minimum_reflux, batch_gilliland, batch_feed_stage, batch_actual_trays)
+from .component_store import store, component_ids
+
+
+class DesignGraph():
+    """
+    Generic graph of inputs and lazily evaluated nodes
+    """
+
+    def __init__(self):
+        """
+        Defining the empty graph
+        """
+        self.values = {}
+        self.inputs = set()
+        self.nodes = {}
+        self.producer = {}
+        self.dependents = {}
+        self.evaluations = {}
+
+    def add_input(self, name, value):
+        """
+        Adds an input value that other nodes can depend on
+        """
+        self.inputs.add(name)
+        self.dependents.setdefault(name, set())
+        self.values[name] = value
+
+    def add_node(self, name, outputs, function, inputs):
+        """
+        Adds a node computing the named outputs from function(*inputs)
+
+        A function with several outputs returns them as a tuple in the same order
+        """
+        self.nodes[name] = (tuple(outputs), function, tuple(inputs))
+        self.evaluations[name] = 0
+        for output in outputs:
+            self.producer[output] = name
+            self.dependents.setdefault(output, set())
+        for i in inputs:
+            self.dependents.setdefault(i, set()).add(name)
+
+    def invalidate(self, name):
+        """
+        Drops every value computed downstream of name
+
+        An invalid value never has valid dependents, so the walk stops at
+        values that are already gone
+        """
+        for node in self.dependents[name]:
+            for output in self.nodes[node][0]:
+                if output in self.values:
+                    del self.values[output]
+                    self.invalidate(output)
+
+    def set(self, **values):
+        """
+        Changes one or more inputs and invalidates what depends on them
+        """
+        for name, value in values.items():
+            if name not in self.inputs:
+                raise KeyError("%s is not an input" % name)
+            self.values[name] = value
+            self.invalidate(name)
+
+    def get(self, name):
+        """
+        Returns a value, computing it and any missing upstream values first
+        """
+        if name not in self.values:
+            outputs, function, inputs = self.nodes[self.producer[name]]
+            result = function(*[self.get(i) for i in inputs])
+            if len(outputs) == 1:
+                result = (result,)
+            self.values.update(zip(outputs, result))
+            self.evaluations[self.producer[name]] += 1
+
+        return self.values[name]
+
+
+def feed_compositions(flowrate, molarMass):
+    """
+    Feed flows in the units used by column.Distillation and their fractions
+    """
+    feedComposition = flowrate*molarMass
+    return feedComposition, feedComposition/feedComposition.sum(axis=1, keepdims=True)
+
+
+def mole_fractions(topComposition, bottomComposition):
+    """
+    Normalises the distillate and bottom flows to mole fractions
+    """
+    return topComposition/topComposition.sum(axis=1, keepdims=True), bottomComposition/bottomComposition.sum(axis=1, keepdims=True)
+
+
+class ColumnModel(DesignGraph):
+    """
+    Incremental FUG(K) design of one column or a batch of columns
+
+    Inputs follow batch.batch_distillation. Read results with get, e.g.
+    model.get("Rmin"), and change inputs with set, e.g. model.set(q=0.6)
+    """
+
+    def __init__(self, components, flowrate, LiK, HeK, T, q, topRecovery, bottomRecovery, Rf, efficiency=1, partialReboiler=True):
+        """
+        Defining the inputs and wiring the short-cut steps together
+        """
+        super().__init__()
+        self.components = list(components)
+        flowrate = np.atleast_2d(np.asarray(flowrate, dtype=float))
+        self.cases = flowrate.shape[0]
+
+        self.add_input("flowrate", flowrate)
+        self.add_input("partialReboiler", partialReboiler)
+        for name, value in (("LiK", LiK), ("HeK", HeK), ("T", T), ("q", q), ("topRecovery", topRecovery),
+                            ("bottomRecovery", bottomRecovery), ("Rf", Rf), ("efficiency", efficiency)):
+            self.add_input(name, self.normalise(name, value))
+
+        molarMass = store["mr"][component_ids(self.components)]
+        self.add_node("feed", ["feedComposition", "feedMoleComposition"],
+            lambda flowrate: feed_compositions(flowrate, molarMass),
+            ["flowrate"])
+        self.add_node("vapour pressure", ["vapourPressures", "outOfRange"],
+            lambda T: batch_vapour_pressure(self.components, T),
+            ["T"])
+        self.add_node("relative volatility", ["rvHeK"], batch_relative_volatility, ["vapourPressures", "HeK"])
+        self.add_node("split", ["topComposition", "bottomComposition"], batch_split,
+            ["feedComposition", "rvHeK", "LiK", "HeK", "topRecovery", "bottomRecovery"])
+        self.add_node("mole fractions", ["topMoleFraction", "bottomMoleFraction"], mole_fractions,
+            ["topComposition", "bottomComposition"])
+        self.add_node("fenske", ["Nmin"], batch_N_min,
+            ["topMoleFraction", "bottomMoleFraction", "rvHeK", "LiK", "HeK", "partialReboiler"])
+        self.add_node("underwood", ["phi", "Rmin"], batch_minimum_reflux,
+            ["feedMoleComposition", "topMoleFraction", "rvHeK", "HeK", "q"])
+        self.add_node("gilliland", ["R", "idealPlates"], batch_gilliland, ["Nmin", "Rmin", "Rf"])
+        self.add_node("kirkbride", ["Nr", "Ns"], batch_feed_stage,
+            ["idealPlates", "feedMoleComposition", "topMoleFraction", "bottomMoleFraction", "topComposition", "bottomComposition", "LiK", "HeK"])
+        self.add_node("actual trays", ["trayEfficiency", "actualTrays"], batch_actual_trays, ["idealPlates", "efficiency"])
+
+    def normalise(self, name, value):
+        """
+        Converts keys to index arrays and other inputs to per-case arrays
+        """
+        if name in ("LiK", "HeK"):
+            return key_index(self.components, value, self.cases)
+        if name in ("flowrate", "partialReboiler"):
+            return value
+        return case_array(value, self.cases)
+
+    def set(self, **values):
+        """
+        Changes one or more inputs and invalidates what depends on them
+        """
+        if "flowrate" in values:
+            values["flowrate"] = np.atleast_2d(np.asarray(values["flowrate"], dtype=float))
+            if values["flowrate"].shape[0] != self.cases:
+                raise ValueError("flowrate must keep %i cases" % self.cases)
+        super().set(**{name: self.normalise(name, value) for name, value in values.items()})
+
+
+if __name__ == "__main__":
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    model = ColumnModel(components, flowrates, "ethyl-acetylene", "pentane", 273+140, 0.5, 0.95, 0.9999, 1.2, 0.72)
+    print("\nq = 0.5: Rmin = %.2f, N = %i, feed tray %i" % (model.get("Rmin")[0], model.get("idealPlates")[0], model.get("Ns")[0]))
+
+    model.set(q=0.8)
+    print("q = 0.8: Rmin = %.2f, N = %i, feed tray %i" % (model.get("Rmin")[0], model.get("idealPlates")[0], model.get("Ns")[0]))
+
+    print("\nEvaluations per step")
+    for name, count in model.evaluations.items():
+        print("%s: \t%i" % (name.title(), count))
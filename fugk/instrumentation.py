@@ -0,0 +1,174 @@
+"""
+Opt-in instrumentation of the design methods and root solvers
+
+Nothing is recorded unless a recorder is active:
+
+with instrument() as stats:
+    Debutanizer.design(1.2, 0.72)
+print(stats.summary())
+
+Methods decorated with timed record their wall time (inclusive of the
+methods they call) and the root solvers report their iteration counts,
+function evaluations and the number of cases that did not converge. The same
+records can be passed to a callback, e.g. to forward them to a metrics
+system. With no recorder active the decorators and solver hooks return after
+a single check, so the overhead is a function call per method or solver call
+
+Recorders are kept per process, so worker processes of sweep.py need their
+own
+"""
+import time
+import functools
+from contextlib import contextmanager
+
+# Stack of active recorders, the innermost one records
+_active = []
+
+
+class SolverStats():
+    """
+    Wall times per method and counters per root solver
+
+    timings maps a method name to {"calls", "seconds"} and solvers maps a
+    solver name to {"calls", "cases", "iterations", "evaluations",
+    "failures"}. callback, if given, is called with every record as a
+    dictionary with a "type" of "time" or "solver"
+    """
+
+    def __init__(self, callback=None):
+        """
+        Defining the empty tables
+        """
+        self.callback = callback
+        self.timings = {}
+        self.solvers = {}
+
+    def record_time(self, name, seconds):
+        """
+        Adds one call of a timed method
+        """
+        entry = self.timings.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+        if self.callback is not None:
+            self.callback({"type": "time", "name": name, "seconds": seconds})
+
+    def record_solver(self, name, iterations, evaluations, failures=0, cases=1):
+        """
+        Adds one call of a root solver over a number of cases
+        """
+        entry = self.solvers.setdefault(name, {"calls": 0, "cases": 0, "iterations": 0, "evaluations": 0, "failures": 0})
+        entry["calls"] += 1
+        entry["cases"] += cases
+        entry["iterations"] += iterations
+        entry["evaluations"] += evaluations
+        entry["failures"] += failures
+        if self.callback is not None:
+            self.callback({"type": "solver", "name": name, "iterations": iterations, "evaluations": evaluations, "failures": failures, "cases": cases})
+
+    def as_dict(self):
+        """
+        Plain dictionary copy of the tables, e.g. for json.dump
+        """
+        return {
+            "timings": {name: dict(entry) for name, entry in self.timings.items()},
+            "solvers": {name: dict(entry) for name, entry in self.solvers.items()}
+        }
+
+    def summary(self):
+        """
+        Formats the tables as text
+        """
+        lines = ["\n%-45s %8s %12s" % ("Method", "Calls", "Time")]
+        for name, entry in sorted(self.timings.items(), key=lambda item: -item[1]["seconds"]):
+            lines.append("%-45s %8i %9.3f ms" % (name, entry["calls"], entry["seconds"]*1000))
+
+        lines.append("\n%-25s %8s %8s %11s %12s %9s" % ("Solver", "Calls", "Cases", "Iterations", "Evaluations", "Failures"))
+        for name, entry in sorted(self.solvers.items()):
+            lines.append("%-25s %8i %8i %11i %12i %9i" % (name, entry["calls"], entry["cases"], entry["iterations"], entry["evaluations"], entry["failures"]))
+
+        return "\n".join(lines)
+
+
+@contextmanager
+def instrument(callback=None, stats=None):
+    """
+    Records everything inside the with block into stats (a new SolverStats
+    unless one is given to keep adding to), which is yielded
+    """
+    if stats is None:
+        stats = SolverStats(callback)
+    _active.append(stats)
+    try:
+        yield stats
+    finally:
+        _active.remove(stats)
+
+
+def enabled():
+    """
+    True while a recorder is active
+    """
+    return bool(_active)
+
+
+def record_solver(name, iterations, evaluations, failures=0, cases=1):
+    """
+    Hook called by the root solvers once per call, does nothing unless a
+    recorder is active
+    """
+    if _active:
+        _active[-1].record_solver(name, int(iterations), int(evaluations), int(failures), int(cases))
+
+
+def timed(method):
+    """
+    Decorator recording the wall time of a method under
+    module.Class.method, only while a recorder is active
+    """
+    name = "%s.%s" % (method.__module__, method.__qualname__)
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        if not _active:
+            return method(*args, **kwargs)
+        stats = _active[-1]
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            stats.record_time(name, time.perf_counter() - start)
+
+    return wrapper
+
+
+if __name__ == "__main__":
+    import io
+    import contextlib
+    from .column import Distillation
+
+    # The hooks report to the imported module, not to this script
+    from .instrumentation import instrument
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    Debutanizer = Distillation(components, flowrates, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999)
+
+    with instrument() as stats:
+        Debutanizer.design(1.2, 0.72, columnTemperatures=True, distributeNonKeys=True)
+
+        # The printing methods, with their output hidden
+        with contextlib.redirect_stdout(io.StringIO()):
+            Debutanizer.find_vapour_pressure()
+            Debutanizer.find_relative_volatilty()
+            Debutanizer.print_distillate_flowrate()
+            Debutanizer.print_bottom_flowrate()
+            Debutanizer.find_column_temperatures()
+            Debutanizer.find_N_min()
+            Debutanizer.find_minimum_reflux()
+            Debutanizer.gilliland_correlation(1.2)
+            Debutanizer.feed_stage_location()
+            Debutanizer.actual_trays(0.72)
+
+    print(stats.summary())
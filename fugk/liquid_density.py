@@ -0,0 +1,30 @@
+"""
+Dictionary storing the Rackett constants for calculating the saturated liquid density of pure components
+
+rackett: [Tc (K), Pc (kPa), ZRA]
+
+rho = Mr*Pc/(R*Tc)/ZRA^(1 + (1 - T/Tc)^(2/7))
+
+Critical constants and ZRA from Reid, Prausnitz and Poling, The Properties of
+Gases and Liquids, 4th edition
+"""
+
+rackett = {
+    "hydrogen": [33.19, 1313, 0.3218],
+    "carbon monoxide": [132.92, 3499, 0.2896],
+    "carbon dioxide": [304.21, 7383, 0.2722],
+    "methane": [190.56, 4599, 0.2892],
+    "acetylene": [308.3, 6138, 0.2707],
+    "ethylene": [282.34, 5041, 0.2813],
+    "ethane": [305.32, 4872, 0.2808],
+    "methyl-acetylene": [402.4, 5630, 0.2750],
+    "propadiene": [393.0, 5250, 0.2721],
+    "propylene": [364.9, 4600, 0.2779],
+    "propane": [369.83, 4248, 0.2766],
+    "ethyl-acetylene": [440.0, 4600, 0.2727],
+    "1-butene": [419.5, 4020, 0.2736],
+    "butane": [425.12, 3796, 0.2730],
+    "pentane": [469.7, 3370, 0.2685],
+    "water": [647.14, 22064, 0.2338],
+    "nitrogen": [126.2, 3398, 0.2900]
+}
@@ -0,0 +1,176 @@
+"""
+Monte Carlo uncertainty propagation for column.Distillation
+
+Samples the feed flowrates, T, q and the recoveries of a column from given
+distributions and designs every sample with batch.batch_distillation, so
+10^5 samples take a few seconds. The results are summarised as percentiles
+of Nmin, Rmin, N and the feed tray
+
+A distribution is a tuple, or any other sequence such as a list read from
+JSON, of a kind and its parameters:
+
+("normal", mean, sd), ("uniform", low, high), ("triangular", low, mode, high),
+("lognormal", mean, sigma) of the underlying normal
+
+T, q, topRecovery and bottomRecovery take absolute values. "flowrate" takes
+the relative deviation of every component flow, flow*(1 + deviation), drawn
+independently per component, e.g. ("normal", 0, 0.05) for 5 % noise, or a
+{component: distribution} dictionary. Inputs without a distribution keep the
+value of the column
+"""
+import numpy as np
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import batch_distillation
+
+# Results summarised by default, named as in batch_distillation
+summary_names = ("Nmin", "Rmin", "idealPlates", "idealFeedTray")
+
+samplers = {
+    "normal": lambda rng, size, mean, sd: rng.normal(mean, sd, size),
+    "uniform": lambda rng, size, low, high: rng.uniform(low, high, size),
+    "triangular": lambda rng, size, low, mode, high: rng.triangular(low, mode, high, size),
+    "lognormal": lambda rng, size, mean, sigma: rng.lognormal(mean, sigma, size)
+}
+
+
+def draw(rng, distribution, size):
+    """
+    Samples a distribution sequence, or repeats a fixed value
+    """
+    if isinstance(distribution, str) or not isinstance(distribution, Sequence):
+        return np.full(size, float(distribution))
+    kind, *parameters = distribution
+    if kind not in samplers:
+        raise ValueError("Unknown distribution %s, expected one of %s" % (kind, ", ".join(samplers)))
+    return samplers[kind](rng, size, *parameters)
+
+
+def sample_inputs(column, distributions, samples, rng):
+    """
+    Draws the sampled inputs of a column.Distillation
+
+    Returns a dictionary with the kg/h flowrates shaped (samples x
+    components) and T, q, topRecovery and bottomRecovery shaped (samples,)
+    """
+    flowrate = np.array([column.massFeedComposition[key] for key in column.components], dtype=float)
+    deviation = distributions.get("flowrate", 0.0)
+    if isinstance(deviation, dict):
+        factors = np.column_stack([1 + draw(rng, deviation.get(key, 0.0), samples) for key in column.components])
+    else:
+        factors = 1 + np.column_stack([draw(rng, deviation, samples) for _ in column.components])
+
+    inputs = {"flowrate": flowrate*np.clip(factors, 0, None)}
+    for name, value in (("T", column.columnTemperature), ("q", column.q), ("topRecovery", column.topRecovery), ("bottomRecovery", column.bottomRecovery)):
+        inputs[name] = draw(rng, distributions.get(name, value), samples)
+
+    # Recoveries of exactly 0 or 1 have no finite Fenske solution
+    inputs["topRecovery"] = np.clip(inputs["topRecovery"], 1e-9, 1 - 1e-9)
+    inputs["bottomRecovery"] = np.clip(inputs["bottomRecovery"], 1e-9, 1 - 1e-9)
+
+    return inputs
+
+
+def run_chunk(spec, inputs):
+    """
+    Designs one chunk of samples and returns the summarised results
+
+    spec holds the fixed inputs: components, LiK, HeK, Rf, efficiency, P,
+    distributeNonKeys and names
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        results = batch_distillation(spec["components"], inputs["flowrate"], spec["LiK"], spec["HeK"], inputs["T"], inputs["q"], inputs["topRecovery"], inputs["bottomRecovery"], spec["Rf"], spec["efficiency"], P=spec["P"], distributeNonKeys=spec["distributeNonKeys"])
+
+    return {name: results[name] for name in spec["names"]}
+
+
+def summarise(values, percentiles):
+    """
+    Mean, standard deviation and percentiles of the finite values, with the
+    number of samples that failed (nan or infinite)
+    """
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {"mean": np.nan, "std": np.nan, "percentiles": {p: np.nan for p in percentiles}, "failed": int(values.size)}
+
+    return {
+        "mean": float(finite.mean()),
+        "std": float(finite.std()),
+        "percentiles": dict(zip(percentiles, np.percentile(finite, percentiles).tolist())),
+        "failed": int(values.size - finite.size)
+    }
+
+
+def monte_carlo(column, Rf, efficiency=1, distributions=None, samples=100000, seed=None, percentiles=(5, 50, 95), columnTemperatures=False, distributeNonKeys=False, names=summary_names, chunkSize=None, processes=None, keepSamples=False):
+    """
+    Propagates input uncertainty through the short-cut design of a
+    column.Distillation
+
+    distributions maps "flowrate", "T", "q", "topRecovery" and
+    "bottomRecovery" to distribution tuples (see the module docstring). The
+    samples are drawn once from seed, so the results do not depend on the
+    chunking. chunkSize=None designs every sample in one batch, otherwise
+    the chunks run in this process or, with processes, on a pool of that
+    many workers
+
+    Returns {name: {"mean", "std", "percentiles", "failed"}} for every
+    result in names. With keepSamples, "inputs" and "results" hold the
+    sampled inputs and the raw result arrays as well
+    """
+    rng = np.random.default_rng(seed)
+    inputs = sample_inputs(column, distributions or {}, samples, rng)
+
+    spec = {
+        "components": list(column.components),
+        "LiK": column.LiK,
+        "HeK": column.HeK,
+        "Rf": Rf,
+        "efficiency": efficiency,
+        "P": column.columnPressure if columnTemperatures else None,
+        "distributeNonKeys": distributeNonKeys,
+        "names": tuple(names)
+    }
+
+    chunkSize = chunkSize or samples
+    pieces = [{name: value[start:start + chunkSize] for name, value in inputs.items()} for start in range(0, samples, chunkSize)]
+    if processes is None:
+        chunks = [run_chunk(spec, piece) for piece in pieces]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            chunks = list(pool.map(run_chunk, [spec]*len(pieces), pieces))
+
+    results = {name: np.concatenate([chunk[name] for chunk in chunks]) for name in names}
+    summary = {name: summarise(results[name], percentiles) for name in names}
+    if keepSamples:
+        summary["inputs"] = inputs
+        summary["results"] = results
+
+    return summary
+
+
+if __name__ == "__main__":
+    import time
+    from .column import Distillation
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    Debutanizer = Distillation(components, flowrates, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999)
+    distributions = {
+        "flowrate": ("normal", 0, 0.05),
+        "T": ("normal", 273+140, 2),
+        "q": ("uniform", 0.4, 0.6),
+        "topRecovery": ("triangular", 0.94, 0.95, 0.96)
+    }
+
+    samples = 100000
+    start = time.perf_counter()
+    summary = monte_carlo(Debutanizer, 1.2, 0.72, distributions, samples, seed=0)
+    elapsed = time.perf_counter() - start
+
+    print("\nMonte Carlo over %i samples in %.2f s" % (samples, elapsed))
+    print("\t\tP5\tP50\tP95\tFailed")
+    for name, label in (("Nmin", "Nmin"), ("Rmin", "Rmin"), ("idealPlates", "N"), ("idealFeedTray", "Feed tray")):
+        p = summary[name]["percentiles"]
+        print("%s: \t%.2f\t%.2f\t%.2f\t%i" % (label, p[5], p[50], p[95], summary[name]["failed"]))
@@ -0,0 +1,296 @@
+"""
+Operating pressure optimisation of a short-cut column design
+
+At a column pressure P the top temperature is the dew point of the
+distillate and the bottom temperature the bubble point of the bottoms, and
+the volatilities are their geometric mean (batch.batch_distillation with
+P). Raising P lowers the volatilities, so more trays and reflux are needed,
+but raises the condenser temperature, which cooling water needs to stay
+above. optimise_pressure searches P for the lowest objective in the
+feasible range:
+
+1. the temperature limits are turned into pressure bounds, from the dew
+   pressure of the distillate at the lowest condenser temperature and the
+   bubble pressure of the bottoms at the highest reboiler temperature
+2. a log-spaced grid of pressures is designed in one batch call
+3. bounded Brent minimisation refines the best grid interval
+
+Trial designs are memoised by pressure and only carry the components
+present in the feed, so the dew and bubble point iterations evaluate no
+saturation data for absent ones. Pressures are in kPa and temperatures in K
+"""
+import math
+
+import numpy as np
+
+from .batch import batch_distillation
+from .component_store import component_ids, vapour_pressure
+from .results import ColumnResult
+from .sizing import batch_sizing
+
+GOLDEN = 0.5*(3 - math.sqrt(5))
+
+
+def brent_minimise(f, a, b, tol=1e-5, maxiter=100):
+    """
+    Bounded Brent minimisation of a scalar function on [a, b], parabolic
+    steps with golden-section fallback. tol is relative to x
+
+    Returns the minimiser and the function value there
+    """
+    x = w = v = a + GOLDEN*(b - a)
+    fx = fw = fv = f(x)
+    d = e = 0.0
+
+    for _ in range(maxiter):
+        m = 0.5*(a + b)
+        tol1 = tol*abs(x) + 1e-10
+        tol2 = 2*tol1
+        if abs(x - m) <= tol2 - 0.5*(b - a):
+            break
+
+        parabolic = False
+        if abs(e) > tol1:
+            r = (x - w)*(fx - fv)
+            q = (x - v)*(fx - fw)
+            p = (x - v)*q - (x - w)*r
+            q = 2*(q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            eOld, e = e, d
+            if abs(p) < abs(0.5*q*eOld) and q*(a - x) < p < q*(b - x):
+                d = p/q
+                u = x + d
+                if u - a < tol2 or b - u < tol2:
+                    d = tol1 if x < m else -tol1
+                parabolic = True
+        if not parabolic:
+            e = (b - x) if x < m else (a - x)
+            d = GOLDEN*e
+
+        u = x + (d if abs(d) >= tol1 else math.copysign(tol1, d))
+        fu = f(u)
+        if fu <= fx:
+            if u < x:
+                b = x
+            else:
+                a = x
+            v, fv, w, fw, x, fx = w, fw, x, fx, u, fu
+        else:
+            if u < x:
+                a = u
+            else:
+                b = u
+            if fu <= fw or w == x:
+                v, fv, w, fw = w, fw, u, fu
+            elif fu <= fv or v == x or v == w:
+                v, fv = u, fu
+
+    return x, fx
+
+
+def dew_pressure(components, y, T):
+    """
+    Pressure (kPa) at which vapour y starts to condense at T
+    """
+    Psat = vapour_pressure(component_ids(components), T)[:, 0]/1000
+    y = np.asarray(y, dtype=float)
+    return 1/np.sum(y[y > 0]/Psat[y > 0])
+
+
+def bubble_pressure(components, x, T):
+    """
+    Pressure (kPa) at which liquid x starts to boil at T
+    """
+    Psat = vapour_pressure(component_ids(components), T)[:, 0]/1000
+    return float(np.sum(np.asarray(x, dtype=float)*Psat))
+
+
+class PressureProblem():
+    """
+    Designs of one column at any pressure, memoised by pressure
+
+    objective is "NR" (ideal plates times reflux ratio), a key of the
+    batch_distillation results or, for duties, of the batch_sizing results
+    (e.g. "reboilerDuty"), or a function of (results, sizes) returning one
+    score per case
+    """
+
+    def __init__(self, column, Rf, efficiency=1, objective="NR", distributeNonKeys=False):
+        """
+        Defining the fixed inputs of the designs
+        """
+        self.column = column
+        self.Rf = Rf
+        self.efficiency = efficiency
+        self.objective = objective
+        self.distributeNonKeys = distributeNonKeys
+        self.fullFlowrate = np.array([column.massFeedComposition[key] for key in column.components], dtype=float)
+        self.components = [key for key, flow in zip(column.components, self.fullFlowrate) if flow > 0]
+        self.flowrate = self.fullFlowrate[self.fullFlowrate > 0]
+        self.scores = {}
+        self.designs = {}
+
+    def design(self, P, full=False):
+        """
+        batch_distillation and batch_sizing results for an array of pressures
+
+        Trial designs only carry the components present in the feed, so the
+        dew and bubble point iterations evaluate no saturation data for absent
+        ones. full designs over every component of the column, for the result
+        """
+        P = np.atleast_1d(np.asarray(P, dtype=float))
+        c = self.column
+        components, flowrate = (c.components, self.fullFlowrate) if full else (self.components, self.flowrate)
+        flowrate = np.broadcast_to(flowrate, (P.size, flowrate.size))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results = batch_distillation(components, flowrate, c.LiK, c.HeK, c.columnTemperature, c.q, c.topRecovery, c.bottomRecovery, self.Rf, self.efficiency, P=P, distributeNonKeys=self.distributeNonKeys)
+            sizes = None
+            if full or callable(self.objective) or self.objective not in results and self.objective != "NR":
+                sizes = batch_sizing(components, results, P, c.q)
+
+        return results, sizes
+
+    def bound_design(self, P):
+        """
+        Trial design at a single pressure, memoised by pressure for the
+        substitution in pressure_bounds
+        """
+        if P not in self.designs:
+            self.designs[P] = self.design(P)[0]
+
+        return self.designs[P]
+
+    def score(self, results, sizes):
+        """
+        Objective of every case, infinite where the design failed
+        """
+        if callable(self.objective):
+            scores = self.objective(results, sizes)
+        elif self.objective == "NR":
+            scores = results["idealPlates"]*results["R"]
+        elif self.objective in results:
+            scores = results[self.objective]
+        else:
+            scores = sizes[self.objective]
+
+        return np.where(np.isfinite(scores), scores, np.inf)
+
+    def evaluate(self, P):
+        """
+        Objective at an array of pressures, each pressure designed only once
+        """
+        P = np.atleast_1d(np.asarray(P, dtype=float))
+        new = np.array([p for p in np.unique(P) if p not in self.scores])
+        if new.size:
+            self.scores.update(zip(new.tolist(), self.score(*self.design(new)).tolist()))
+
+        return np.array([self.scores[p] for p in P.tolist()])
+
+    def __call__(self, P):
+        """
+        Objective at a single pressure, for brent_minimise
+        """
+        return float(self.evaluate(P)[0])
+
+
+def pressure_bounds(problem, Pmin, Pmax, minCondenserTemperature=None, maxReboilerTemperature=None, tol=1e-6, maxiter=20):
+    """
+    Narrows [Pmin, Pmax] to the pressures meeting the temperature limits
+
+    The top and bottom compositions only depend on P through the non-key
+    distribution, so the dew and bubble pressures at the limits are found by
+    substitution, designing at the latest bound each time
+    """
+    lower, upper = Pmin, Pmax
+
+    if minCondenserTemperature is not None:
+        P = lower
+        for _ in range(maxiter):
+            results = problem.bound_design(P)
+            Pnew = dew_pressure(problem.components, results["topMoleFraction"][0], minCondenserTemperature)
+            if abs(Pnew - P) <= tol*P:
+                break
+            P = Pnew
+        lower = max(lower, Pnew)
+
+    if maxReboilerTemperature is not None:
+        P = upper
+        for _ in range(maxiter):
+            results = problem.bound_design(P)
+            Pnew = bubble_pressure(problem.components, results["bottomMoleFraction"][0], maxReboilerTemperature)
+            if abs(Pnew - P) <= tol*P:
+                break
+            P = Pnew
+        upper = min(upper, Pnew)
+
+    return lower, upper
+
+
+def optimise_pressure(column, Rf, efficiency=1, Pmin=100, Pmax=3000, objective="NR", minCondenserTemperature=None, maxReboilerTemperature=None, distributeNonKeys=False, gridPoints=16, tol=1e-5):
+    """
+    Finds the column pressure (kPa) with the lowest objective for a
+    column.Distillation
+
+    objective is "NR", a design result or a sizing result, see
+    PressureProblem. minCondenserTemperature, e.g. 318 K for cooling water
+    with a 10 K approach, and maxReboilerTemperature limit the top and bottom
+    temperatures
+
+    Returns a dictionary with the optimal P and score, the
+    results.ColumnResult and sizing results there, the feasible pressure
+    range, the grid that was searched and the number of designed pressures.
+    Raises ValueError if no pressure in [Pmin, Pmax] meets the limits
+    """
+    problem = PressureProblem(column, Rf, efficiency, objective, distributeNonKeys)
+    lower, upper = pressure_bounds(problem, Pmin, Pmax, minCondenserTemperature, maxReboilerTemperature)
+    if not lower < upper:
+        raise ValueError("No pressure between %.1f and %.1f kPa meets the temperature limits" % (Pmin, Pmax))
+
+    grid = np.geomspace(lower, upper, gridPoints)
+    scores = problem.evaluate(grid)
+    k = int(np.argmin(scores))
+    if not np.isfinite(scores[k]):
+        raise ValueError("No design converged between %.1f and %.1f kPa" % (lower, upper))
+
+    P, score = brent_minimise(problem, grid[max(k - 1, 0)], grid[min(k + 1, gridPoints - 1)], tol)
+    if scores[k] < score:
+        P, score = grid[k], scores[k]
+
+    results, sizes = problem.design(P, full=True)
+
+    return {
+        "P": float(P),
+        "score": float(score),
+        "result": ColumnResult.from_batch(column.components, column.LiK, column.HeK, column.q, results),
+        "sizes": {key: float(value[0]) for key, value in sizes.items()},
+        "bounds": (float(lower), float(upper)),
+        "grid": grid,
+        "gridScores": scores,
+        "evaluations": len(problem.scores)
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from .column import Distillation
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    Debutanizer = Distillation(components, flowrates, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999)
+
+    for objective in ("NR", "reboilerDuty"):
+        start = time.perf_counter()
+        best = optimise_pressure(Debutanizer, 1.2, 0.72, Pmin=100, Pmax=3000, objective=objective, minCondenserTemperature=318)
+        elapsed = time.perf_counter() - start
+
+        print("\nMinimum %s in %.1f ms (%i pressures designed)" % (objective, elapsed*1000, best["evaluations"]))
+        print("Feasible pressures: \t%.0f - %.0f kPa" % best["bounds"])
+        print("Pressure: \t\t%.1f kPa" % best["P"])
+        print("Top temperature: \t%.2f K" % best["result"].topTemperature)
+        print("Bottom temperature: \t%.2f K" % best["result"].bottomTemperature)
+        print("N x R: \t\t\t%.1f" % (best["result"].idealPlates*best["result"].R))
+        print("Reboiler duty: \t\t%.0f kW" % best["sizes"]["reboilerDuty"])
@@ -0,0 +1,214 @@
+"""
+Economic reflux ratio of short-cut column designs
+
+More reflux needs fewer trays but a wider column and a larger reboiler, so
+the total annual cost has a minimum in the reflux factor Rf = R/Rmin. For a
+batch of columns:
+
+1. batch.batch_distillation runs once, as Nmin and Rmin do not depend on Rf
+2. Gilliland, the actual trays and sizing.batch_sizing are evaluated for
+   every column on a dense Rf grid in one vectorised call
+3. a golden-section search, run for every column at once, refines Rf
+   between the neighbours of the cheapest grid point
+
+The search uses the unrounded tray count so the cost is smooth in Rf, the
+design returned at the optimum rounds the trays up as batch_distillation
+does
+
+Total annual cost = (vessel + trays)/payback + reboiler steam, with the
+capital cost correlations (US$, D and H in m) of Luyben, Principles and
+Case Studies of Simultaneous Design:
+
+- vessel: 17640*D^1.066*H^0.802
+- trays:  229*D^1.55*H
+"""
+import math
+
+import numpy as np
+
+from .batch import batch_distillation, batch_gilliland, batch_feed_stage, batch_actual_trays, key_index, case_array
+from .sizing import batch_sizing
+
+GOLDEN = 0.5*(math.sqrt(5) - 1)
+
+# steamPrice in US$/GJ, hours of operation per year, payback in years
+default_costs = {
+    "vesselCost": 17640,
+    "vesselDiameterExponent": 1.066,
+    "vesselHeightExponent": 0.802,
+    "trayCost": 229,
+    "trayDiameterExponent": 1.55,
+    "steamPrice": 7.78,
+    "hours": 8000,
+    "payback": 3
+}
+
+# Results of batch_distillation that sizing.batch_sizing and Kirkbride read
+design_keys = ("feedMoleComposition", "topComposition", "bottomComposition", "massTopComposition", "massBottomComposition", "topMoleFraction", "bottomMoleFraction", "topTemperature", "bottomTemperature")
+
+
+def annual_cost(sizes, costs):
+    """
+    Capital, energy and total annual cost (US$/year) of sized designs
+    """
+    D = sizes["diameter"]
+    H = sizes["height"]
+    capital = costs["vesselCost"]*D**costs["vesselDiameterExponent"]*H**costs["vesselHeightExponent"] + costs["trayCost"]*D**costs["trayDiameterExponent"]*H
+    energy = sizes["reboilerDuty"]*3600*costs["hours"]/1e6*costs["steamPrice"]
+
+    return capital, energy, capital/costs["payback"] + energy
+
+
+class RefluxProblem():
+    """
+    Costs of a batch of base designs at any reflux factor
+    """
+
+    def __init__(self, components, base, P, q, T, LiK, HeK, costs, sizing):
+        """
+        Defining the base designs from batch_distillation and the fixed
+        sizing inputs, every argument shaped (cases,)
+        """
+        self.components = components
+        self.base = base
+        self.P = P
+        self.q = q
+        self.T = T
+        self.LiK = LiK
+        self.HeK = HeK
+        self.costs = costs
+        self.sizing = sizing
+
+    def design(self, rows, Rf, rounded=False):
+        """
+        Gilliland, trays and sizing of the base designs in rows at Rf
+        """
+        base = self.base
+        R, N = batch_gilliland(base["Nmin"][rows], base["Rmin"][rows], Rf, rounded)
+        design = {key: base[key][rows] for key in design_keys}
+        design["R"] = R
+        design["idealPlates"] = N
+        if rounded:
+            design["Nr"], design["Ns"] = batch_feed_stage(N, design["feedMoleComposition"], design["topMoleFraction"], design["bottomMoleFraction"], design["topComposition"], design["bottomComposition"], self.LiK[rows], self.HeK[rows])
+            design["actualTrays"] = batch_actual_trays(N, base["trayEfficiency"][rows])[1]
+        else:
+            design["actualTrays"] = N/base["trayEfficiency"][rows]
+
+        sizes = batch_sizing(self.components, design, self.P[rows], self.q[rows], self.T[rows], **self.sizing)
+        return design, sizes
+
+    def cost(self, rows, Rf):
+        """
+        Total annual cost, infinite where the design or sizing failed
+        """
+        with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            total = annual_cost(self.design(rows, Rf)[1], self.costs)[2]
+        return np.where(np.isfinite(total), total, np.inf)
+
+
+def golden_section(f, a, b, tol):
+    """
+    Golden-section minimisation of one scalar function per case on
+    [a, b], every case stepping together. f(rows, x) evaluates the cases in
+    rows, tol is the final bracket width relative to x
+    """
+    cases = np.arange(a.size)
+    c = b - GOLDEN*(b - a)
+    d = a + GOLDEN*(b - a)
+    fcd = f(np.concatenate([cases, cases]), np.concatenate([c, d]))
+    fc, fd = fcd[:a.size], fcd[a.size:]
+
+    width = np.max((b - a)/np.fmax(np.abs(a), 1e-12))
+    for _ in range(max(int(math.ceil(math.log(tol/width)/math.log(GOLDEN))), 0)):
+        left = fc < fd
+        b = np.where(left, d, b)
+        a = np.where(left, a, c)
+        c, d = np.where(left, b - GOLDEN*(b - a), d), np.where(left, c, a + GOLDEN*(b - a))
+        fNew = f(cases, np.where(left, c, d))
+        fc, fd = np.where(left, fNew, fd), np.where(left, fc, fNew)
+
+    return np.where(fc < fd, c, d)
+
+
+def optimise_reflux(components, flowrate, LiK, HeK, T, q, topRecovery, bottomRecovery, P, efficiency=1, costs=None, RfMin=1.02, RfMax=3.0, gridPoints=200, tol=1e-4, partialReboiler=True, columnTemperatures=False, distributeNonKeys=False, **sizing):
+    """
+    Cheapest reflux factor of every column in a batch
+
+    Inputs are those of batch.batch_distillation, without Rf, and the column
+    pressure P (kPa) for sizing. With columnTemperatures the design uses the
+    dew and bubble points at P as well. costs overrides entries of
+    default_costs, further keyword arguments go to sizing.batch_sizing
+
+    Returns a dictionary of arrays shaped (cases,): the optimal Rf and R, the
+    rounded design (idealPlates, Nr, Ns, idealFeedTray, actualTrays), its
+    sizes and costs, and "grid" with the (cases x gridPoints) "gridCost".
+    Columns without a finite cost anywhere on the grid give nan
+    """
+    costs = dict(default_costs, **(costs or {}))
+    flowrate = np.atleast_2d(np.asarray(flowrate, dtype=float))
+    cases = flowrate.shape[0]
+    P = case_array(P, cases)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        base = batch_distillation(components, flowrate, LiK, HeK, T, q, topRecovery, bottomRecovery, 1, efficiency, partialReboiler, P=P if columnTemperatures else None, distributeNonKeys=distributeNonKeys)
+    problem = RefluxProblem(components, base, P, case_array(q, cases), case_array(T, cases), key_index(components, LiK, cases), key_index(components, HeK, cases), costs, sizing)
+
+    # Every column at every grid point, rows ordered case by case
+    grid = np.linspace(RfMin, RfMax, gridPoints)
+    gridCost = problem.cost(np.repeat(np.arange(cases), gridPoints), np.tile(grid, cases)).reshape(cases, gridPoints)
+
+    k = np.argmin(gridCost, axis=1)
+    Rf = golden_section(problem.cost, grid[np.maximum(k - 1, 0)], grid[np.minimum(k + 1, gridPoints - 1)], tol)
+    Rf = np.where(np.isfinite(gridCost[np.arange(cases), k]), Rf, np.nan)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        design, sizes = problem.design(np.arange(cases), Rf, rounded=True)
+        capital, energy, total = annual_cost(sizes, costs)
+
+    return {
+        "Rf": Rf,
+        "R": design["R"],
+        "Rmin": base["Rmin"],
+        "Nmin": base["Nmin"],
+        "idealPlates": design["idealPlates"],
+        "Nr": design["Nr"],
+        "Ns": design["Ns"],
+        "idealFeedTray": design["Ns"],
+        "actualTrays": design["actualTrays"],
+        "diameter": sizes["diameter"],
+        "height": sizes["height"],
+        "reboilerDuty": sizes["reboilerDuty"],
+        "condenserDuty": sizes["condenserDuty"],
+        "capitalCost": capital,
+        "energyCost": energy,
+        "totalCost": total,
+        "grid": grid,
+        "gridCost": gridCost
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    # Debutanizer feed with +/- 20 % noise on every flowrate
+    cases = 1000
+    rng = np.random.default_rng(0)
+    feeds = np.array(flowrates)*rng.uniform(0.8, 1.2, (cases, len(components)))
+    feeds[0] = flowrates
+
+    start = time.perf_counter()
+    best = optimise_reflux(components, feeds, "ethyl-acetylene", "pentane", 273+140, 0.5, 0.95, 0.9999, 1810, 0.72)
+    elapsed = time.perf_counter() - start
+
+    print("\nEconomic reflux of %i columns in %.3f s" % (cases, elapsed))
+    print("Rf: \t\t\t%.3f (%.3f - %.3f)" % (best["Rf"][0], np.nanmin(best["Rf"]), np.nanmax(best["Rf"])))
+    print("R: \t\t\t%.3f" % best["R"][0])
+    print("N: \t\t\t%i" % best["idealPlates"][0])
+    print("Feed tray: \t\t%i" % best["idealFeedTray"][0])
+    print("Actual trays: \t\t%i" % best["actualTrays"][0])
+    print("Diameter: \t\t%.2f m" % best["diameter"][0])
+    print("Reboiler duty: \t\t%.0f kW" % best["reboilerDuty"][0])
+    print("Total annual cost: \t%.0f US$/year" % best["totalCost"][0])
@@ -0,0 +1,51 @@
+"""
+Reporting layer for results.ColumnResult
+
+Formats a finished design the same way the printing methods of
+column.Distillation do. Nothing here is needed to run a design
+
+By default the report goes to stdout, any file-like object can be passed
+"""
+import math
+import sys
+
+
+def print_column_result(result, file=None):
+    """
+    Prints the flowrates, volatilities and stage numbers of a column design
+    """
+    if file is None:
+        file = sys.stdout
+    write = lambda text: print(text, file=file)
+
+    write("\nLight and heavy key:")
+    write("Light key: %s" % result.LiK.title())
+    write("Heavy key: %s" % result.HeK.title())
+
+    write("\nComponent vapour pressures and relative volatilities")
+    for i, key in enumerate(result.components):
+        note = " (outside T-min/T-max)" if result.outOfRange[i] else ""
+        write("%s: \t%.2f kPa\t%.2f%s" % (key.title(), result.vapourPressures[i], result.rvHeK[i], note))
+
+    for title, flows in (("Distillate", result.massTopComposition), ("Bottom", result.massBottomComposition)):
+        total = flows.sum()
+        write("\n%s flowrate and composition" % title)
+        for key, value in zip(result.components, flows):
+            write("%s: \t%.2f kg/h\t%.2f" % (key.title(), value, value/total))
+        write("Total:\t\t%.2f kg/h\t%.2f" % (total, 1.00))
+
+    if not math.isnan(result.topTemperature):
+        write("\nTop (dew point): \t%.2f K" % result.topTemperature)
+        write("Bottom (bubble point): \t%.2f K" % result.bottomTemperature)
+
+    write("\nMinimum stages: %i" % result.Nmin)
+    write("\nUnderwood equation: Minumum reflux ratio for q = %.2f" % result.q)
+    write("phi: \t%.2f" % result.phi)
+    write("Rmin: \t%.2f" % result.Rmin)
+    write("\nNumber of ideal plates at operating reflux ratio %.2f" % result.R)
+    write("N: %i" % result.idealPlates)
+    write("\nFeed stage location using Kirkbride equation")
+    write("Number of rectifying trays: \t%i" % result.Nr)
+    write("Number of stripping trays: \t%i" % result.Ns)
+    write("Feed tray location: Tray \t%i" % result.idealFeedTray)
+    write("\nActual number of trays: %i" % result.actualTrays)
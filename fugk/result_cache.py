@@ -0,0 +1,317 @@
+"""
+Persistent, content-addressed cache of short-cut column designs
+
+A design is keyed on its normalised specification (components, kg/h
+flowrates, keys, P, T, q, recoveries, Rf, efficiency and the design options)
+together with component_store.data_version(), so a changed property database
+never returns a stale result. Results live in two tiers:
+
+- memory: an LRU of up to maxEntries results.ColumnResult objects keyed on
+  the specification tuple. ColumnResult is frozen and the cache keeps its
+  own read-only copies of the arrays, so the result every hit shares cannot
+  be changed
+- disk (optional): a SQLite table of JSON encoded results keyed on the
+  SHA-256 of the specification, evicting the least recently used rows once
+  they take more than maxBytes. Rows of other data versions are deleted when
+  the cache is opened
+
+A disk hit is promoted to the memory tier. Memory hits refresh the access
+time of their disk row as well, batched into one write at most every
+touchInterval seconds and before any eviction, so rows served from memory
+are not the first evicted from disk. stats() returns the hit and miss
+counters of both tiers
+"""
+import json
+import time
+import sqlite3
+import hashlib
+from dataclasses import fields, replace
+from collections import OrderedDict
+
+import numpy as np
+
+from .batch import batch_distillation
+from .results import ColumnResult
+from .component_store import data_version
+
+# Bumped whenever the design or the encoding changes what a key stands for
+CACHE_VERSION = 1
+
+
+def normalise_spec(components, flowrate, LiK, HeK, P, T, q, topRecovery, bottomRecovery, Rf, efficiency=1, partialReboiler=True, columnTemperatures=False, distributeNonKeys=False, dataVersion=None):
+    """
+    Hashable tuple of a column specification and the property data version,
+    P only counts when columnTemperatures uses it
+
+    Numbers are normalised to Python floats, whose repr is exact, so 1, 1.0
+    and numpy floats give one specification
+    """
+    if efficiency > 1:
+        efficiency = efficiency/100
+    spec = (
+        CACHE_VERSION,
+        dataVersion or data_version(),
+        tuple(components),
+        tuple(map(float, flowrate)),
+        LiK,
+        HeK,
+        float(P) if columnTemperatures else None,
+        float(T),
+        float(q),
+        float(topRecovery),
+        float(bottomRecovery),
+        float(Rf),
+        float(efficiency),
+        bool(partialReboiler),
+        bool(distributeNonKeys)
+    )
+
+    return spec
+
+
+def spec_key(spec):
+    """
+    Hex SHA-256 of a normalised specification, the key of the disk tier
+    """
+    return hashlib.sha256(repr(spec).encode()).hexdigest()
+
+
+def freeze(result):
+    """
+    Copy of a result with read-only copies of its arrays, as it is shared by
+    every hit and the caller keeps the original
+    """
+    arrays = {}
+    for field in fields(result):
+        value = getattr(result, field.name)
+        if isinstance(value, np.ndarray):
+            arrays[field.name] = value.copy()
+            arrays[field.name].flags.writeable = False
+    return replace(result, **arrays)
+
+
+def encode_result(result):
+    """
+    JSON bytes of a results.ColumnResult
+    """
+    data = {}
+    for field in fields(result):
+        value = getattr(result, field.name)
+        if isinstance(value, np.ndarray):
+            value = {"dtype": value.dtype.str, "values": value.tolist()}
+        elif isinstance(value, tuple):
+            value = list(value)
+        data[field.name] = value
+    return json.dumps(data).encode()
+
+
+def decode_result(blob):
+    """
+    results.ColumnResult with read-only arrays from the bytes of encode_result
+    """
+    data = json.loads(blob)
+    for name, value in data.items():
+        if isinstance(value, dict):
+            data[name] = np.array(value["values"], dtype=value["dtype"])
+            data[name].flags.writeable = False
+    data["components"] = tuple(data["components"])
+    return ColumnResult(**data)
+
+
+class ResultCache():
+    """
+    Two-tier cache of column designs
+
+    path is the SQLite file of the disk tier, None keeps the memory tier
+    only. maxEntries bounds the memory tier and maxBytes the encoded results
+    on disk. touchInterval (s) throttles the access time writes of memory
+    hits
+    """
+
+    def __init__(self, path=None, maxEntries=1024, maxBytes=64*2**20, touchInterval=1.0):
+        """
+        Defining the tiers and counters, opening the database and purging the
+        rows of other data versions
+        """
+        self.maxEntries = maxEntries
+        self.maxBytes = maxBytes
+        self.touchInterval = touchInterval
+        self.touched = {}
+        self.lastTouch = time.monotonic()
+        self.memory = OrderedDict()
+        self.dataVersion = data_version()
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.connection = None
+        if path is not None:
+            self.connection = sqlite3.connect(path)
+            # Write-ahead logging keeps a commit from waiting on a sync of
+            # the whole database
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, dataVersion TEXT, value BLOB, size INTEGER, accessed REAL)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            with self.connection:
+                self.evictions += self.connection.execute("DELETE FROM results WHERE dataVersion != ?", (self.dataVersion,)).rowcount
+
+    def get(self, spec):
+        """
+        Cached result of a normalised specification, None on a miss
+        """
+        result = self.memory.get(spec)
+        if result is not None:
+            self.memory.move_to_end(spec)
+            self.hits += 1
+            if self.connection is not None:
+                # Memory hits keep their disk rows recent too, so the disk
+                # tier does not evict the entries used most
+                self.touched[spec] = time.time()
+                if time.monotonic() - self.lastTouch > self.touchInterval:
+                    self.write_access_times()
+            return result
+
+        if self.connection is not None:
+            key = spec_key(spec)
+            row = self.connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                with self.connection:
+                    self.connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), key))
+                result = decode_result(row[0])
+                self.remember(spec, result)
+                self.diskHits += 1
+                return result
+
+        self.misses += 1
+        return None
+
+    def write_access_times(self):
+        """
+        Writes the access times of the memory hits since the last call to
+        their disk rows, in one transaction
+        """
+        if self.touched and self.connection is not None:
+            with self.connection:
+                self.connection.executemany("UPDATE results SET accessed = ? WHERE key = ?", [(accessed, spec_key(spec)) for spec, accessed in self.touched.items()])
+        self.touched.clear()
+        self.lastTouch = time.monotonic()
+
+    def remember(self, spec, result):
+        """
+        Adds a result to the memory tier, dropping the least recently used
+        """
+        self.memory[spec] = result
+        self.memory.move_to_end(spec)
+        while len(self.memory) > self.maxEntries:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+    def put(self, spec, result):
+        """
+        Stores the result of a normalised specification in both tiers
+        """
+        self.remember(spec, freeze(result))
+        if self.connection is None:
+            return
+
+        key = spec_key(spec)
+        blob = encode_result(result)
+        self.write_access_times()
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", (key, self.dataVersion, blob, len(blob), time.time()))
+            size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            if size > self.maxBytes:
+                # Oldest rows first, until the rest fit
+                rows = self.connection.execute("SELECT key, size FROM results ORDER BY accessed").fetchall()
+                stale = []
+                for oldKey, oldSize in rows:
+                    if size <= self.maxBytes:
+                        break
+                    stale.append((oldKey,))
+                    size -= oldSize
+                self.connection.executemany("DELETE FROM results WHERE key = ?", stale)
+                self.evictions += len(stale)
+
+    def design(self, components, flowrate, LiK, HeK, P, T, q, topRecovery, bottomRecovery, Rf, efficiency=1, partialReboiler=True, columnTemperatures=False, distributeNonKeys=False):
+        """
+        results.ColumnResult of a specification, designed on a miss
+
+        Takes the arguments of column.Distillation and Distillation.design,
+        with the kg/h flowrates as a list ordered like components
+        """
+        spec = normalise_spec(components, flowrate, LiK, HeK, P, T, q, topRecovery, bottomRecovery, Rf, efficiency, partialReboiler, columnTemperatures, distributeNonKeys, self.dataVersion)
+        result = self.get(spec)
+        if result is None:
+            results = batch_distillation(components, [flowrate], LiK, HeK, T, q, topRecovery, bottomRecovery, Rf, efficiency, partialReboiler, P=P if columnTemperatures else None, distributeNonKeys=distributeNonKeys)
+            result = ColumnResult.from_batch(components, LiK, HeK, q, results)
+            self.put(spec, result)
+        return result
+
+    def design_column(self, column, Rf, efficiency=1, partialReboiler=True, columnTemperatures=False, distributeNonKeys=False):
+        """
+        Cached column.Distillation.design
+        """
+        flowrate = [column.massFeedComposition[key] for key in column.components]
+        return self.design(column.components, flowrate, column.LiK, column.HeK, column.columnPressure, column.columnTemperature, column.q, column.topRecovery, column.bottomRecovery, Rf, efficiency, partialReboiler, columnTemperatures, distributeNonKeys)
+
+    def stats(self):
+        """
+        Returns the entries, hit and miss counters and the hit rate
+        """
+        calls = self.hits + self.diskHits + self.misses
+        entries = diskBytes = 0
+        if self.connection is not None:
+            entries, diskBytes = self.connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+
+        return {
+            "memoryEntries": len(self.memory),
+            "diskEntries": entries,
+            "diskBytes": diskBytes,
+            "hits": self.hits,
+            "diskHits": self.diskHits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRate": (self.hits + self.diskHits)/calls if calls else 0.0
+        }
+
+    def close(self):
+        """
+        Closes the database of the disk tier
+        """
+        if self.connection is not None:
+            self.write_access_times()
+            self.connection.close()
+            self.connection = None
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+    spec = (components, flowrates, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999, 1.2, 0.72)
+    path = os.path.join(tempfile.mkdtemp(), "designs.sqlite")
+
+    cache = ResultCache(path)
+    for label in ("Miss", "Memory hit"):
+        start = time.perf_counter()
+        result = cache.design(*spec)
+        print("%s: \t%.1f us" % (label, (time.perf_counter() - start)*1e6))
+    cache.close()
+
+    # A new process only finds the result on disk
+    cache = ResultCache(path)
+    start = time.perf_counter()
+    result = cache.design(*spec)
+    print("Disk hit: \t%.1f us" % ((time.perf_counter() - start)*1e6))
+
+    repeats = 10000
+    start = time.perf_counter()
+    for _ in range(repeats):
+        cache.design(*spec)
+    print("Memory hit: \t%.1f us (mean of %i)" % ((time.perf_counter() - start)/repeats*1e6, repeats))
+    print("N: %i, Rmin: %.3f" % (result.idealPlates, result.Rmin))
+    print(cache.stats())
@@ -0,0 +1,83 @@
+"""
+Result object returned by the non-printing column.Distillation.design
+
+Compositions and other per-component values are NumPy arrays ordered like
+the components tuple. Printing is left to report.py
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(slots=True, frozen=True)
+class ColumnResult():
+    """
+    Results of a multicomponent FUG(K) short-cut design, frozen so a result
+    shared between callers (e.g. by result_cache) cannot be changed
+    """
+    components: tuple
+    LiK: str
+    HeK: str
+    q: float
+    feedComposition: np.ndarray
+    feedMoleComposition: np.ndarray
+    vapourPressures: np.ndarray
+    outOfRange: np.ndarray
+    rvHeK: np.ndarray
+    topComposition: np.ndarray
+    bottomComposition: np.ndarray
+    massTopComposition: np.ndarray
+    massBottomComposition: np.ndarray
+    topMoleFraction: np.ndarray
+    bottomMoleFraction: np.ndarray
+    topTemperature: float
+    bottomTemperature: float
+    Nmin: int
+    phi: float
+    Rmin: float
+    R: float
+    idealPlates: int
+    Nr: int
+    Ns: int
+    idealFeedTray: int
+    trayEfficiency: float
+    actualTrays: int
+
+    @classmethod
+    def from_batch(cls, components, LiK, HeK, q, results, case=0):
+        """
+        Builds the result of one case from the dictionary returned by
+        batch.batch_distillation
+        """
+        value = lambda key: results[key][case]
+
+        return cls(
+            components=tuple(components),
+            LiK=LiK,
+            HeK=HeK,
+            q=float(q),
+            feedComposition=value("feedComposition"),
+            feedMoleComposition=value("feedMoleComposition"),
+            vapourPressures=value("vapourPressures"),
+            outOfRange=value("outOfRange"),
+            rvHeK=value("rvHeK"),
+            topComposition=value("topComposition"),
+            bottomComposition=value("bottomComposition"),
+            massTopComposition=value("massTopComposition"),
+            massBottomComposition=value("massBottomComposition"),
+            topMoleFraction=value("topMoleFraction"),
+            bottomMoleFraction=value("bottomMoleFraction"),
+            topTemperature=float(value("topTemperature")),
+            bottomTemperature=float(value("bottomTemperature")),
+            Nmin=int(value("Nmin")),
+            phi=float(value("phi")),
+            Rmin=float(value("Rmin")),
+            R=float(value("R")),
+            idealPlates=int(value("idealPlates")),
+            Nr=int(value("Nr")),
+            Ns=int(value("Ns")),
+            idealFeedTray=int(value("idealFeedTray")),
+            trayEfficiency=float(value("trayEfficiency")),
+            actualTrays=int(value("actualTrays"))
+        )
+
@@ -0,0 +1,249 @@
+"""
+Rigorous equilibrium-stage check of a short-cut design (Wang-Henke)
+
+Stages are numbered from the top, stage 1 being the top tray below a total
+condenser and the last stage the partial reboiler. With the stage
+temperatures fixed, the component balances of every stage form one
+tridiagonal system per component:
+
+L(j-1)*x(j-1) - (L(j) + V(j)*K(j))*x(j) + V(j+1)*K(j+1)*x(j+1) = -F(j)*z
+
+which the Thomas algorithm solves for all components at once. The liquid
+compositions are corrected with Holland's theta method and normalised, and
+each stage temperature takes a Newton step towards its bubble point. The
+temperature updates are Anderson accelerated, which keeps the iteration
+count in the tens even for long, high-purity columns
+
+Flows follow the same constant molar overflow assumption as
+column.Distillation, so no enthalpy balance is needed. Flows are in the
+units of column.Distillation.feedComposition, P is in kPa and T in K
+"""
+import numpy as np
+
+from .component_store import component_ids, ln_vapour_pressure, ln_vapour_pressure_slope
+from .bubble_dew import bubble_point, dew_point
+from .instrumentation import record_solver
+
+
+def thomas(lower, diagonal, upper, rhs):
+    """
+    Solves tridiagonal systems with the Thomas algorithm
+
+    The stage axis comes first: diagonal and rhs are shaped (n, ...), lower
+    and upper (n-1, ...), and the trailing dimensions are solved together,
+    e.g. one system per component
+    """
+    n = diagonal.shape[0]
+    c = np.empty(upper.shape)
+    d = np.empty(rhs.shape)
+    c[0] = upper[0]/diagonal[0]
+    d[0] = rhs[0]/diagonal[0]
+
+    # Forward elimination
+    for j in range(1, n):
+        denominator = diagonal[j] - lower[j - 1]*c[j - 1]
+        if j < n - 1:
+            c[j] = upper[j]/denominator
+        d[j] = (rhs[j] - lower[j - 1]*d[j - 1])/denominator
+
+    # Back substitution
+    for j in range(n - 2, -1, -1):
+        d[j] -= c[j]*d[j + 1]
+
+    return d
+
+
+def stage_flows(stages, feedStage, F, D, R, q):
+    """
+    Liquid and vapour flows leaving each stage under constant molar overflow
+    """
+    j = np.arange(1, stages + 1)
+    L = R*D
+    V = (R + 1)*D
+    Ls = L + q*F
+    Vs = V - (1 - q)*F
+
+    liquid = np.where(j < feedStage, L, Ls)
+    liquid[-1] = F - D
+    vapour = np.where(j <= feedStage, V, Vs)
+
+    return liquid, vapour
+
+
+def theta_correction(x, K, feed, D, B, tol=1e-12, maxiter=50):
+    """
+    Holland's theta method: rescales the stage compositions (stages x
+    components) so the distillate and bottom flows they imply add up to D
+    and B
+
+    The corrected distillate flows are feed/(1 + theta*b/d), with theta
+    found by Newton's method. Without this the bubble-point iteration creeps
+    towards the solution in high-purity columns
+    """
+    d = D*K[0]*x[0]
+    b = B*x[-1]
+    ratio = np.clip(b/np.maximum(d, 1e-300), 1e-150, 1e150)
+
+    theta = 1.0
+    for _ in range(maxiter):
+        denominator = 1 + theta*ratio
+        g = np.sum(feed/denominator) - D
+        step = g/np.sum(feed*ratio/denominator/denominator)
+        theta = max(theta + step, 0.1*theta)
+        if abs(step) < tol*theta:
+            break
+
+    # Corrected over calculated bottom flow, written so that components with
+    # next to nothing in the bottoms cannot divide by zero
+    return x*(feed*theta/(d + theta*b))
+
+
+def anderson_update(points, residuals, T, maxStep):
+    """
+    Anderson-accelerated fixed-point update of the stage temperatures
+
+    points and residuals hold the last depth + 1 images T + r and residuals
+    r of the bubble-point map, newest last. The update is limited to maxStep K
+    per stage
+    """
+    target = points[-1]
+    if len(residuals) > 1:
+        dR = np.diff(np.array(residuals), axis=0).T
+        dG = np.diff(np.array(points), axis=0).T
+        gamma = np.linalg.lstsq(dR, residuals[-1], rcond=1e-10)[0]
+        target = target - dG @ gamma
+
+    return T + np.clip(target - T, -maxStep, maxStep)
+
+
+def solve_column(components, feedComposition, P, stages, feedStage, R, D, q, T0, tol=1e-4, maxiter=200, depth=5, maxStep=5):
+    """
+    Solves the stage temperatures and compositions of one column
+
+    feedComposition holds the component feed flows, D is the total distillate
+    flow, feedStage is counted from the top and T0 is the starting
+    temperature profile (one value per stage). Iterates until no stage
+    temperature moves by more than tol K
+
+    Returns a dictionary with the stage temperatures, liquid and vapour mole
+    fractions (stages x components), the flows, the distillate and bottom
+    component flows, the number of iterations and whether it converged
+    """
+    feedComposition = np.asarray(feedComposition, dtype=float)
+    F = feedComposition.sum()
+    present = feedComposition > 0
+    ids = component_ids(components)[present]
+
+    liquid, vapour = stage_flows(stages, feedStage, F, D, R, q)
+    lnPressure = np.log(P*1000)
+    feed = np.zeros((stages, ids.size))
+    feed[feedStage - 1] = -feedComposition[present]
+    T = np.asarray(T0, dtype=float).copy()
+    converged = False
+    points = []
+    residuals = []
+    best = np.inf
+
+    for iteration in range(1, maxiter + 1):
+        K = np.exp(ln_vapour_pressure(ids, T).T - lnPressure)
+        VK = vapour[:, None]*K
+        diagonal = -(liquid[:, None] + VK)
+
+        # The condenser returns liquid at the vapour composition of stage 1,
+        # so only the distillate leaves the top stage as vapour
+        diagonal[0] = -(liquid[0] + D*K[0])
+        x = np.clip(thomas(liquid[:-1, None], diagonal, VK[1:], feed), 0, None)
+        x = theta_correction(x, K, feedComposition[present], D, F - D)
+        x /= x.sum(axis=1, keepdims=True)
+
+        # One Newton step of every stage towards its bubble point
+        Kx = K*x
+        total = Kx.sum(axis=1)
+        slope = np.sum(Kx*ln_vapour_pressure_slope(ids, T).T, axis=1)/total
+        residual = -np.clip(np.log(total)/slope, -4*maxStep, 4*maxStep)
+        size = np.max(np.abs(residual))
+        if size < tol:
+            T = T + residual
+            converged = True
+            break
+
+        # The history is dropped when the residual grows, so a poor
+        # extrapolation cannot keep steering the profile
+        if size > 2*best:
+            points.clear()
+            residuals.clear()
+        best = min(best, size)
+        points.append(T + residual)
+        residuals.append(residual)
+        del points[:-depth - 1], residuals[:-depth - 1]
+        T = anderson_update(points, residuals, T, maxStep)
+
+    record_solver("solve_column", iteration, iteration, not converged)
+
+    K = np.exp(ln_vapour_pressure(ids, T).T - lnPressure)
+    y = K*x
+    y /= y.sum(axis=1, keepdims=True)
+
+    liquidFraction = np.zeros((stages, len(components)))
+    vapourFraction = np.zeros((stages, len(components)))
+    liquidFraction[:, present] = x
+    vapourFraction[:, present] = y
+
+    return {
+        "T": T,
+        "x": liquidFraction,
+        "y": vapourFraction,
+        "L": liquid,
+        "V": vapour,
+        "topComposition": D*vapourFraction[0],
+        "bottomComposition": (F - D)*liquidFraction[-1],
+        "iterations": iteration,
+        "converged": converged
+    }
+
+
+def check_design(result, P, feedStage=None, tol=1e-4, maxiter=200):
+    """
+    Rigorously solves the column of a short-cut design
+
+    result is a results.ColumnResult from column.Distillation.design. Its
+    idealPlates sets the number of stages (including the reboiler) and
+    idealFeedTray, counted from the bottom like Kirkbride's Ns, the feed
+    stage, unless feedStage (counted from the top) is given. The starting
+    temperatures run linearly from the dew point of topMoleFraction to the
+    bubble point of bottomMoleFraction
+    """
+    stages = int(result.idealPlates)
+    if feedStage is None:
+        feedStage = stages - int(result.idealFeedTray) + 1
+    D = result.topComposition.sum()
+
+    topT = dew_point(result.components, result.topMoleFraction, P)[0]
+    bottomT = bubble_point(result.components, result.bottomMoleFraction, P)[0]
+    T0 = np.linspace(topT, bottomT, stages)
+
+    return solve_column(result.components, result.feedComposition, P, stages, feedStage, result.R, D, result.q, T0, tol, maxiter)
+
+
+if __name__ == "__main__":
+    import time
+    from .column import Distillation
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+    P = 1810
+
+    Debutanizer = Distillation(components, flowrates, "ethyl-acetylene", "pentane", P, 273+140, 0.5, 0.95, 0.9999)
+    shortcut = Debutanizer.design(1.2, 0.72, columnTemperatures=True, distributeNonKeys=True)
+
+    start = time.perf_counter()
+    rigorous = check_design(shortcut, P)
+    elapsed = time.perf_counter() - start
+
+    print("\nRigorous check of %i stages in %.1f ms (%i iterations)" % (shortcut.idealPlates, elapsed*1000, rigorous["iterations"]))
+    print("Top temperature: \t%.2f K" % rigorous["T"][0])
+    print("Bottom temperature: \t%.2f K" % rigorous["T"][-1])
+    print("\nComponent\t\tShort-cut top\tRigorous top")
+    for i, name in enumerate(components):
+        if shortcut.feedComposition[i] > 0:
+            print("%s: \t%.2f\t\t%.2f" % (name.title(), shortcut.topComposition[i], rigorous["topComposition"][i]))
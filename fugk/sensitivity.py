@@ -0,0 +1,192 @@
+"""
+Analytic sensitivities of the short-cut design
+
+Forward derivatives of the FUG(K) chain of batch.batch_distillation, for
+the sharp split with relative volatilities at the feed temperature, with
+respect to the top and bottom recovery, q, T, the reflux factor Rf and every
+component feed flowrate (kg/h). All of them come from one pass over the
+batch:
+
+- Fenske:    Nmin = ln(dL*bH/(dH*bL))/ln(aL)
+- Underwood: phi from G = sum(z*a/(a - phi)) - (1 - q) = 0 by implicit
+             differentiation, dphi = -dG/(dG/dphi), then
+             Rmin + 1 = sum(a*xD/(a - phi))
+- Gilliland: N = (Nmin + Y)/(1 - Y) with Y(X), X = (R - Rmin)/(R + 1)
+- Kirkbride: Ns = N/(ratio + 1), Nr = N - Ns
+
+The rounding of Nmin, N, Nr and Ns in the design makes them piecewise
+constant, so the values and derivatives returned here are those of the
+unrounded expressions. Which components go to the top does not change for
+small steps and adds nothing to the derivatives
+
+Gradients are arrays shaped (cases x parameters) in the order of
+parameter_names
+"""
+import numpy as np
+
+from .batch import key_index, case_array, batch_vapour_pressure, batch_relative_volatility, batch_split
+from .underwood import minimum_reflux
+from .component_store import store, component_ids, ln_vapour_pressure_slope
+
+# Scalar parameters, followed by one feed flowrate per component
+scalar_parameters = ("topRecovery", "bottomRecovery", "q", "T", "Rf")
+
+
+def parameter_names(components):
+    """
+    Names of the gradient columns, the component names stand for their feed
+    flowrates
+    """
+    return scalar_parameters + tuple(components)
+
+
+def batch_sensitivities(components, flowrate, LiK, HeK, T, q, topRecovery, bottomRecovery, Rf, partialReboiler=True):
+    """
+    Unrounded design values and their gradients for a batch of columns
+
+    Inputs are those of batch.batch_distillation. Returns a dictionary with
+    Nmin, phi, Rmin, R, N, Nr and Ns shaped (cases,), "gradients" holding
+    one (cases x parameters) array per value and "parameters" naming the
+    columns
+    """
+    flowrate = np.atleast_2d(np.asarray(flowrate, dtype=float))
+    cases, n = flowrate.shape
+    rows = np.arange(cases)
+    ids = component_ids(components)
+
+    LiK = key_index(components, LiK, cases)
+    HeK = key_index(components, HeK, cases)
+    T = case_array(T, cases)
+    q = case_array(q, cases)
+    rT = case_array(topRecovery, cases)
+    rB = case_array(bottomRecovery, cases)
+    Rf = case_array(Rf, cases)
+    iRT, iRB, iQ, iT, iRf = range(5)
+    flows = slice(5, 5 + n)
+
+    molarMass = store["mr"][ids]
+    F = flowrate*molarMass
+    Ftot = F.sum(axis=1)
+    z = F/Ftot[:, None]
+    present = F > 0
+
+    vapourPressures, _ = batch_vapour_pressure(components, T)
+    alpha = batch_relative_volatility(vapourPressures, HeK)
+    slope = ln_vapour_pressure_slope(ids, T).T
+    g = slope - slope[rows, HeK][:, None]
+
+    # Fraction of every component going to the top, d = F*tau
+    tau, _ = batch_split(np.ones((cases, n)), alpha, LiK, HeK, rT, rB)
+    d = F*tau
+    b = F - d
+    D = d.sum(axis=1)
+    B = b.sum(axis=1)
+    xD = d/D[:, None]
+    FL = F[rows, LiK]
+    FH = F[rows, HeK]
+
+    # dD/dp, also the columns of sum(h*dd/dp) below
+    dD = np.zeros((cases, 5 + n))
+    dD[:, iRT] = FL
+    dD[:, iRB] = -FH
+    dD[:, flows] = molarMass*tau
+
+    # Fenske
+    lnAlphaL = np.log(alpha[rows, LiK])
+    A = np.log(d[rows, LiK]*b[rows, HeK]/(d[rows, HeK]*b[rows, LiK]))
+    Nmin = A/lnAlphaL
+    if partialReboiler == False:
+        Nmin = Nmin - 1
+    dNmin = np.zeros((cases, 5 + n))
+    dNmin[:, iRT] = 1/(rT*(1 - rT)*lnAlphaL)
+    dNmin[:, iRB] = 1/(rB*(1 - rB)*lnAlphaL)
+    dNmin[:, iT] = -A/lnAlphaL**2*g[rows, LiK]
+
+    # Underwood, the first equation differentiated implicitly
+    phi, Rmin = minimum_reflux(z, xD, alpha, q, HeK)
+    diff = alpha - phi[:, None]
+    h = alpha/diff
+    dG = np.zeros((cases, 5 + n))
+    dG[:, iQ] = 1
+    dG[:, iT] = -np.sum(np.where(present, z*phi[:, None]*alpha*g/diff**2, 0.0), axis=1)
+    dG[:, flows] = molarMass/Ftot[:, None]*(h - (1 - q)[:, None])
+    dGdphi = np.sum(np.where(present, z*alpha/diff**2, 0.0), axis=1)
+    dphi = -dG/dGdphi[:, None]
+
+    # Second equation, through phi, the volatilities and the distillate
+    S = Rmin + 1
+    hdd = np.zeros((cases, 5 + n))
+    hdd[:, iRT] = h[rows, LiK]*FL
+    hdd[:, iRB] = -h[rows, HeK]*FH
+    hdd[:, flows] = h*molarMass*tau
+    dRmin = np.sum(np.where(present, alpha*xD/diff**2, 0.0), axis=1)[:, None]*dphi
+    dRmin[:, iT] -= np.sum(np.where(present, xD*phi[:, None]*alpha*g/diff**2, 0.0), axis=1)
+    dRmin += (hdd - S[:, None]*dD)/D[:, None]
+
+    # Gilliland
+    R = Rf*Rmin
+    dR = Rf[:, None]*dRmin
+    dR[:, iRf] += Rmin
+    X = (R - Rmin)/(R + 1)
+    dX = ((Rf - 1)/(R + 1)**2)[:, None]*dRmin
+    dX[:, iRf] += Rmin*(Rmin + 1)/(R + 1)**2
+
+    Ya = (1 + 54.4*X)/(11 + 117.2*X)
+    Yb = (X - 1)/np.sqrt(X)
+    E = np.exp(Ya*Yb)
+    Y = 1 - E
+    dYa = 481.2/(11 + 117.2*X)**2
+    dYb = 0.5/np.sqrt(X) + 0.5/X**1.5
+    dY = (-E*(dYa*Yb + Ya*dYb))[:, None]*dX
+
+    N = (Nmin + Y)/(1 - Y)
+    dN = dNmin/(1 - Y)[:, None] + ((1 + Nmin)/(1 - Y)**2)[:, None]*dY
+
+    # Kirkbride, ln(inside) = ln(FL/FH) + 2 ln((1 - rT)/(1 - rB)) + ln(D/B)
+    lnInside = np.log(FL/FH) + 2*np.log((1 - rT)/(1 - rB)) + np.log(D/B)
+    dLnInside = dD*(1/D + 1/B)[:, None]
+    dLnInside[:, flows] -= molarMass/B[:, None]
+    dLnInside[:, iRT] -= 2/(1 - rT)
+    dLnInside[:, iRB] += 2/(1 - rB)
+    dLnInside[rows, 5 + LiK] += molarMass[LiK]/FL
+    dLnInside[rows, 5 + HeK] -= molarMass[HeK]/FH
+
+    ratio = np.exp(0.206*lnInside)
+    Ns = N/(ratio + 1)
+    dNs = dN/(ratio + 1)[:, None] - (N*ratio*0.206/(ratio + 1)**2)[:, None]*dLnInside
+    Nr = N - Ns
+
+    return {
+        "Nmin": Nmin,
+        "phi": phi,
+        "Rmin": Rmin,
+        "R": R,
+        "N": N,
+        "Nr": Nr,
+        "Ns": Ns,
+        "gradients": {
+            "Nmin": dNmin,
+            "phi": dphi,
+            "Rmin": dRmin,
+            "R": dR,
+            "N": dN,
+            "Nr": dN - dNs,
+            "Ns": dNs
+        },
+        "parameters": parameter_names(components)
+    }
+
+
+if __name__ == "__main__":
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    sensitivities = batch_sensitivities(components, [flowrates], "ethyl-acetylene", "pentane", 273+140, 0.5, 0.95, 0.9999, 1.2)
+    names = sensitivities["parameters"]
+
+    print("\nUnrounded design and its sensitivities")
+    for output in ("Nmin", "Rmin", "N", "Ns"):
+        print("\n%s = %.3f" % (output, sensitivities[output][0]))
+        for name, value in zip(names, sensitivities["gradients"][output][0]):
+            if value != 0:
+                print("d/d%s: \t%.4g" % (name, value))
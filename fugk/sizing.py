@@ -0,0 +1,178 @@
+"""
+Vectorised condenser and reboiler duties and column diameter and height
+
+Works on the dictionary returned by batch.batch_distillation, so a whole
+batch or sweep of designs is sized in one call:
+
+- molar flows in kmol/h and mole fractions from the kg/h flowrates and
+  molar masses
+- vapour and liquid traffic from R and q under constant molar overflow
+- latent heats from the DIPPR-106 constants in latent_heat.lh
+- liquid densities from the Rackett constants in liquid_density.rackett
+- condenser duty from the top vapour, reboiler duty from the boil-up
+- diameter from the Souders-Brown flooding velocity at the top and bottom
+- height from the actual trays and the tray spacing
+
+Components without latent heat constants, or above their critical
+temperature, are left out of the mixture latent heat, which is averaged
+over the components that have a value. A liquid with a component above its
+critical temperature has no density (nan), and one with a component
+without Rackett constants raises ValueError
+"""
+import numpy as np
+
+from .batch import case_array
+from .component_store import store, component_ids, latent_heat, liquid_density
+
+# Gas constant (J/kmol/K)
+R_GAS = 8314.46
+
+
+def mixture_latent_heat(ids, fractions, T):
+    """
+    Mole-fraction weighted latent heat (J/kmol) of each case at its own
+    temperature, fractions shaped (cases x components)
+    """
+    lh = latent_heat(ids, T).T
+    known = np.isfinite(lh) & (fractions > 0)
+    weights = np.where(known, fractions, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.sum(weights*np.where(known, lh, 0.0), axis=1)/weights.sum(axis=1)
+
+
+def mixture_densities(ids, fractions, T, P):
+    """
+    Ideal-gas vapour density and ideal-mixing liquid density (kg/m3) of
+    mixtures with the given mole fractions at T (K) and P (kPa), the liquid
+    from the saturated Rackett densities of its components
+    """
+    present = fractions > 0
+    missing = np.any(np.isnan(store["rackett"][ids]), axis=1) & present.any(axis=0)
+    if np.any(missing):
+        raise ValueError("No Rackett liquid density constants for %s" % ", ".join(store["name"][ids][missing]))
+
+    molarMass = store["mr"][ids]
+    meanMolarMass = fractions @ molarMass
+    massFractions = fractions*molarMass/meanMolarMass[:, None]
+
+    vapourDensity = P*1000*meanMolarMass/(R_GAS*T)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        liquidDensity = 1/np.sum(np.where(present, massFractions/liquid_density(ids, T).T, 0.0), axis=1)
+
+    return vapourDensity, liquidDensity, meanMolarMass
+
+
+def flooding_diameter(vapourFlow, meanMolarMass, vapourDensity, liquidDensity, Csb, floodFraction, activeFraction):
+    """
+    Column diameter (m) for a molar vapour flow (kmol/h) at a fraction of
+    the Souders-Brown flooding velocity, uf = Csb*sqrt((rhoL - rhoV)/rhoV)
+    """
+    floodingVelocity = Csb*np.sqrt(np.clip(liquidDensity - vapourDensity, 0, None)/vapourDensity)
+    volumetricFlow = vapourFlow*meanMolarMass/vapourDensity/3600
+    area = volumetricFlow/(floodFraction*floodingVelocity*activeFraction)
+
+    return np.sqrt(4*area/np.pi), floodingVelocity
+
+
+def batch_sizing(components, results, P, q, T=None, traySpacing=0.6, extraHeight=3.0, Csb=0.09, floodFraction=0.8, activeFraction=0.85):
+    """
+    Duties and column dimensions for every case of a batch
+
+    results is the dictionary from batch.batch_distillation, P the column
+    pressure (kPa) and q the feed quality. The top and bottom temperatures
+    are taken from results when they were found (P given to
+    batch_distillation), otherwise both are T
+
+    traySpacing and extraHeight (space for the sump and the top disengaging
+    section) are in m, Csb in m/s
+
+    Returns a dictionary of arrays: flows in kmol/h, latent heats in J/kmol,
+    duties in kW, densities in kg/m3, velocities in m/s and sizes in m
+    """
+    ids = component_ids(components)
+    cases = results["R"].shape[0]
+    molarMass = store["mr"][ids]
+    P = case_array(P, cases)
+    q = case_array(q, cases)
+    R = results["R"]
+
+    topTemperature = results["topTemperature"]
+    bottomTemperature = results["bottomTemperature"]
+    if T is not None:
+        T = case_array(T, cases)
+        topTemperature = np.where(np.isnan(topTemperature), T, topTemperature)
+        bottomTemperature = np.where(np.isnan(bottomTemperature), T, bottomTemperature)
+
+    # Molar flows and mole fractions from the kg/h flowrates
+    topFlow = results["massTopComposition"]/molarMass
+    bottomFlow = results["massBottomComposition"]/molarMass
+    D = topFlow.sum(axis=1)
+    B = bottomFlow.sum(axis=1)
+    F = D + B
+
+    L = R*D
+    V = (R + 1)*D
+    Ls = L + q*F
+    Vs = V - (1 - q)*F
+
+    topFraction = topFlow/D[:, None]
+    bottomFraction = bottomFlow/B[:, None]
+    topLatentHeat = mixture_latent_heat(ids, topFraction, topTemperature)
+    bottomLatentHeat = mixture_latent_heat(ids, bottomFraction, bottomTemperature)
+
+    condenserDuty = V*topLatentHeat/3600/1000
+    reboilerDuty = Vs*bottomLatentHeat/3600/1000
+
+    topVapourDensity, topLiquidDensity, topMolarMass = mixture_densities(ids, topFraction, topTemperature, P)
+    bottomVapourDensity, bottomLiquidDensity, bottomMolarMass = mixture_densities(ids, bottomFraction, bottomTemperature, P)
+
+    topDiameter, topFlooding = flooding_diameter(V, topMolarMass, topVapourDensity, topLiquidDensity, Csb, floodFraction, activeFraction)
+    bottomDiameter, bottomFlooding = flooding_diameter(Vs, bottomMolarMass, bottomVapourDensity, bottomLiquidDensity, Csb, floodFraction, activeFraction)
+
+    return {
+        "D": D,
+        "B": B,
+        "L": L,
+        "V": V,
+        "Ls": Ls,
+        "Vs": Vs,
+        "topLatentHeat": topLatentHeat,
+        "bottomLatentHeat": bottomLatentHeat,
+        "condenserDuty": condenserDuty,
+        "reboilerDuty": reboilerDuty,
+        "topVapourDensity": topVapourDensity,
+        "bottomVapourDensity": bottomVapourDensity,
+        "topLiquidDensity": topLiquidDensity,
+        "bottomLiquidDensity": bottomLiquidDensity,
+        "topFloodingVelocity": topFlooding,
+        "bottomFloodingVelocity": bottomFlooding,
+        "diameter": np.fmax(topDiameter, bottomDiameter),
+        "height": results["actualTrays"]*traySpacing + extraHeight
+    }
+
+
+if __name__ == "__main__":
+    import time
+    from .batch import batch_distillation
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+    P = 1810
+    q = 0.5
+
+    # Debutanizer feed with +/- 20 % noise on every flowrate
+    cases = 10000
+    rng = np.random.default_rng(0)
+    feeds = np.array(flowrates)*rng.uniform(0.8, 1.2, (cases, len(components)))
+
+    start = time.perf_counter()
+    results = batch_distillation(components, feeds, "ethyl-acetylene", "pentane", 273+140, q, 0.95, 0.9999, 1.2, 0.72, P=P)
+    sizes = batch_sizing(components, results, P, q)
+    elapsed = time.perf_counter() - start
+
+    print("\nFUG(K) and sizing for %i cases in %.3f s" % (cases, elapsed))
+    print("Condenser duty: \t%.0f kW" % sizes["condenserDuty"][0])
+    print("Reboiler duty: \t\t%.0f kW" % sizes["reboilerDuty"][0])
+    print("Diameter: \t\t%.2f m" % sizes["diameter"][0])
+    print("Height: \t\t%.1f m" % sizes["height"][0])
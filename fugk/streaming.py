@@ -0,0 +1,273 @@
+"""
+Streaming runner for large files of column specifications
+
+Reads column specifications from CSV or JSONL, designs them in chunks with
+batch.batch_distillation and writes one JSON line of results per
+specification as soon as its chunk is done, so memory use depends on the
+chunk size and not on the size of the file:
+
+fugk-stream specs.csv results.jsonl --chunk-size 20000 --processes 4
+
+Every specification needs LiK, HeK, T, q, topRecovery, bottomRecovery and
+Rf. P (kPa) and efficiency are optional. An id, if given, is copied to the
+result, otherwise the row number (from 0) is used
+
+- CSV: one column per field and one column per component, named as in the
+  component store, holding its flowrate (kg/h), one row per line
+- JSONL: one object per line with the fields and either "components" and
+  "flowrates" lists or "flowrates" as a {component: kg/h} object
+
+Rows that cannot be read or designed give {"id": ..., "error": ...}, values
+that did not converge are written as null. Results keep the input order
+
+Workers are sent the raw text lines of each chunk and do all the parsing,
+so the reading process only splits the file into chunks
+"""
+import sys
+import csv
+import json
+import math
+import time
+import argparse
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import batch_distillation
+from .component_store import component_index
+
+fields = ("LiK", "HeK", "P", "T", "q", "topRecovery", "bottomRecovery", "Rf", "efficiency")
+required = ("LiK", "HeK", "T", "q", "topRecovery", "bottomRecovery", "Rf")
+defaults = {"P": None, "efficiency": 1.0}
+outputs = ("Nmin", "Rmin", "R", "idealPlates", "Nr", "Ns", "actualTrays")
+
+
+def read_specs(file, format="jsonl"):
+    """
+    Returns the CSV header (None for JSONL) and an iterator over the
+    non-empty lines of the file
+    """
+    header = None
+    if format == "csv":
+        header = next(csv.reader([file.readline()]), [])
+        unknown = [name for name in header if name not in fields and name != "id" and name not in component_index]
+        if unknown:
+            raise ValueError("Unknown CSV columns: %s" % ", ".join(unknown))
+
+    return header, (line for line in file if line.strip())
+
+
+def parse_spec(raw):
+    """
+    Converts a raw CSV row or JSONL line into its id, components, flowrates
+    and a dictionary of the fields
+    """
+    if isinstance(raw, str):
+        spec = json.loads(raw)
+        if "flowrates" not in spec:
+            raise KeyError("missing flowrates")
+        flowrates = spec["flowrates"]
+        if isinstance(flowrates, dict):
+            components = list(flowrates.keys())
+            flowrates = list(flowrates.values())
+        elif "components" not in spec:
+            raise ValueError("missing components")
+        else:
+            components = list(spec["components"])
+        flowrates = [value or 0 for value in flowrates]
+    else:
+        spec = raw
+        components = [name for name in raw if name in component_index]
+        flowrates = [raw[name] or 0 for name in components]
+
+    unknown = [name for name in components if name not in component_index]
+    if unknown:
+        raise ValueError("unknown components: %s" % ", ".join(unknown))
+    if len(flowrates) != len(components):
+        raise ValueError("%i flowrates for %i components" % (len(flowrates), len(components)))
+
+    values = {}
+    for name in fields:
+        value = spec.get(name)
+        if value is None or value == "":
+            if name in required:
+                raise KeyError("missing %s" % name)
+            value = defaults[name]
+        elif name in ("LiK", "HeK"):
+            if value not in components:
+                raise ValueError("%s %s is not in the feed components" % (name, value))
+        else:
+            value = float(value)
+        values[name] = value
+
+    return spec.get("id"), components, [float(value) for value in flowrates], values
+
+
+def raw_id(raw):
+    """
+    The id of a raw CSV row or JSONL line that could not be parsed into a
+    specification, None if it has none or is not valid JSON
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            return None
+    return raw.get("id") if isinstance(raw, dict) else None
+
+
+def error_message(error):
+    """
+    Message of an exception for an error record, without the quotes str()
+    puts around a KeyError
+    """
+    if isinstance(error, KeyError) and error.args:
+        return str(error.args[0])
+    return str(error)
+
+
+def finite(values):
+    """
+    Lists of plain floats for JSON, None for nan or infinity, one list per
+    row of a 2D array
+    """
+    if values.ndim > 1:
+        return [finite(row) for row in values]
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+
+def run_chunk(chunk, start, header=None, compositions=False, distributeNonKeys=False):
+    """
+    Designs a chunk of specification lines and returns their JSON lines
+
+    header holds the CSV column names, None for JSONL. Specifications
+    sharing the same components, and either all with or all without P, are
+    designed together in one batch_distillation call
+    """
+    if header is not None:
+        chunk = [dict(zip(header, values)) for values in csv.reader(chunk)]
+
+    records = [None]*len(chunk)
+    groups = {}
+    for k, raw in enumerate(chunk):
+        try:
+            specId, components, flowrates, values = parse_spec(raw)
+        except (KeyError, ValueError, TypeError) as error:
+            specId = raw_id(raw)
+            records[k] = {"id": start + k if specId is None else specId, "error": error_message(error)}
+            continue
+        key = (tuple(components), values["P"] is None)
+        groups.setdefault(key, []).append((k, specId, flowrates, values))
+
+    for (components, noPressure), rows in groups.items():
+        column = lambda name: [values[name] for _, _, _, values in rows]
+        flowrate = np.array([flowrates for _, _, flowrates, _ in rows])
+        try:
+            with np.errstate(all="ignore"):
+                results = batch_distillation(list(components), flowrate, column("LiK"), column("HeK"), column("T"), column("q"), column("topRecovery"), column("bottomRecovery"), column("Rf"), column("efficiency"), P=None if noPressure else column("P"), distributeNonKeys=distributeNonKeys)
+        except (KeyError, ValueError, TypeError, FloatingPointError) as error:
+            for k, specId, _, _ in rows:
+                records[k] = {"id": start + k if specId is None else specId, "error": error_message(error)}
+            continue
+
+        names = outputs if noPressure else outputs + ("topTemperature", "bottomTemperature")
+        table = {name: finite(results[name]) for name in names}
+        outOfRange = results["outOfRange"].any(axis=1).tolist()
+        if compositions:
+            top = finite(results["massTopComposition"])
+            bottom = finite(results["massBottomComposition"])
+
+        for n, (k, specId, _, _) in enumerate(rows):
+            record = {"id": start + k if specId is None else specId}
+            for name in names:
+                record[name] = table[name][n]
+            record["outOfRange"] = outOfRange[n]
+            if compositions:
+                record["top"] = dict(zip(components, top[n]))
+                record["bottom"] = dict(zip(components, bottom[n]))
+            records[k] = record
+
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def chunks(specs, chunkSize):
+    """
+    Yields the index of the first specification and a list of at most
+    chunkSize specifications
+    """
+    iterator = iter(specs)
+    start = 0
+    while True:
+        chunk = list(itertools.islice(iterator, chunkSize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def stream(specs, output, header=None, chunkSize=10000, processes=None, compositions=False, distributeNonKeys=False):
+    """
+    Designs an iterable of specification lines and writes the results to
+    the open text file output, returning the number of specifications
+
+    processes=None runs every chunk in this process, otherwise the chunks
+    go to a pool of that many workers. At most two chunks per worker are in
+    flight, so a large input is never read ahead of the output
+    """
+    count = 0
+    if processes is None:
+        for start, chunk in chunks(specs, chunkSize):
+            output.write(run_chunk(chunk, start, header, compositions, distributeNonKeys))
+            count += len(chunk)
+        return count
+
+    with ProcessPoolExecutor(processes) as pool:
+        pending = deque()
+        for start, chunk in chunks(specs, chunkSize):
+            pending.append(pool.submit(run_chunk, chunk, start, header, compositions, distributeNonKeys))
+            count += len(chunk)
+            if len(pending) >= 2*processes:
+                output.write(pending.popleft().result())
+        while pending:
+            output.write(pending.popleft().result())
+
+    return count
+
+
+def main(arguments=None):
+    """
+    Command-line entry point
+    """
+    parser = argparse.ArgumentParser(description="Designs column specifications from CSV or JSONL and writes the results as JSONL")
+    parser.add_argument("input", help="specification file, - for stdin")
+    parser.add_argument("output", nargs="?", default="-", help="results file, - for stdout (default)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="input format (default from the file extension, jsonl for stdin)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="specifications per chunk (default %(default)s)")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes (default none, run in this process)")
+    parser.add_argument("--compositions", action="store_true", help="add the distillate and bottom flowrates (kg/h) of every component")
+    parser.add_argument("--distribute-non-keys", action="store_true", help="split the non-keys with Fenske instead of a sharp split")
+    args = parser.parse_args(arguments)
+
+    format = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    source = sys.stdin if args.input == "-" else open(args.input, newline="")
+    target = sys.stdout if args.output == "-" else open(args.output, "w")
+
+    start = time.perf_counter()
+    try:
+        header, specs = read_specs(source, format)
+        count = stream(specs, target, header, args.chunk_size, args.processes, args.compositions, args.distribute_non_keys)
+    except ValueError as error:
+        parser.error(str(error))
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+
+    print("%i specifications in %.2f s" % (count, time.perf_counter() - start), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Parametric sweep driver for the FUG(K) short-cut method
+
+Runs batch.batch_distillation over the Cartesian product of grids in
+reflux factor, top and bottom recovery, q, T and P for one feed. The product
+is never built in full: it is cut into chunks of flat indices that are
+unravelled and designed one chunk at a time, either in this process or on a
+process pool
+
+Results come back as one structured array with a row per grid point
+"""
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import batch_distillation
+
+# Order of the grid axes, also the first fields of the result table
+axes = ("Rf", "topRecovery", "bottomRecovery", "q", "T", "P")
+
+result_dtype = np.dtype(
+    [(name, "f8") for name in axes]
+    + [("Nmin", "f4"), ("Rmin", "f4"), ("N", "f4"), ("Nr", "f4"), ("Ns", "f4"), ("actualTrays", "f4")]
+)
+
+
+def run_chunk(spec, grids, start, stop):
+    """
+    Designs the grid points with flat indices start to stop
+
+    spec holds the fixed inputs: components, flowrate, LiK, HeK, efficiency
+    and partialReboiler
+    """
+    shape = tuple(len(grid) for grid in grids)
+    index = np.unravel_index(np.arange(start, stop), shape)
+    values = [np.asarray(grid, dtype=float)[i] for grid, i in zip(grids, index)]
+    Rf, topRecovery, bottomRecovery, q, T, P = values
+
+    flowrate = np.broadcast_to(np.asarray(spec["flowrate"], dtype=float), (stop - start, len(spec["components"])))
+    pressure = None if np.all(np.isnan(P)) else P
+
+    results = batch_distillation(spec["components"], flowrate, spec["LiK"], spec["HeK"], T, q, topRecovery, bottomRecovery, Rf, spec["efficiency"], spec["partialReboiler"], P=pressure)
+
+    table = np.empty(stop - start, dtype=result_dtype)
+    for name, value in zip(axes, values):
+        table[name] = value
+    table["Nmin"] = results["Nmin"]
+    table["Rmin"] = results["Rmin"]
+    table["N"] = results["idealPlates"]
+    table["Nr"] = results["Nr"]
+    table["Ns"] = results["Ns"]
+    table["actualTrays"] = results["actualTrays"]
+
+    return table
+
+
+def sweep(components, flowrate, LiK, HeK, Rf, topRecovery, bottomRecovery, q, T, P=None, efficiency=1, partialReboiler=True, chunkSize=20000, processes=None):
+    """
+    Runs the short-cut design over every combination of the grids
+
+    Rf, topRecovery, bottomRecovery, q, T and P are scalars or 1D grids. With
+    P the top and bottom temperatures come from dew and bubble points,
+    without it the column is taken to sit at T
+
+    processes=None runs every chunk in this process with the vectorised
+    path, otherwise the chunks are spread over a pool of that many workers
+
+    Returns a structured array with one row per grid point, in C order of
+    the grids (Rf varies slowest, P fastest)
+    """
+    if P is None:
+        P = np.nan
+    grids = [np.atleast_1d(np.asarray(grid, dtype=float)) for grid in (Rf, topRecovery, bottomRecovery, q, T, P)]
+    total = int(np.prod([len(grid) for grid in grids]))
+
+    spec = {
+        "components": list(components),
+        "flowrate": np.asarray(flowrate, dtype=float),
+        "LiK": LiK,
+        "HeK": HeK,
+        "efficiency": efficiency,
+        "partialReboiler": partialReboiler
+    }
+    starts = range(0, total, chunkSize)
+    stops = [min(start + chunkSize, total) for start in starts]
+
+    if processes is None:
+        chunks = [run_chunk(spec, grids, start, stop) for start, stop in zip(starts, stops)]
+    else:
+        with ProcessPoolExecutor(processes) as pool:
+            n = len(stops)
+            chunks = list(pool.map(run_chunk, [spec]*n, [grids]*n, starts, stops))
+
+    return np.concatenate(chunks) if chunks else np.empty(0, dtype=result_dtype)
+
+
+if __name__ == "__main__":
+    import time
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+    start = time.perf_counter()
+    table = sweep(components, flowrates, "ethyl-acetylene", "pentane",
+        Rf=np.linspace(1.1, 1.5, 21),
+        topRecovery=np.linspace(0.9, 0.99, 10),
+        bottomRecovery=[0.999, 0.9999],
+        q=np.linspace(0, 1, 11),
+        T=np.linspace(400, 420, 11),
+        efficiency=0.72)
+    elapsed = time.perf_counter() - start
+
+    print("\nSweep of %i designs in %.2f s" % (len(table), elapsed))
+    best = table[np.argmin(table["actualTrays"])]
+    print("Fewest actual trays: %i at Rf = %.2f, top recovery = %.2f, q = %.1f, T = %.1f K" % (best["actualTrays"], best["Rf"], best["topRecovery"], best["q"], best["T"]))
@@ -0,0 +1,175 @@
+"""
+Synthesis of simple distillation sequences with shared sub-column designs
+
+The components present in the feed are ordered by volatility and every
+sequence of sharp splits is a binary tree over that ordered list. A column
+separating the contiguous group i..j between components k and k+1 (light key
+k, heavy key k+1) is the same whichever sequence it appears in, so each of
+the distinct (i, j, k) columns is designed exactly once, all of them in one
+call to batch.batch_distillation, and the sequences are scored by dynamic
+programming over the groups:
+
+cost(i, j) = min over k of column(i, j, k) + cost(i, k) + cost(k + 1, j)
+
+The feed to every column is taken as the original flows of its group, i.e.
+the key recoveries are assumed close to one
+"""
+import numpy as np
+
+from .batch import batch_distillation
+from .component_store import component_ids, vapour_pressure
+from .sizing import batch_sizing
+
+
+def volatility_order(components, flowrate, T):
+    """
+    Indices of the components present in the feed, from the most to the
+    least volatile at T
+    """
+    present = np.flatnonzero(np.asarray(flowrate, dtype=float) > 0)
+    Pvap = vapour_pressure(component_ids([components[i] for i in present]), T)[:, 0]
+    return present[np.argsort(-Pvap)]
+
+
+def sequence_columns(n):
+    """
+    Every distinct column (i, j, k) of the sequences of n ordered components
+    """
+    return [(i, j, k) for size in range(2, n + 1) for i in range(n - size + 1) for j in [i + size - 1] for k in range(i, j)]
+
+
+def count_sequences(n):
+    """
+    Number of sharp-split sequences of n components, the Catalan number C(n-1)
+    """
+    count = 1
+    for m in range(1, n):
+        count = count*2*(2*m - 1)//(m + 1)
+    return count
+
+
+def design_columns(components, flowrate, order, T, P=None, q=1, recovery=0.99, Rf=1.2, efficiency=1):
+    """
+    Designs every distinct column of the sequences in one batch
+
+    Returns the list of (i, j, k) columns, the batch_distillation results
+    and, with P, the batch_sizing results (otherwise None)
+    """
+    flowrate = np.asarray(flowrate, dtype=float)
+    columns = sequence_columns(len(order))
+
+    feeds = np.zeros((len(columns), len(components)))
+    LiK = np.empty(len(columns), dtype=int)
+    HeK = np.empty(len(columns), dtype=int)
+    for row, (i, j, k) in enumerate(columns):
+        group = order[i:j + 1]
+        feeds[row, group] = flowrate[group]
+        LiK[row] = order[k]
+        HeK[row] = order[k + 1]
+
+    # Columns with supercritical or badly ordered keys come out as nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        results = batch_distillation(components, feeds, LiK, HeK, T, q, recovery, recovery, Rf, efficiency, P=P)
+        sizes = None if P is None else batch_sizing(components, results, P, q, T)
+
+    return columns, results, sizes
+
+
+def best_sequence(columns, scores, n):
+    """
+    Cheapest sequence by dynamic programming over the component groups
+
+    scores holds one value per column of sequence_columns(n). Returns the
+    total score and the columns of the best sequence, top-down
+    """
+    score = {column: value for column, value in zip(columns, scores)}
+    cost = {(i, i): (0.0, None) for i in range(n)}
+
+    for size in range(2, n + 1):
+        for i in range(n - size + 1):
+            j = i + size - 1
+            cost[i, j] = min((score[i, j, k] + cost[i, k][0] + cost[k + 1, j][0], k) for k in range(i, j))
+
+    def unwind(i, j):
+        if i == j:
+            return []
+        k = cost[i, j][1]
+        return [(i, j, k)] + unwind(i, k) + unwind(k + 1, j)
+
+    return cost[0, n - 1][0], unwind(0, n - 1)
+
+
+def all_sequences(columns, scores, i, j):
+    """
+    Iterator over the total score and columns of every sequence separating
+    group i..j, reusing the column scores instead of redesigning anything.
+    The score table is built once and shared by the whole recursion
+    """
+    score = dict(zip(columns, scores))
+
+    def sequences(i, j):
+        if i == j:
+            yield 0.0, []
+            return
+        for k in range(i, j):
+            for top, topColumns in sequences(i, k):
+                for bottom, bottomColumns in sequences(k + 1, j):
+                    yield score[i, j, k] + top + bottom, [(i, j, k)] + topColumns + bottomColumns
+
+    return sequences(i, j)
+
+
+def synthesise(components, flowrate, T, P=None, q=1, recovery=0.99, Rf=1.2, efficiency=1, objective="actualTrays"):
+    """
+    Finds the best sharp-split sequence for a feed
+
+    objective names a per-column result to add up over the sequence: any key
+    of the batch_distillation results (e.g. "actualTrays", "idealPlates",
+    "Rmin") or, when P is given, of the batch_sizing results (e.g.
+    "reboilerDuty"). It may also be a function of (results, sizes) returning
+    one score per column. Columns that fail to converge score infinity
+
+    Returns a dictionary with the volatility order (component names), the
+    best score, the best sequence as a list of (light key, heavy key,
+    components of the column) and the per-column tables
+    """
+    order = volatility_order(components, flowrate, T)
+    columns, results, sizes = design_columns(components, flowrate, order, T, P, q, recovery, Rf, efficiency)
+
+    if callable(objective):
+        scores = objective(results, sizes)
+    elif objective in results:
+        scores = results[objective]
+    else:
+        scores = sizes[objective]
+    scores = np.where(np.isfinite(scores), scores, np.inf)
+
+    best, sequence = best_sequence(columns, scores, len(order))
+    names = [components[i] for i in order]
+
+    return {
+        "order": names,
+        "score": best,
+        "sequence": [(names[k], names[k + 1], names[i:j + 1]) for i, j, k in sequence],
+        "columns": columns,
+        "scores": scores,
+        "results": results,
+        "sizes": sizes
+    }
+
+
+if __name__ == "__main__":
+    import time
+
+    components = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+    flowrates = [10, 0, 0, 120, 0, 800, 400, 532, 0, 900, 300, 2097, 2163, 507, 15399, 0, 0]
+
+    start = time.perf_counter()
+    synthesis = synthesise(components, flowrates, 273+140, P=1810, objective="reboilerDuty")
+    elapsed = time.perf_counter() - start
+
+    n = len(synthesis["order"])
+    print("\n%i components: %i sequences from %i distinct columns in %.3f s" % (n, count_sequences(n), len(synthesis["columns"]), elapsed))
+    print("Best total reboiler duty: %.0f kW" % synthesis["score"])
+    for LiK, HeK, group in synthesis["sequence"]:
+        print("%s / %s \t(%i components)" % (LiK.title(), HeK.title(), len(group)))
@@ -0,0 +1,206 @@
+"""
+Underwood equation solver for a batch of columns
+
+First Underwood equation:   sum(z*a/(a - phi)) = 1 - q
+Second Underwood equation:  sum(a*xD/(a - phi)) = Rmin + 1
+
+Between two adjacent volatilities (of components present in the feed) the
+first equation rises monotonically from -inf to +inf, so each gap holds exactly
+one root. Every root is bracketed by its two poles and found with a safeguarded
+Newton iteration that falls back to bisection, so it always converges
+
+Arrays are shaped (cases x components), q is a scalar or shaped (cases,)
+"""
+import numpy as np
+
+from .instrumentation import record_solver
+
+
+def underwood_roots(z, alpha, q, tol=1e-12, maxiter=100):
+    """
+    Finds every root of the first Underwood equation lying between two adjacent
+    relative volatilities
+
+    Returns the roots and their lower bracketing volatility, both shaped
+    (cases x components-1) in ascending order. Gaps without a root (fewer
+    components present in the feed) are filled with nan
+    """
+    z = np.atleast_2d(np.asarray(z, dtype=float))
+    alpha = np.atleast_2d(np.asarray(alpha, dtype=float))
+    U1 = np.broadcast_to(1 - np.asarray(q, dtype=float), z.shape[:1])
+
+    # Only components present in the feed are poles of the equation
+    present = z > 0
+    order = np.argsort(np.where(present, alpha, np.inf), axis=1)
+    poles = np.take_along_axis(np.where(present, alpha, np.inf), order, axis=1)
+    weights = np.take_along_axis(np.where(present, z*alpha, 0.0), order, axis=1)
+    lower = poles[:, :-1]
+    upper = poles[:, 1:]
+    valid = np.isfinite(upper) & (upper > lower)
+
+    # Only the valid brackets are iterated on, as flat arrays of (case, gap)
+    caseIndex, gapIndex = np.nonzero(valid)
+    lo = lower[caseIndex, gapIndex]
+    hi = upper[caseIndex, gapIndex]
+    poleLo = lo.copy()
+    poleHi = hi.copy()
+
+    # Newton is run on g = (phi - lo)*(hi - phi)*f, which has the same root but
+    # no poles inside the bracket. Its end values give a regula falsi first guess
+    gLo = weights[caseIndex, gapIndex]
+    gHi = weights[caseIndex, gapIndex + 1]
+    phi = lo + (hi - lo)*gLo/(gLo + gHi)
+    step = hi - lo
+    stepOld = step.copy()
+
+    # Absent components add nothing to the sums
+    zA = np.where(present, z*alpha, 0.0)
+    a = np.where(present, alpha, np.inf)
+
+    active = np.arange(phi.size)
+    iterations = evaluations = 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for iterations in range(maxiter):
+            if active.size == 0:
+                break
+            evaluations += active.size
+            rows = caseIndex[active]
+            p = phi[active]
+            diff = a[rows] - p[:, None]
+            f = np.sum(zA[rows]/diff, axis=1) - U1[rows]
+            fPrime = np.sum(zA[rows]/diff**2, axis=1)
+
+            # f is increasing, so a negative value means the root lies above phi
+            low = np.where(f < 0, p, lo[active])
+            high = np.where(f < 0, hi[active], p)
+            lo[active] = low
+            hi[active] = high
+
+            pl = poleLo[active]
+            ph = poleHi[active]
+            span = (p - pl)*(ph - p)
+            g = span*f
+            gPrime = (ph + pl - 2*p)*f + span*fPrime
+
+            # Bisect when Newton would leave the bracket or is not converging fast
+            outside = ((p - high)*gPrime - g)*((p - low)*gPrime - g) > 0
+            slow = np.abs(2*g) > np.abs(stepOld[active]*gPrime)
+            bisect = outside | slow | (gPrime == 0)
+
+            dx = np.where(bisect, 0.5*(high - low), g/gPrime)
+            p = np.where(bisect, low + dx, p - dx)
+            stepOld[active] = step[active]
+            step[active] = dx
+            phi[active] = p
+
+            converged = (np.abs(dx) <= tol*np.maximum(1, np.abs(p))) | (f == 0)
+            active = active[~converged]
+        else:
+            iterations = maxiter
+
+    record_solver("underwood_roots", iterations, evaluations, active.size, phi.size)
+
+    roots = np.full(lower.shape, np.nan)
+    roots[caseIndex, gapIndex] = phi
+
+    return roots, np.where(valid, lower, np.nan)
+
+
+def heavy_key_root(z, alpha, q, HeK):
+    """
+    Returns the Underwood root directly above the heavy key volatility, the
+    one used for a Class 1 minimum reflux calculation
+    """
+    alpha = np.atleast_2d(np.asarray(alpha, dtype=float))
+    rows = np.arange(alpha.shape[0])
+    alphaHeK = alpha[rows, np.asarray(HeK)]
+
+    roots, lower = underwood_roots(z, alpha, q)
+    above = np.where(lower >= alphaHeK[:, None], roots, np.inf)
+
+    return above.min(axis=1)
+
+
+def minimum_reflux(z, xD, alpha, q, HeK):
+    """
+    Class 1 minimum reflux ratio from the root directly above the heavy key
+
+    Returns phi and Rmin, both shaped (cases,)
+    """
+    xD = np.atleast_2d(np.asarray(xD, dtype=float))
+    alpha = np.atleast_2d(np.asarray(alpha, dtype=float))
+
+    phi = heavy_key_root(z, alpha, q, HeK)
+    Rmin = np.sum(alpha*xD/(alpha - phi[:, None]), axis=1) - 1
+
+    return phi, Rmin
+
+
+def distributed_minimum_reflux(feed, d, alpha, q, LiK, HeK):
+    """
+    Class 2 minimum reflux ratio for columns with distributed non-keys
+
+    feed and d are component flowrates in the feed and the distillate. d is
+    only used for the keys and for components outside the key range, the
+    distillate flows of components between the keys are solved for. Every
+    root between the heavy and light key volatilities gives one second
+    Underwood equation, which together form a linear system in Vmin and the
+    unknown distillate flows
+
+    Returns Rmin and the distillate flowrates with the distributed non-keys
+    filled in
+    """
+    feed = np.atleast_2d(np.asarray(feed, dtype=float))
+    d = np.atleast_2d(np.asarray(d, dtype=float)).copy()
+    alpha = np.atleast_2d(np.asarray(alpha, dtype=float))
+    cases, n = feed.shape
+    rows = np.arange(cases)
+    LiK = np.broadcast_to(np.asarray(LiK), (cases,))
+    HeK = np.broadcast_to(np.asarray(HeK), (cases,))
+
+    z = feed/feed.sum(axis=1, keepdims=True)
+    roots, lower = underwood_roots(z, alpha, q)
+
+    alphaLiK = alpha[rows, LiK][:, None]
+    alphaHeK = alpha[rows, HeK][:, None]
+    between = (alpha > alphaHeK) & (alpha < alphaLiK) & (feed > 0)
+    keyRoots = (lower >= alphaHeK) & (lower < alphaLiK)
+    phi = np.where(keyRoots, roots, np.nan)
+
+    # Unknowns are [Vmin, d of every distributed component], padded per case
+    # with identity rows so the whole batch is solved in one call
+    size = 1 + n
+    A = np.zeros((cases, size, size))
+    b = np.zeros((cases, size))
+    order = np.argsort(~keyRoots, axis=1, kind="stable")
+    sortedPhi = np.take_along_axis(phi, order, axis=1)
+    nRoots = keyRoots.sum(axis=1)
+
+    known = np.where(between, 0.0, d)
+    for k in range(n - 1):
+        active = k < nRoots
+        p = np.where(active, sortedPhi[:, k], 0.0)[:, None]
+        term = alpha/(alpha - p)
+        A[:, k, 0] = np.where(active, 1.0, 0.0)
+        A[:, k, 1:] = np.where(active[:, None] & between, -term, 0.0)
+        b[:, k] = np.where(active, np.sum(np.where(between, 0.0, term*known), axis=1), 0.0)
+
+    # Rows not used by a root pin the unused unknowns to zero
+    used = np.zeros((cases, size), dtype=bool)
+    used[:, 0] = True
+    used[:, 1:] = between
+    free = np.arange(size)[None, :] >= nRoots[:, None]
+    pinRows = np.argsort(~free, axis=1, kind="stable")
+    pinCols = np.argsort(used, axis=1, kind="stable")
+    nPin = size - nRoots
+    for k in range(size):
+        active = k < nPin
+        r = pinRows[rows, k]
+        c = pinCols[rows, k]
+        A[rows[active], r[active], c[active]] = 1.0
+
+    solution = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    d = np.where(between, solution[:, 1:], d)
+    Rmin = solution[:, 0]/d.sum(axis=1) - 1
+
+    return Rmin, d
@@ -0,0 +1,24 @@
+"""
+Shared specifications of the tests, the debutanizer of the examples
+"""
+import pytest
+
+from fugk.column import Distillation
+
+COMPONENTS = ["hydrogen", "carbon monoxide", "carbon dioxide", "methane", "acetylene", "ethylene", "ethane", "methyl-acetylene", "propadiene", "propylene", "propane", "ethyl-acetylene", "1-butene", "butane", "pentane", "water", "nitrogen"]
+FLOWRATES = [0, 0, 0, 0, 0, 0, 0, 532, 0, 0, 0, 2097, 2163, 507, 15399, 0, 0]
+
+
+@pytest.fixture
+def components():
+    return list(COMPONENTS)
+
+
+@pytest.fixture
+def flowrates():
+    return list(FLOWRATES)
+
+
+@pytest.fixture
+def debutanizer():
+    return Distillation(COMPONENTS, FLOWRATES, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999)
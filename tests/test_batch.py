@@ -0,0 +1,72 @@
+"""
+Regression tests of batch.batch_distillation against the scalar
+column.Distillation methods
+"""
+import io
+import contextlib
+
+import numpy as np
+import pytest
+
+from fugk.batch import batch_distillation
+from fugk.column import Distillation
+
+
+def scalar_design(column, Rf, efficiency):
+    """
+    Runs the printing methods of column.Distillation in the order of the
+    example, without the output
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        column.find_vapour_pressure()
+        column.find_relative_volatilty()
+        column.print_distillate_flowrate()
+        column.print_bottom_flowrate()
+        column.find_N_min()
+        column.find_minimum_reflux()
+        column.gilliland_correlation(Rf)
+        column.feed_stage_location()
+        column.actual_trays(efficiency)
+    return column
+
+
+def assert_matches(column, results, case=0):
+    """
+    Compares every value the scalar and batch designs share
+    """
+    for name in ("Nmin", "Rmin", "R", "phi", "idealPlates", "Nr", "Ns", "idealFeedTray", "actualTrays", "trayEfficiency"):
+        assert results[name][case] == pytest.approx(getattr(column, name), rel=1e-10), name
+    for name in ("rvHeK", "topComposition", "bottomComposition", "topMoleFraction", "bottomMoleFraction"):
+        expected = [getattr(column, name)[key] for key in column.components]
+        np.testing.assert_allclose(results[name][case], expected, rtol=1e-10, err_msg=name)
+
+
+def test_debutanizer_matches_scalar(debutanizer, components, flowrates):
+    column = scalar_design(debutanizer, 1.2, 0.72)
+    results = batch_distillation(components, [flowrates], "ethyl-acetylene", "pentane", 273+140, 0.5, 0.95, 0.9999, 1.2, 0.72)
+
+    assert_matches(column, results)
+    # Values of the published example
+    assert (column.Nmin, column.idealPlates, column.Nr, column.Ns, column.actualTrays) == (16, 34, 29, 5, 48)
+    assert column.Rmin == pytest.approx(5.26, abs=0.005)
+
+
+def test_every_case_matches_scalar(components, flowrates):
+    rng = np.random.default_rng(1)
+    feeds = np.array(flowrates)*rng.uniform(0.8, 1.2, (5, len(components)))
+    T = np.array([400, 405, 410, 413, 420])
+    Rf = np.array([1.1, 1.2, 1.3, 1.4, 1.5])
+
+    results = batch_distillation(components, feeds, "ethyl-acetylene", "pentane", T, 0.5, 0.95, 0.9999, Rf, 72)
+
+    for case in range(len(feeds)):
+        column = Distillation(components, feeds[case].tolist(), "ethyl-acetylene", "pentane", 1810, T[case], 0.5, 0.95, 0.9999)
+        assert_matches(scalar_design(column, Rf[case], 72), results, case)
+
+
+def test_keys_given_by_index_or_name(components, flowrates):
+    byName = batch_distillation(components, [flowrates], "ethyl-acetylene", "pentane", 413, 0.5, 0.95, 0.9999, 1.2)
+    byIndex = batch_distillation(components, [flowrates], components.index("ethyl-acetylene"), components.index("pentane"), 413, 0.5, 0.95, 0.9999, 1.2)
+
+    for name in ("Nmin", "Rmin", "idealPlates", "Nr", "Ns"):
+        np.testing.assert_array_equal(byName[name], byIndex[name])
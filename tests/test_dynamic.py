@@ -0,0 +1,91 @@
+"""
+Tests of the dynamic tray-by-tray model and its BDF integrator on a small
+three component column
+"""
+import numpy as np
+import pytest
+
+from fugk.dynamic import DynamicColumn, bdf_integrate
+
+F = 100.0
+STEP = {"F": 1.1*F}
+
+
+def rk4(fun, y, hours, steps):
+    """
+    Classical Runge-Kutta reference with a fixed step
+    """
+    dt = hours/steps
+    for _ in range(steps):
+        k1 = fun(y)
+        k2 = fun(y + dt/2*k1)
+        k3 = fun(y + dt/2*k2)
+        k4 = fun(y + dt*k3)
+        y = y + dt/6*(k1 + 2*k2 + 2*k3 + k4)
+    return y
+
+
+def product_balance(column, M, inputs):
+    """
+    Feed less distillate and bottoms flows of every component
+    """
+    holdup = M.sum(axis=1)
+    _, _, D, B = column.flows(holdup[None], inputs)
+    x = M/holdup[:, None]
+    return inputs["F"]*inputs["z"] - D[0]*x[0] - B[0]*x[-1], D[0], B[0]
+
+
+@pytest.fixture(scope="module")
+def settled():
+    column = DynamicColumn(np.array([4.0, 2.0, 1.0]), F, np.array([0.3, 0.4, 0.3]), 0.5, 100.0, 120.0, 10, 5, 1.0, 0.8, 10.0)
+    column.initial_state([0.6, 0.4, 0.0], [0.0, 0.3, 0.7])
+    return column, column.steady_state(20).copy()
+
+
+@pytest.fixture
+def column(settled):
+    column, state = settled
+    column.state = state.copy()
+    column.time = 0.0
+    return column
+
+
+def test_steady_state(column):
+    dM = column.derivatives(column.state[None], column.inputs)[0]
+    assert np.max(np.abs(dM)) < 1e-6
+
+    balance, D, B = product_balance(column, column.state, column.inputs)
+    assert balance == pytest.approx(0, abs=1e-6)
+    assert D == pytest.approx(120 + 0.5*F - 100)
+    assert B == pytest.approx(F - D)
+
+
+def test_feed_step_matches_runge_kutta(column):
+    inputs = dict(column.inputs, **STEP)
+    fun = lambda M: column.derivatives(M, inputs)
+    hours = 0.05
+
+    reference = rk4(fun, column.state[None], hours, 1000)[0]
+    change = np.max(np.abs(reference - column.state))
+    assert change > 1e-2
+
+    for rtol, atol, error in ((1e-4, 1e-6, 1e-2), (1e-7, 1e-10, 1e-4)):
+        solution = bdf_integrate(lambda t, M: fun(M), column.state, 0.0, hours, rtol, atol)
+        assert solution["t"][-1] == pytest.approx(hours)
+        assert np.max(np.abs(solution["y"][-1] - reference)) < error*change
+
+
+def test_feed_step_settles(column):
+    before = column.state.copy()
+    response = column.simulate(20, lambda t: STEP, points=5)
+    inputs = dict(column.inputs, **STEP)
+
+    # The extra vapour of the partly vaporised feed leaves as distillate
+    assert response["D"][-1] == pytest.approx(120 + 0.5*1.1*F - 100, rel=1e-6)
+    assert response["x"][-1].sum(axis=1) == pytest.approx(1)
+
+    balance, D, B = product_balance(column, column.state, inputs)
+    assert balance == pytest.approx(0, abs=1e-5)
+    assert D + B == pytest.approx(1.1*F)
+    assert np.max(np.abs(column.state - before)) > 1e-2
+    assert np.max(np.abs(column.derivatives(column.state[None], inputs))) < 1e-4
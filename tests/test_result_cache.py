@@ -0,0 +1,60 @@
+"""
+Tests of the two-tier result cache
+"""
+import pytest
+
+from fugk.result_cache import ResultCache, encode_result
+
+FLOWRATES = [532, 2097, 2163, 507, 15399]
+
+
+@pytest.fixture
+def spec():
+    components = ["methyl-acetylene", "ethyl-acetylene", "1-butene", "butane", "pentane"]
+    return lambda Rf: (components, FLOWRATES, "ethyl-acetylene", "pentane", 1810, 273+140, 0.5, 0.95, 0.9999, Rf, 0.72)
+
+
+def test_hits_share_a_frozen_copy(spec):
+    cache = ResultCache()
+    designed = cache.design(*spec(1.2))
+    designed.rvHeK[0] = 0
+    hit = cache.design(*spec(1.2))
+
+    assert hit.rvHeK[0] != 0
+    assert not hit.rvHeK.flags.writeable
+    with pytest.raises(AttributeError):
+        hit.R = 0
+    assert cache.stats()["hits"] == 1
+
+
+def test_disk_hit_after_reopening(spec, tmp_path):
+    path = tmp_path/"designs.sqlite"
+    cache = ResultCache(path)
+    designed = cache.design(*spec(1.2))
+    cache.close()
+
+    cache = ResultCache(path)
+    hit = cache.design(*spec(1.2))
+    assert cache.stats()["diskHits"] == 1
+    assert hit.R == designed.R
+    assert list(hit.topComposition) == list(designed.topComposition)
+
+
+def test_memory_hits_keep_disk_rows_recent(spec, tmp_path):
+    size = len(encode_result(ResultCache().design(*spec(1.2))))
+    cache = ResultCache(tmp_path/"designs.sqlite", maxBytes=2.5*size)
+    cache.design(*spec(1.2))
+    cache.design(*spec(1.3))
+
+    # 1.2 is only used from memory, so without the refreshed access time
+    # its disk row would be the oldest and evicted first
+    cache.design(*spec(1.2))
+    cache.design(*spec(1.4))
+
+    assert cache.stats()["diskEntries"] == 2
+    cache.memory.clear()
+    cache.design(*spec(1.2))
+    assert cache.stats()["diskHits"] == 1
+    cache.design(*spec(1.3))
+    assert cache.stats()["diskHits"] == 1
+    cache.close()
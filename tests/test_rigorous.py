@@ -0,0 +1,53 @@
+"""
+Tests of the rigorous stage-by-stage check of a short-cut design
+"""
+import numpy as np
+import pytest
+
+from fugk.rigorous import thomas, check_design
+
+P = 1810
+
+
+@pytest.fixture
+def designs(debutanizer):
+    shortcut = debutanizer.design(1.2, 0.72, columnTemperatures=True, distributeNonKeys=True)
+    return shortcut, check_design(shortcut, P)
+
+
+def test_thomas_matches_dense_solve():
+    rng = np.random.default_rng(0)
+    n = 8
+    lower = rng.uniform(0.5, 1, (n - 1, 3))
+    upper = rng.uniform(0.5, 1, (n - 1, 3))
+    diagonal = -(rng.uniform(2, 3, (n, 3)))
+    rhs = rng.uniform(-1, 1, (n, 3))
+
+    x = thomas(lower, diagonal, upper, rhs)
+    for c in range(3):
+        A = np.diag(diagonal[:, c]) + np.diag(lower[:, c], -1) + np.diag(upper[:, c], 1)
+        assert x[:, c] == pytest.approx(np.linalg.solve(A, rhs[:, c]), rel=1e-10)
+
+
+def test_mass_balance_closes(designs):
+    shortcut, rigorous = designs
+    assert rigorous["converged"]
+
+    feed = shortcut.feedComposition
+    products = rigorous["topComposition"] + rigorous["bottomComposition"]
+    assert products == pytest.approx(feed, rel=1e-6, abs=1e-9)
+    assert rigorous["topComposition"].sum() == pytest.approx(shortcut.topComposition.sum(), rel=1e-8)
+    assert rigorous["bottomComposition"].sum() == pytest.approx(feed.sum() - shortcut.topComposition.sum(), rel=1e-8)
+
+
+def test_stage_compositions(designs):
+    shortcut, rigorous = designs
+    absent = shortcut.feedComposition == 0
+
+    for name in ("x", "y"):
+        assert rigorous[name].sum(axis=1) == pytest.approx(1, rel=1e-10)
+        assert np.all(rigorous[name] >= 0)
+        assert np.all(rigorous[name][:, absent] == 0)
+
+    # The temperature rises from the condenser to the reboiler
+    assert np.all(np.diff(rigorous["T"]) > 0)
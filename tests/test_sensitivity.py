@@ -0,0 +1,53 @@
+"""
+Tests of the analytic design sensitivities against central finite
+differences of the unrounded design
+"""
+import numpy as np
+import pytest
+
+from fugk.sensitivity import batch_sensitivities, scalar_parameters
+
+OUTPUTS = ("Nmin", "phi", "Rmin", "R", "N", "Nr", "Ns")
+SCALARS = {"topRecovery": 0.95, "bottomRecovery": 0.9999, "q": 0.5, "T": 273.0 + 140, "Rf": 1.2}
+
+
+def sensitivities(components, flowrate, scalars):
+    return batch_sensitivities(components, flowrate, "ethyl-acetylene", "pentane", scalars["T"], scalars["q"], scalars["topRecovery"], scalars["bottomRecovery"], scalars["Rf"])
+
+
+@pytest.fixture
+def feeds(flowrates):
+    rng = np.random.default_rng(0)
+    return np.array(flowrates, dtype=float)*rng.uniform(0.8, 1.2, (3, len(flowrates)))
+
+
+@pytest.mark.parametrize("name", scalar_parameters)
+def test_scalar_gradients(components, feeds, name):
+    h = 1e-7*SCALARS[name]
+    up = sensitivities(components, feeds, dict(SCALARS, **{name: SCALARS[name] + h}))
+    down = sensitivities(components, feeds, dict(SCALARS, **{name: SCALARS[name] - h}))
+    analytic = sensitivities(components, feeds, SCALARS)
+    column = analytic["parameters"].index(name)
+
+    for output in OUTPUTS:
+        difference = (up[output] - down[output])/(2*h)
+        assert analytic["gradients"][output][:, column] == pytest.approx(difference, rel=1e-4, abs=1e-8), output
+
+
+def test_flowrate_gradients(components, feeds):
+    analytic = sensitivities(components, feeds, SCALARS)
+
+    for k in np.flatnonzero(feeds[0] > 0):
+        h = 1e-6*feeds[:, k]
+        up = feeds.copy()
+        up[:, k] += h
+        down = feeds.copy()
+        down[:, k] -= h
+        up = sensitivities(components, up, SCALARS)
+        down = sensitivities(components, down, SCALARS)
+        column = analytic["parameters"].index(components[k])
+
+        for output in OUTPUTS:
+            difference = (up[output] - down[output])/(2*h)
+            assert analytic["gradients"][output][:, column] == pytest.approx(difference, rel=1e-4, abs=1e-8), (components[k], output)
+
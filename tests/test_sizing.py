@@ -0,0 +1,55 @@
+"""
+Tests of the column sizing densities
+"""
+import numpy as np
+import pytest
+
+from fugk.batch import batch_distillation
+from fugk.component_store import component_ids, liquid_density, store
+from fugk.sizing import batch_sizing, mixture_densities
+
+
+@pytest.mark.parametrize("name, T, density", [
+    ("propane", 231.1, 581),
+    ("propane", 298.15, 493),
+    ("butane", 298.15, 573),
+    ("pentane", 298.15, 621),
+    ("methane", 111.67, 422.6),
+    ("nitrogen", 77.35, 806)
+])
+def test_rackett_matches_saturated_liquid(name, T, density):
+    assert liquid_density(component_ids([name]), T)[0, 0] == pytest.approx(density, rel=0.02)
+
+
+def test_mixture_liquid_density():
+    ids = component_ids(["butane", "pentane"])
+    fractions = np.array([[1.0, 0.0], [0.0, 1.0], [0.5, 0.5]])
+    T = np.full(3, 298.15)
+    vapour, liquid, meanMolarMass = mixture_densities(ids, fractions, T, 100)
+
+    pure = liquid_density(ids, 298.15)[:, 0]
+    assert liquid[:2] == pytest.approx(pure)
+    massFractions = fractions[2]*meanMolarMass[:2]/meanMolarMass[2]
+    assert liquid[2] == pytest.approx(1/np.sum(massFractions/pure))
+    assert vapour == pytest.approx(100*1000*meanMolarMass/(8314.46*298.15))
+
+
+def test_supercritical_liquid_has_no_density():
+    ids = component_ids(["hydrogen", "pentane"])
+    _, liquid, _ = mixture_densities(ids, np.array([[0.01, 0.99], [0.0, 1.0]]), np.full(2, 350.0), 1000)
+
+    assert np.isnan(liquid[0])
+    assert liquid[1] > 500
+
+
+def test_product_densities_use_molar_fractions(components, flowrates):
+    results = batch_distillation(components, [flowrates], "ethyl-acetylene", "pentane", 413, 0.5, 0.95, 0.9999, 1.2, 0.72, P=1810)
+    sizes = batch_sizing(components, results, 1810, 0.5)
+    molarMass = store["mr"][component_ids(components)]
+
+    for product in ("top", "bottom"):
+        flow = results["mass%sComposition" % product.capitalize()]/molarMass
+        T = results["%sTemperature" % product]
+        _, liquid, _ = mixture_densities(component_ids(components), flow/flow.sum(axis=1, keepdims=True), T, 1810)
+        assert sizes["%sLiquidDensity" % product] == pytest.approx(liquid)
+    assert sizes["D"] + sizes["B"] == pytest.approx(np.sum(np.array(flowrates)/molarMass))
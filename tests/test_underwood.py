@@ -0,0 +1,82 @@
+"""
+Tests of the bracketed Underwood solver, including the Class 2 minimum
+reflux with a distributed non-key
+"""
+import numpy as np
+import pytest
+
+from fugk.underwood import underwood_roots, minimum_reflux, distributed_minimum_reflux
+
+# Five components, the keys have volatilities 2 and 1 and a non-key at 1.5
+# lies between them
+ALPHA = np.array([4.0, 2.0, 1.5, 1.0, 0.5])
+FEED = np.array([20.0, 20.0, 20.0, 20.0, 20.0])
+LIK, HEK = 1, 3
+
+
+def first_equation(z, alpha, q, phi):
+    return np.sum(z*alpha/(alpha - phi)) - (1 - q)
+
+
+def test_one_root_per_gap():
+    z = FEED/FEED.sum()
+    for q in (0, 0.5, 1, 1.3):
+        roots, lower = underwood_roots(z, ALPHA, q)
+        poles = np.sort(ALPHA)
+
+        np.testing.assert_array_equal(lower[0], poles[:-1])
+        assert np.all((roots[0] > poles[:-1]) & (roots[0] < poles[1:]))
+        for phi in roots[0]:
+            assert first_equation(z, ALPHA, q, phi) == pytest.approx(0, abs=1e-9)
+
+
+def test_absent_components_are_not_poles():
+    z = np.array([0.3, 0.0, 0.4, 0.0, 0.3])
+    roots, lower = underwood_roots(z, ALPHA, 1)
+
+    assert np.sum(np.isfinite(roots)) == 2
+    found = roots[np.isfinite(roots)]
+    np.testing.assert_allclose([first_equation(z, ALPHA, 1, phi) for phi in found], 0, atol=1e-9)
+
+
+def test_batch_matches_single_cases():
+    rng = np.random.default_rng(0)
+    z = rng.uniform(0.05, 1, (50, 5))
+    z /= z.sum(axis=1, keepdims=True)
+    q = rng.uniform(0, 1.2, 50)
+
+    roots, _ = underwood_roots(z, ALPHA, q)
+    for case in range(50):
+        single, _ = underwood_roots(z[case], ALPHA, q[case])
+        np.testing.assert_allclose(roots[case], single[0], rtol=1e-12)
+
+
+def test_class_2_distributed_non_key():
+    # The keys split 98/2, the lightest goes to the top and the heaviest to
+    # the bottom. The non-key between the keys is solved for
+    d = np.array([FEED[0], 0.98*FEED[1], 0.0, 0.02*FEED[3], 0.0])
+    Rmin, distillate = distributed_minimum_reflux(FEED, d, ALPHA, 1, LIK, HEK)
+    distillate = distillate[0]
+
+    assert 0 < distillate[2] < FEED[2]
+    np.testing.assert_array_equal(np.delete(distillate, 2), np.delete(d, 2))
+
+    # Every root between the keys gives the same Vmin in the second equation
+    roots, lower = underwood_roots(FEED/FEED.sum(), ALPHA, 1)
+    keyRoots = roots[0][(lower[0] >= ALPHA[HEK]) & (lower[0] < ALPHA[LIK])]
+    assert keyRoots.size == 2
+    Vmin = [np.sum(ALPHA*distillate/(ALPHA - phi)) for phi in keyRoots]
+    assert Vmin[0] == pytest.approx(Vmin[1], rel=1e-10)
+    assert Rmin[0] == pytest.approx(Vmin[0]/distillate.sum() - 1, rel=1e-10)
+
+
+def test_class_2_reduces_to_class_1():
+    # Without a component between the keys both methods use the same root
+    alpha = np.array([4.0, 2.0, 1.0, 0.5])
+    feed = np.array([25.0, 25.0, 25.0, 25.0])
+    d = np.array([25.0, 0.98*25, 0.02*25, 0.0])
+
+    Rmin2, _ = distributed_minimum_reflux(feed, d, alpha, 0.5, 1, 2)
+    _, Rmin1 = minimum_reflux(feed/feed.sum(), d/d.sum(), alpha, 0.5, 2)
+
+    assert Rmin2[0] == pytest.approx(Rmin1[0], rel=1e-10)
@@ -0,0 +1,44 @@
+"""
+Tests of the opt-in vapour pressure table cache
+"""
+import numpy as np
+import pytest
+
+from fugk.batch import batch_distillation
+from fugk.component_store import store, component_ids, vapour_pressure
+from fugk.vp_cache import VapourPressureCache
+
+
+def test_tables_within_tolerance():
+    cache = VapourPressureCache(tol=1e-8)
+    ids = component_ids(["ethyl-acetylene", "butane", "pentane"])
+    T = np.linspace(store["Tmin"][ids].max(), store["Tmax"][ids].min(), 10001)
+
+    assert cache.vapour_pressure(ids, T) == pytest.approx(vapour_pressure(ids, T), rel=2e-8)
+    stats = cache.stats()
+    assert stats["tables"] == 3
+    assert stats["maxError"] <= 1e-8
+    assert stats["bytes"] == 4*8*stats["intervals"]
+    assert stats["hits"] == T.size*3 and stats["fallbacks"] == 0
+
+
+def test_exact_outside_range():
+    cache = VapourPressureCache()
+    ids = component_ids(["pentane"])
+    T = store["Tmax"][ids] + np.array([1.0, 50.0])
+
+    assert cache.vapour_pressure(ids, T) == pytest.approx(vapour_pressure(ids, T), rel=1e-14)
+    assert cache.stats()["fallbacks"] == 2
+    assert cache.stats()["hitRate"] == 0
+
+
+def test_batch_design_with_cache(components, flowrates):
+    feeds = np.array(flowrates, dtype=float)*np.linspace(0.8, 1.2, 5)[:, None]
+    T = np.linspace(400, 420, 5)
+    cache = VapourPressureCache()
+    exact = batch_distillation(components, feeds, "ethyl-acetylene", "pentane", T, 0.5, 0.95, 0.9999, 1.2)
+    cached = batch_distillation(components, feeds, "ethyl-acetylene", "pentane", T, 0.5, 0.95, 0.9999, 1.2, cache=cache)
+
+    for key in ("rvHeK", "Nmin", "Rmin", "idealPlates"):
+        assert cached[key] == pytest.approx(exact[key], rel=1e-6, nan_ok=True), key
+    assert cache.stats()["hits"] + cache.stats()["fallbacks"] == 5*len(components)